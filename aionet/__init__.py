@@ -1,14 +1,46 @@
 from aionet.dispatcher import ConnectionHandler, platforms
-from aionet.exceptions import AionetAuthenticationError, AionetTimeoutError, AionetCommitError
+from aionet.cache import HostCache
+from aionet.channels import ChannelPool
+from aionet.fleet import FleetRunner, FleetResult
+from aionet.limiter import AdaptiveLimiter
+from aionet.breaker import CircuitBreaker
+from aionet.probe import TCPProber, ProbeResult
+from aionet.spec import DeviceSpec
+from aionet.inventory import Inventory, Host
+from aionet.pool import ConnectionPool
+from aionet.workers import ShardedRunner
+from aionet.tunnels import JumpHost, TunnelManager
+from aionet.connections import ExecResult
+from aionet.exceptions import AionetAuthenticationError, AionetTimeoutError, AionetCommitError, AionetConfigError
+from aionet.exceptions import AionetConnectionError, AionetCircuitOpenError
 from aionet.logging import logger
 from aionet.version import __author__, __author_email__, __url__, __version__
 
 __all__ = (
     "ConnectionHandler",
     "platforms",
+    "HostCache",
+    "ChannelPool",
+    "FleetRunner",
+    "FleetResult",
+    "AdaptiveLimiter",
+    "CircuitBreaker",
+    "TCPProber",
+    "ProbeResult",
+    "DeviceSpec",
+    "Inventory",
+    "Host",
+    "ConnectionPool",
+    "ShardedRunner",
+    "JumpHost",
+    "TunnelManager",
+    "ExecResult",
     "logger",
     "AionetAuthenticationError",
     "AionetTimeoutError",
     "AionetCommitError",
+    "AionetConfigError",
+    "AionetConnectionError",
+    "AionetCircuitOpenError",
     "vendors",
 )
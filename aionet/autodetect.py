@@ -0,0 +1,217 @@
+"""
+Autodetect Module, detecting device_type of a device by its SSH banner, prompt and show version
+"""
+import re
+
+from aionet.cache import HostCache
+from aionet.exceptions import AionetAuthenticationError, AionetConnectionError
+from aionet.vendors.devices.base import BaseDevice
+from aionet.utils import accepted_params, strip_ansi_escape_codes
+
+_BANNER_TYPES = (
+    (r"ROSSSH", "mikrotik_routeros"),
+    (r"Comware", "hp_comware"),
+)
+"""Patterns of SSH server version strings, which identify the platform"""
+
+_PROMPT_TYPES = (
+    (r"^RP/\d+/[\w/]+/CPU\d+:\S+[#>]$", "cisco_ios_xr"),
+    (r"^<[^<>]+>$", "hp_comware"),
+    (r"^\[[^\]]+@[^\]]+\]\s*>$", "mikrotik_routeros"),
+    (r"^\([^)]+\) [*^]?\[[^\]]+\] (\(.*?\))?\s?[#>]$", "aruba_aos_8"),
+    (r"^[\w.\-]+@[\w.\-]+:.*[$#]$", "terminal"),
+    (r"\$$", "terminal"),
+    (r"^[\w.\-]+@[\w.\-]+[>#]$", "juniper_junos"),
+)
+"""Patterns of prompts, which identify the platform"""
+
+_VERSION_TYPES = (
+    (r"Cisco IOS XR", "cisco_ios_xr"),
+    (r"Cisco Nexus|NX-OS", "cisco_nxos"),
+    (r"Cisco Adaptive Security Appliance", "cisco_asa"),
+    (r"IOS[ -]XE", "cisco_ios_xe"),
+    (r"Cisco IOS Software|Cisco Internetwork Operating System", "cisco_ios"),
+    (r"Arista", "arista_eos"),
+    (r"JUNOS|Junos", "juniper_junos"),
+    (r"ArubaOS.*Version 8", "aruba_aos_8"),
+    (r"ArubaOS", "aruba_aos_6"),
+    (r"EdgeSwitch|Ubiquiti", "ubiquity_edge"),
+    (r"Fujitsu|FUJITSU", "fujitsu_switch"),
+    (r"Comware", "hp_comware"),
+    (r"RouterOS|MikroTik", "mikrotik_routeros"),
+)
+"""Patterns of show version output, which identify the platform"""
+
+_RECONNECT_TYPES = ("mikrotik_routeros",)
+"""Platforms, which login differs from the generic one, the detection session can't be reused"""
+
+_PROMPT_END = r"[>#$%\]]\s*$"
+"""Pattern of the end of any prompt"""
+
+_MORE_PATTERN = r"-+\s*[Mm]ore"
+"""Pattern of paging prompt"""
+
+_LOGIN_PROMPT_WAIT = 3
+"""Seconds to wait for the prompt after login, before asking for it with a new line"""
+
+
+def _match(patterns, text, flags=0):
+    for pattern, device_type in patterns:
+        if re.search(pattern, text, flags):
+            return device_type
+    return None
+
+
+def detect_from_banner(banner):
+    """ device_type by SSH server version string or None """
+    return _match(_BANNER_TYPES, banner or "")
+
+
+def detect_from_prompt(prompt):
+    """ device_type by prompt (last line of the output) or None """
+    return _match(_PROMPT_TYPES, prompt.strip())
+
+
+def detect_from_version(output):
+    """ device_type by output of show version or None """
+    return _match(_VERSION_TYPES, output, re.S)
+
+
+class AutodetectHandler:
+    """
+    Handler of devices with device_type="autodetect"
+
+    It connects with the generic login, detects the platform by SSH server banner, prompt and at most one
+    show version, and hands the session over to the class of the detected platform, so the device
+    is logged in only once. The detected device_type is cached per host in :class:`aionet.HostCache`,
+    later connections use it directly. Attributes of the detected device are available on the handler::
+
+        handler = ConnectionHandler(device_type="autodetect", **params)
+        async with handler as device:
+            print(handler.device_type, await device.send_command("show clock"))
+    """
+
+    def __init__(self, mapper, *args, **kwargs):
+        """
+        :param mapper: dict of device types and their classes
+        :param kwargs: ConnectionHandler params, host_cache is used for caching of the detected device_type
+        """
+        self._mapper = mapper
+        self._args = args
+        self._kwargs = kwargs
+        host_cache = kwargs.get("host_cache")
+        if not isinstance(host_cache, HostCache):
+            host_cache = HostCache(host_cache)
+        self._host_cache = host_cache
+        self.device = None
+        """Device of the detected platform, it's set by connect"""
+        self.device_type = None
+        """Detected device_type, it's set by connect"""
+
+    def __getattr__(self, name):
+        """ attributes of the detected device """
+        device = self.__dict__.get("device")
+        if device is None:
+            raise AttributeError("%r isn't connected yet, it has no attribute %r" % (self, name))
+        return getattr(device, name)
+
+    def __repr__(self):
+        return "<AutodetectHandler host=%r>" % self._kwargs.get("ip")
+
+    async def __aenter__(self):
+        """Async Context Manager"""
+        await self.connect()
+        return self.device
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async Context Manager"""
+        await self.disconnect()
+
+    def _create(self, device_type, cls=None):
+        """ device of the platform, params of other platforms (ex: secret for junos) are dropped """
+        cls = cls or self._mapper[device_type]
+        params = accepted_params(cls)
+        kwargs = {name: value for name, value in self._kwargs.items() if name in params}
+        kwargs["device_type"] = device_type
+        return cls(*self._args, **kwargs)
+
+    async def connect(self):
+        """ connect to the device, detecting its device_type if it isn't cached """
+        probe = self._create("autodetect", BaseDevice)
+        cache_key = probe._cache_key
+        device_type = self._host_cache.get(cache_key, "device_type")
+        if device_type in self._mapper:
+            device = self._create(device_type)
+            try:
+                await device.connect()
+            except (AionetConnectionError, AionetAuthenticationError, OSError):
+                raise
+            except Exception:
+                # the device was replaced by another platform
+                self._host_cache.delete(cache_key, "device_type")
+                raise
+            self.device, self.device_type = device, device_type
+            return
+
+        try:
+            await probe._establish_connection()
+        except OSError as e:
+            raise AionetConnectionError(probe.host, e.errno, str(e))
+        conn = probe._conn
+        try:
+            device_type = await self._detect(conn)
+            if device_type is None:
+                raise ValueError("Host %s: unable to detect device_type" % probe.host)
+            probe._logger.info("Detected device_type %s" % device_type)
+            device = self._create(device_type)
+            if device_type in _RECONNECT_TYPES:
+                await conn.close()
+                await device.connect()
+            else:
+                device._conn = conn
+                await device._session_preparation()
+        except BaseException:
+            await conn.close()
+            raise
+        self._host_cache.set(cache_key, "device_type", device_type)
+        self.device, self.device_type = device, device_type
+
+    async def _detect(self, conn):
+        """ detect device_type over the fresh session """
+        ssh_conn = getattr(conn, "_conn", None)
+        banner = ssh_conn.get_extra_info("server_version", "") if ssh_conn is not None else ""
+        device_type = detect_from_banner(banner)
+        if device_type is not None:
+            return device_type
+
+        try:
+            output = await conn.read_until_pattern(_PROMPT_END, timeout=_LOGIN_PROMPT_WAIT)
+        except TimeoutError:
+            # a new line is sent only when it's needed, an extra prompt would end the show version early
+            conn.send("\n")
+            output = await conn.read_until_pattern(_PROMPT_END)
+        prompt = strip_ansi_escape_codes(output).strip().splitlines()[-1].strip()
+        device_type = detect_from_prompt(prompt)
+        if device_type is not None:
+            self._request_prompt(conn)
+            return device_type
+
+        conn.send("show version\n")
+        prompt_pattern = re.escape(prompt)
+        output = await conn.read_until_pattern([prompt_pattern, _MORE_PATTERN])
+        if re.search(_MORE_PATTERN, output):
+            # quit paging, the prompt after it is flushed by session preparation
+            conn.send("q")
+        else:
+            self._request_prompt(conn)
+        return detect_from_version(output)
+
+    @staticmethod
+    def _request_prompt(conn):
+        """ session preparation starts with flushing the output up to the prompt, like after login """
+        conn.send("\n")
+
+    async def disconnect(self):
+        """ disconnect the detected device """
+        if self.device is not None:
+            await self.device.disconnect()
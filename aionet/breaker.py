@@ -0,0 +1,153 @@
+"""
+Breaker Module, per-host circuit breaker skipping devices which keep failing to connect
+"""
+import asyncio
+import errno
+import time
+
+from aionet.cache import HostCache
+from aionet.exceptions import AionetAuthenticationError, AionetConnectionError, AionetTimeoutError
+
+
+def failure_kind(error):
+    """
+    Kind of the connection failure: auth, timeout, refused or unreachable
+
+    :return: kind or None, if the error doesn't mean that the device can't be connected
+    """
+    if isinstance(error, AionetAuthenticationError):
+        return "auth"
+    if isinstance(error, (AionetTimeoutError, asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    if isinstance(error, (AionetConnectionError, OSError)):
+        code = error.code if isinstance(error, AionetConnectionError) else error.errno
+        return "refused" if code == errno.ECONNREFUSED else "unreachable"
+    return None
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker keyed by host
+
+    After failure_threshold connection failures in a row the circuit of the host opens and
+    the host is skipped until reset_timeout passes. Then the circuit is half open: one attempt is
+    allowed, its success closes the circuit, its failure opens it again for backoff times longer,
+    up to max_reset_timeout. The state is persisted in :class:`aionet.HostCache`, so dead devices
+    are skipped by the next runs too. Usage with :class:`aionet.FleetRunner`::
+
+        breaker = CircuitBreaker(failure_threshold=2)
+        runner = FleetRunner(job, breaker=breaker)
+        async for item in runner.run(breaker.prioritize(devices)):
+            ...
+
+    Skipped devices get :class:`aionet.exceptions.AionetCircuitOpenError` immediately.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=300, backoff=2.0, max_reset_timeout=86400,
+                 persist=True, host_cache=None):
+        """
+        :param int failure_threshold: number of failures in a row, which opens the circuit
+        :param reset_timeout: seconds after which the first half open attempt is allowed
+        :param backoff: factor of reset_timeout after every failed half open attempt
+        :param max_reset_timeout: max seconds between half open attempts
+        :param bool persist: keep the state in the host cache between runs
+        :param host_cache: :class:`aionet.HostCache` or its path. Default is the default HostCache
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._backoff = backoff
+        self._max_reset_timeout = max_reset_timeout
+        if persist and not isinstance(host_cache, HostCache):
+            host_cache = HostCache(host_cache)
+        self._host_cache = host_cache if persist else None
+        self._records = {}
+        self._probing = set()
+
+    @staticmethod
+    def key(params):
+        """ key of the device params, the same as the key of the host cache """
+        port = params.get("port") or (23 if params.get("protocol") == "telnet" else 22)
+        return "%s:%s" % (params.get("ip"), port)
+
+    def _record(self, key):
+        if key not in self._records:
+            record = None
+            if self._host_cache is not None:
+                record = self._host_cache.get(key, "breaker")
+            self._records[key] = record or {"failures": 0, "opened": 0, "retry_at": 0, "kind": None}
+        return self._records[key]
+
+    def _save(self, key):
+        if self._host_cache is not None:
+            self._host_cache.set(key, "breaker", self._records[key])
+
+    def state(self, key):
+        """ state of the circuit of the host: closed, open or half_open """
+        record = self._record(key)
+        if not record["opened"]:
+            return self.CLOSED
+        if key in self._probing or time.time() >= record["retry_at"]:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def failure(self, key):
+        """ kind of the last failure of the host or None """
+        return self._record(key)["kind"]
+
+    def failures(self, key):
+        """ number of failures of the host in a row """
+        return self._record(key)["failures"]
+
+    def allow(self, key):
+        """ check if the host can be connected now, it takes the half open attempt if the circuit is half open """
+        record = self._record(key)
+        if not record["opened"]:
+            return True
+        if key in self._probing or time.time() < record["retry_at"]:
+            return False
+        self._probing.add(key)
+        return True
+
+    def record_success(self, key):
+        """ the host was connected, close the circuit """
+        self._probing.discard(key)
+        record = self._record(key)
+        if record["failures"] or record["opened"]:
+            record.update(failures=0, opened=0, retry_at=0, kind=None)
+            self._save(key)
+
+    def record_failure(self, key, error):
+        """
+        the host failed, open the circuit after failure_threshold failures in a row
+
+        :return: True if the error was counted, errors which are not connection failures are ignored
+        """
+        self._probing.discard(key)
+        kind = failure_kind(error)
+        if kind is None:
+            return False
+        record = self._record(key)
+        record["failures"] += 1
+        record["kind"] = kind
+        if record["opened"] or record["failures"] >= self._failure_threshold:
+            reset_timeout = self._reset_timeout * self._backoff ** record["opened"]
+            record["opened"] += 1
+            record["retry_at"] = time.time() + min(reset_timeout, self._max_reset_timeout)
+        self._save(key)
+        return True
+
+    def abandon(self, key):
+        """ the half open attempt was interrupted, allow another one """
+        self._probing.discard(key)
+
+    def prioritize(self, devices):
+        """ list of device params, where hosts with open circuit are moved to the end """
+        devices = list(devices)
+        devices.sort(key=lambda params: self.state(self.key(params)) == self.OPEN)
+        return devices
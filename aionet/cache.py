@@ -0,0 +1,74 @@
+"""
+Cache Module, persistent per-host data shared between sessions
+"""
+import json
+import os
+import re
+import tempfile
+
+
+class HostCache:
+    """
+    Directory with one JSON file per host
+
+    Every file holds a dict of sections (ex: session profile), each section is written atomically,
+    so concurrent sessions never read a half written file.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param str path: directory of the cache. Default is AIONET_CACHE_DIR environment or ~/.aionet/cache
+        """
+        if path is None:
+            path = os.environ.get("AIONET_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".aionet", "cache")
+        self.path = path
+
+    def __repr__(self):
+        return "<HostCache path=%r>" % self.path
+
+    def _file(self, host):
+        """ path of the host file, characters which aren't safe in file names are replaced """
+        return os.path.join(self.path, re.sub(r"[^\w.\-]", "_", host) + ".json")
+
+    def load(self, host):
+        """ all sections of the host, empty dict if the host isn't cached or the file is broken """
+        try:
+            with open(self._file(host)) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, host, section, default=None):
+        """ cached section of the host """
+        return self.load(host).get(section, default)
+
+    def set(self, host, section, value):
+        """ cache section of the host, value must be JSON serializable """
+        data = self.load(host)
+        data[section] = value
+        self._write(host, data)
+
+    def delete(self, host, section=None):
+        """ delete section of the host or the whole host if section is None """
+        if section is None:
+            try:
+                os.remove(self._file(host))
+            except FileNotFoundError:
+                pass
+            return
+        data = self.load(host)
+        if data.pop(section, None) is not None:
+            self._write(host, data)
+
+    def _write(self, host, data):
+        """ write the host file atomically """
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(data, file, sort_keys=True)
+            os.replace(tmp_path, self._file(host))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
@@ -0,0 +1,159 @@
+"""
+Channels Module, pool of interactive sessions multiplexed over one SSH connection
+"""
+import asyncio
+
+from aionet.exceptions import AionetConnectionError, AionetTimeoutError
+
+_BROKEN_CHANNEL_ERRORS = (asyncio.TimeoutError, TimeoutError, AionetTimeoutError, asyncio.CancelledError,
+                          AionetConnectionError)
+"""Errors, after which the session can still receive output of the interrupted command or it's closed"""
+
+
+class ChannelPool:
+    """
+    Pool of interactive sessions of one device
+
+    Every channel is a separate shell with its own prompt and terminal mode, opened over the already
+    authenticated SSH connection of the device, so parallel commands don't need another login.
+    Usage::
+
+        async with ChannelPool(device, size=4) as pool:
+            outputs = await asyncio.gather(*[pool.send_command(cmd) for cmd in commands])
+
+            async with pool.channel() as channel:
+                await channel.send_config_set(config_commands)
+    """
+
+    def __init__(self, device, size=4):
+        """
+        :param device: connected device, which SSH connection is shared by the channels
+        :param int size: number of channels
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self._device = device
+        self._size = size
+        self._channels = []
+        self._free = None
+        self._replacing = set()
+
+    async def __aenter__(self):
+        """Async Context Manager"""
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async Context Manager"""
+        await self.close()
+
+    @property
+    def size(self):
+        return self._size
+
+    async def open(self):
+        """ open all channels of the pool """
+        self._free = asyncio.Queue()
+        channels = await asyncio.gather(*[self._device.open_channel() for _ in range(self._size)],
+                                        return_exceptions=True)
+        errors = [channel for channel in channels if isinstance(channel, BaseException)]
+        self._channels = [channel for channel in channels if not isinstance(channel, BaseException)]
+        if errors:
+            await self.close()
+            raise errors[0]
+        for channel in self._channels:
+            self._free.put_nowait(channel)
+
+    async def close(self):
+        """ close all channels, the connection of the device stays open """
+        tasks, self._replacing = self._replacing, set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        channels, self._channels = self._channels, []
+        for channel in channels:
+            await channel.disconnect()
+
+    async def acquire(self):
+        """ wait for a free channel and take it, a slot which lost its channel gets a new one """
+        if self._free is None:
+            raise RuntimeError("channel pool isn't opened")
+        channel = await self._free.get()
+        if channel is None:
+            try:
+                channel = await self._device.open_channel()
+            except BaseException:
+                # the next waiter tries again, so waiters fail instead of hanging
+                self._free.put_nowait(None)
+                raise
+            self._channels.append(channel)
+        return channel
+
+    def release(self, channel):
+        """ return the channel to the pool """
+        self._free.put_nowait(channel)
+
+    async def replace(self, channel):
+        """ close the channel, which is out of sync, and put a new one to the pool instead """
+        self._device._logger.info("Replacing channel")
+        try:
+            await channel.disconnect()
+        except Exception:
+            pass
+        if channel in self._channels:
+            self._channels.remove(channel)
+        try:
+            new_channel = await self._device.open_channel()
+        except Exception as e:
+            # the slot stays in the pool without channel, acquire opens it again
+            self._device._logger.error("Failed to replace channel: %s" % e)
+            self._free.put_nowait(None)
+            return
+        self._channels.append(new_channel)
+        self.release(new_channel)
+
+    def _replace_later(self, channel):
+        """ replace the channel in background, the task is kept until it's done """
+        task = asyncio.ensure_future(self.replace(channel))
+        self._replacing.add(task)
+        task.add_done_callback(self._replacing.discard)
+
+    def channel(self):
+        """
+        async context manager, which takes a free channel and returns it to the pool at exit
+        """
+        return _ChannelLease(self)
+
+    async def send_command(self, *args, **kwargs):
+        """ send_command on a free channel, see :meth:`BaseDevice.send_command` """
+        async with self.channel() as channel:
+            return await channel.send_command(*args, **kwargs)
+
+    async def send_commands(self, *args, **kwargs):
+        """ send_commands on a free channel, see :meth:`BaseDevice.send_commands` """
+        async with self.channel() as channel:
+            return await channel.send_commands(*args, **kwargs)
+
+    async def send_config_set(self, *args, **kwargs):
+        """ send_config_set on a free channel """
+        async with self.channel() as channel:
+            return await channel.send_config_set(*args, **kwargs)
+
+
+class _ChannelLease:
+    """ async context manager for using a channel of the pool """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._channel = None
+
+    async def __aenter__(self):
+        self._channel = await self._pool.acquire()
+        return self._channel
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None and issubclass(exc_type, _BROKEN_CHANNEL_ERRORS):
+            # late output of the interrupted command would be read by the next one
+            self._pool._replace_later(self._channel)
+        else:
+            self._pool.release(self._channel)
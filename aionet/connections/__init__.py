@@ -1,5 +1,5 @@
 """
 Connections Module, classes that handle the protocols connection like ssh,telnet and serial.
 """
-from .ssh import SSHConnection
+from .ssh import SSHConnection, SSHChannelConnection, ExecResult
 from .telnet import TelnetConnection
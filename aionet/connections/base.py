@@ -1,13 +1,20 @@
 """
 Base Connection Module
 """
-import re
 import asyncio
+import re
 from aionet.logging import logger
+from aionet.exceptions import AionetConnectionError
 from aionet.connections.interface import IConnection
+from aionet.connections.matcher import PatternMatcher, compile_patterns
 
 
 class BaseConnection(IConnection):
+    _IDLE_GAP_DEFAULT = 0.5
+    """Idle gap in seconds used by idle_gap='auto' before any gap was learned"""
+
+    _IDLE_GAP_MIN = 0.05
+    _IDLE_GAP_MAX = 2
 
     def __init__(self, *args, **kwargs):
         self._host = None
@@ -15,6 +22,8 @@ class BaseConnection(IConnection):
         self._conn = None
         self._base_prompt = self._base_pattern = ""
         self._MAX_BUFFER = 65535
+        self._MATCH_WINDOW = 1024
+        self._idle_gap_avg = self._idle_gap_dev = None
 
     async def __aenter__(self):
         """Async Context Manager"""
@@ -32,10 +41,23 @@ class BaseConnection(IConnection):
     def set_base_prompt(self, prompt):
         """ base prompt setter """
         self._base_prompt = prompt
+        # read_until_prompt_or_pattern is using the prompt as pattern
+        self._precompile(prompt)
 
     def set_base_pattern(self, pattern):
         """ base patter setter """
         self._base_pattern = pattern
+        self._precompile(pattern)
+
+    @staticmethod
+    def _precompile(pattern):
+        """ warm up the regex cache, invalid pattern (ex: hostname with '(') fails only where it's used """
+        if not pattern:
+            return
+        try:
+            compile_patterns((pattern,))
+        except re.error:
+            pass
 
     async def disconnect(self):
         """ Close Connection """
@@ -49,54 +71,243 @@ class BaseConnection(IConnection):
         """ send data """
         raise NotImplementedError("Connection must implement send method")
 
+    async def drain(self):
+        """ wait until the sent data is flushed to the transport """
+        pass
+
     async def read(self):
-        """ read from buffer """
+        """ read from buffer, empty string means the end of the session """
         raise NotImplementedError("Connection must implement read method ")
 
-    async def read_until_pattern(self, pattern, re_flags=0, read_for=0):
-        """Read channel until pattern detected. Return ALL data available"""
+    async def _read_chunk(self):
+        """ read from buffer, the end of the session is an error, otherwise the reading loops would never end """
+        chunk = await self.read()
+        if not chunk:
+            raise AionetConnectionError(self._host, None, "session was closed by the device")
+        return chunk
+
+    def _deadline(self, timeout):
+        """ loop time of the deadline for the whole read, None if timeout isn't set """
+        return asyncio.get_event_loop().time() + timeout if timeout else None
+
+    async def _read_chunk_before(self, deadline):
+        """
+        read a chunk which must arrive within the connection timeout, and before the deadline if it's set
+
+        :raises TimeoutError: if the channel was silent for too long or the deadline has passed
+        """
+        wait = self._timeout
+        if deadline is not None:
+            left = deadline - asyncio.get_event_loop().time()
+            wait = min(wait, left) if wait else left
+            if wait <= 0:
+                raise TimeoutError(self._host)
+        try:
+            return await asyncio.wait_for(self._read_chunk(), wait)
+        except asyncio.TimeoutError:
+            raise TimeoutError(self._host)
+
+    async def read_until_pattern(self, pattern, re_flags=0, read_for=0, timeout=None, idle_gap=None, idle_after=0):
+        """
+        Read channel until pattern detected. Return ALL data available
+
+        :param pattern: pattern or list of patterns to wait for
+        :param re_flags: re flags for pattern
+        :param read_for: if set, read until the channel was silent for these seconds and return the output,
+                         even if pattern wasn't found
+        :param timeout: deadline in seconds for the whole read, by default only the silence of the channel
+                        is limited by the connection timeout. With read_for the silence is limited by read_for
+        :param idle_gap: with read_for, return as soon as channel was silent for these seconds after
+                         receiving data. 'auto' uses the gap learned from previous reads of this connection.
+                         The output is returned only if it ends with an unfinished line (prompt or question),
+                         after a complete line the silence is a pause of the device and reading continues
+        :param idle_after: number of characters (usually the command echo) to receive before idle detection starts
+        """
 
         if pattern is None:
             raise ValueError("pattern cannot be None")
 
         if isinstance(pattern, str):
             pattern = [pattern]
-        output = ""
         logger.info("Host {}: Reading until pattern".format(self._host))
 
         logger.debug("Host {}: Reading pattern: {}".format(self._host, pattern))
-        while True:
+        matcher = PatternMatcher(pattern, re_flags, window=self._MATCH_WINDOW)
+        chunks = []
+        if read_for:
+            await self._read_until_silence(matcher, chunks, read_for, timeout, idle_gap, idle_after)
+            return "".join(chunks)
+        await self._read_until_match(matcher, chunks, deadline=self._deadline(timeout))
 
-            fut = self.read()
+        output = "".join(chunks)
+        logger.debug("Host %s: Reading pattern '%s' was found: %r", self._host, pattern, output)
+        return output
+
+    async def _read_until_silence(self, matcher, chunks, read_for, timeout, idle_gap, idle_after):
+        """
+        read chunks into list until match or silence: read_for seconds, or idle_gap after data if it's set.
+        timeout is the deadline of the whole read
+        """
+        if idle_gap == "auto":
+            idle_gap = self.idle_gap
+        loop = asyncio.get_event_loop()
+        deadline = self._deadline(timeout)
+        last_chunk = None
+        received = 0
+        idle_armed = False
+        while True:
+            # waiting for the first chunk after the echo isn't limited by the gap,
+            # device may be slow to start answering
+            idle = bool(idle_gap) and idle_armed and idle_gap < read_for
+            wait = idle_gap if idle else read_for
+            if deadline is not None:
+                wait = min(wait, deadline - loop.time())
+                if wait <= 0:
+                    return
             try:
-                output += await asyncio.wait_for(fut, read_for or self._timeout)
+                chunk = await asyncio.wait_for(self._read_chunk(), wait)
             except asyncio.TimeoutError:
-                if read_for:
-                    return output
-                raise TimeoutError(self._host)
+                if idle and wait == idle_gap and chunks[-1].endswith(("\n", "\r")):
+                    logger.debug("Host {}: Channel was idle for {:.2f} seconds after a complete line, "
+                                   "continue reading for the prompt".format(self._host, idle_gap))
+                    idle_armed = False
+                    continue
+                logger.debug("Host {}: Channel was idle, stop reading".format(self._host))
+                return
+            chunks.append(chunk)
+            received += len(chunk)
+            if received > idle_after:
+                now = loop.time()
+                if last_chunk is not None:
+                    self._learn_idle_gap(now - last_chunk)
+                last_chunk = now
+                idle_armed = True
+            if matcher.feed(chunk):
+                return
+
+    @property
+    def idle_gap(self):
+        """ silence gap, which is learned from the gaps between chunks of this connection """
+        if self._idle_gap_avg is None:
+            return self._IDLE_GAP_DEFAULT
+        gap = self._idle_gap_avg + 4 * self._idle_gap_dev
+        return min(max(gap, self._IDLE_GAP_MIN), self._IDLE_GAP_MAX)
 
-            for exp in pattern:
-                if re.search(exp, output, flags=re_flags):
-                    logger.debug(
-                        "Host {}: Reading pattern '{}' was found: {}".format(
-                            self._host, pattern, repr(output)
-                        )
-                    )
-                    return output
+    def _learn_idle_gap(self, gap):
+        """ smoothed gap and its deviation, same way as TCP estimates retransmission timeout """
+        if self._idle_gap_avg is None:
+            self._idle_gap_avg, self._idle_gap_dev = gap, gap / 2
+            return
+        self._idle_gap_dev += (abs(gap - self._idle_gap_avg) - self._idle_gap_dev) / 4
+        self._idle_gap_avg += (gap - self._idle_gap_avg) / 8
 
-    async def read_until_prompt(self, read_for=0):
+    async def _read_until_match(self, matcher, chunks, count=1, deadline=None):
+        """ read chunks into list until the matcher finds count matches """
+        while True:
+            chunk = await self._read_chunk_before(deadline)
+            chunks.append(chunk)
+            if matcher.feed(chunk) and len(matcher.spans) >= count:
+                return
+
+    async def read_prompts(self, count, timeout=None):
+        """
+        Read channel until prompt was found count times, used for pipelined commands
+
+        Only prompts at the beginning of a line are counted, so prompt-like text in the echo of
+        the commands isn't taken as prompt.
+
+        :param int count: number of prompts to wait for
+        :param timeout: deadline in seconds for the whole read, by default only the silence of the channel
+                        is limited by the connection timeout
+        :return: output and list of positions in the output where each prompt ends
+        :raises ValueError: if base pattern isn't set, empty pattern would match everywhere
+        """
+        if not self._base_pattern:
+            raise ValueError("base pattern must be set for reading prompts")
+        logger.info("Host {}: Reading until {} prompts".format(self._host, count))
+        matcher = PatternMatcher(self._base_pattern, window=self._MATCH_WINDOW, line_start=True)
+        chunks = []
+        await self._read_until_match(matcher, chunks, count, deadline=self._deadline(timeout))
+        return "".join(chunks), [end for start, end in matcher.spans[:count]]
+
+    async def read_until_string(self, string, timeout=None):
+        """
+        Read channel until the literal string is found, it's cheaper than searching regex
+
+        :param str string: string to wait for
+        :param timeout: deadline in seconds for the whole read, by default only the silence of the channel
+                        is limited by the connection timeout
+        :return: all data read, it can continue after the string
+        """
+        logger.info("Host {}: Reading until string".format(self._host))
+        chunks = []
+        await self._read_until_string(string, chunks, deadline=self._deadline(timeout))
+        return "".join(chunks)
+
+    async def _read_until_string(self, string, chunks, deadline=None):
+        """ read chunks into list until the string is found, the string can be split between chunks """
+        keep = len(string) - 1
+        tail = ""
+        while True:
+            chunk = await self._read_chunk_before(deadline)
+            chunks.append(chunk)
+            text = tail + chunk
+            if string in text:
+                return
+            tail = text[-keep:] if keep else ""
+
+    async def read_until_prompt(self, read_for=0, timeout=None, idle_gap=None, idle_after=0):
         """ read util prompt """
-        return await self.read_until_pattern(self._base_pattern, read_for=read_for)
+        return await self.read_until_pattern(self._base_pattern, read_for=read_for, timeout=timeout,
+                                             idle_gap=idle_gap, idle_after=idle_after)
 
-    async def read_until_prompt_or_pattern(self, pattern, re_flags=0, read_for=0):
+    async def read_until_prompt_or_pattern(self, pattern, re_flags=0, read_for=0, timeout=None, idle_gap=None,
+                                           idle_after=0):
         """ read util prompt or pattern """
 
         logger.info("Host {}: Reading until prompt or pattern".format(self._host))
 
+        pattern = self._prompt_or_pattern(pattern)
+        return await self.read_until_pattern(pattern=pattern, re_flags=re_flags, read_for=read_for, timeout=timeout,
+                                             idle_gap=idle_gap, idle_after=idle_after)
+
+    def _prompt_or_pattern(self, pattern):
+        """ join base prompt and pattern into list of patterns """
         if isinstance(pattern, str):
-            pattern = [self._base_prompt, pattern]
+            return [self._base_prompt, pattern]
         elif isinstance(pattern, list):
-            pattern = [self._base_prompt] + pattern
+            return [self._base_prompt] + pattern
         else:
             raise ValueError("pattern must be string or list of strings")
-        return await self.read_until_pattern(pattern=pattern, re_flags=re_flags, read_for=read_for)
+
+    async def iter_until_pattern(self, pattern, re_flags=0, timeout=None):
+        """
+        Read channel until pattern detected, yielding the data while it arrives
+
+        :param pattern: pattern or list of patterns to wait for
+        :param re_flags: re flags for pattern
+        :param timeout: deadline in seconds for the whole read, by default only the silence of the channel
+                        is limited by the connection timeout
+        """
+        if pattern is None:
+            raise ValueError("pattern cannot be None")
+
+        logger.info("Host {}: Streaming until pattern".format(self._host))
+        logger.debug("Host {}: Streaming pattern: {}".format(self._host, pattern))
+        matcher = PatternMatcher(pattern, re_flags, window=self._MATCH_WINDOW)
+        deadline = self._deadline(timeout)
+        while True:
+            chunk = await self._read_chunk_before(deadline)
+            found = matcher.feed(chunk)
+            yield chunk
+            if found:
+                return
+
+    def iter_until_prompt(self, timeout=None):
+        """ stream util prompt """
+        return self.iter_until_pattern(self._base_pattern, timeout=timeout)
+
+    def iter_until_prompt_or_pattern(self, pattern, re_flags=0, timeout=None):
+        """ stream util prompt or pattern """
+        pattern = self._prompt_or_pattern(pattern)
+        return self.iter_until_pattern(pattern, re_flags=re_flags, timeout=timeout)
@@ -31,6 +31,11 @@ class IConnection(abc.ABC):
         """ send Command """
         pass
 
+    @abc.abstractmethod
+    async def drain(self):
+        """ wait until sent data is flushed """
+        pass
+
     @abc.abstractmethod
     async def read(self):
         """ send Command """
@@ -0,0 +1,111 @@
+"""
+Matcher Module, incremental pattern search over the data read from a channel.
+"""
+import re
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def compile_patterns(patterns, re_flags=0):
+    """
+    Compile patterns into a single alternation
+
+    Falls back to a list of separately compiled patterns when they can't be joined
+    (for example a pattern with global inline flags).
+
+    :param tuple patterns: tuple of regex strings
+    :param re_flags: re flags for all patterns
+    :return: tuple of compiled regexes
+    """
+    if len(patterns) == 1:
+        return (re.compile(patterns[0], re_flags),)
+    try:
+        alternation = r"|".join("(?:%s)" % pattern for pattern in patterns)
+        return (re.compile(alternation, re_flags),)
+    except re.error:
+        return tuple(re.compile(pattern, re_flags) for pattern in patterns)
+
+
+class PatternMatcher:
+    """
+    Incremental matcher
+
+    Every new chunk is searched together with a small window of the already scanned data,
+    so the cost of a search depends on the chunk size and not on the size of the whole output.
+    The character preceding the window is kept as well, so anchors and lookbehinds see the real
+    data: ^ matches only at the beginning of the output (or of a line with re.M), never at the
+    beginning of the window.
+    """
+
+    def __init__(self, patterns, re_flags=0, window=1024, line_start=False):
+        """
+        :param patterns: pattern or list of patterns for searching
+        :param re_flags: re flags for patterns
+        :param int window: number of already scanned characters kept as left context
+        :param bool line_start: accept only matches at the beginning of a line or right after the previous match,
+                                spaces between them are allowed (ex: prompts ending with space)
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        self._regexes = compile_patterns(tuple(patterns), re_flags)
+        self._window = window
+        self._line_start = line_start
+        self._tail = ""
+        # the character preceding the tail, empty while the tail starts at the beginning of the data
+        self._before = ""
+        # the tail starts right after the previous match, the data starts on a new line
+        self._tail_after_match = True
+        self._offset = 0
+        self.spans = []
+        """absolute (start, end) positions of the found matches"""
+
+    def feed(self, chunk):
+        """
+        Search the chunk, return number of new matches
+
+        Matches never overlap, searching continues after the end of the previous match.
+        """
+        text = self._before + self._tail + chunk
+        text_offset = self._offset - len(self._tail) - len(self._before)
+        self._offset += len(chunk)
+        # searching starts after the preceding character, regex anchors don't match at pos
+        pos = len(self._before)
+        after_match = self._tail_after_match
+        found = 0
+        while True:
+            match = self._search(text, pos, after_match)
+            if match is None:
+                break
+            start, end = match.span()
+            self.spans.append((text_offset + start, text_offset + end))
+            found += 1
+            after_match = True
+            # empty match would lead to endless loop
+            pos = end if end > start else end + 1
+            if pos > len(text):
+                break
+        tail_start = max(pos, len(text) - self._window)
+        self._tail_after_match = found > 0 and tail_start == pos
+        self._before = text[tail_start - 1:tail_start] if tail_start else ""
+        self._tail = text[tail_start:]
+        return found
+
+    def _search(self, text, pos, after_match):
+        """ search the first accepted match of any pattern starting from pos """
+        best = None
+        for regex in self._regexes:
+            for match in regex.finditer(text, pos):
+                if best is not None and match.start() >= best.start():
+                    break
+                if self._accept(text, match.start(), pos, after_match):
+                    best = match
+                    break
+        return best
+
+    def _accept(self, text, start, pos, after_match):
+        """ check line start condition of the match """
+        if not self._line_start:
+            return True
+        if after_match and not text[pos:start].strip(" "):
+            return True
+        return start > 0 and text[start - 1] in "\r\n"
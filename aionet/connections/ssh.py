@@ -2,11 +2,18 @@
 SSH Connection Module
 """
 import asyncio
+import codecs
+import copy
+import tempfile
+from collections import namedtuple
 import asyncssh
 from aionet.constants import TERM_LEN, TERM_WID, TERM_TYPE
 from aionet.exceptions import AionetAuthenticationError, AionetTimeoutError
 from aionet.connections.base import BaseConnection
 
+ExecResult = namedtuple("ExecResult", ["command", "stdout", "stderr", "exit_status"])
+"""Result of command executed without interactive session"""
+
 
 class SSHConnection(BaseConnection):
     def __init__(self,
@@ -30,7 +37,8 @@ class SSHConnection(BaseConnection):
                  encryption_algs=(),
                  mac_algs=(),
                  compression_algs=(),
-                 signature_algs=()):
+                 signature_algs=(),
+                 max_exec_channels=4):
         super().__init__()
         if host:
             self._host = host
@@ -54,7 +62,6 @@ class SSHConnection(BaseConnection):
             "passphrase": passphrase,
             "tunnel": tunnel,
             "agent_forwarding": agent_forwarding,
-            "loop": loop,
             "family": family,
             "agent_path": agent_path,
             "client_version": client_version,
@@ -65,11 +72,18 @@ class SSHConnection(BaseConnection):
             "signature_algs": signature_algs
         }
 
+        if loop is not None:
+            # removed from asyncssh 2.x, pass it only if it's explicitly set
+            connect_params_dict["loop"] = loop
+
         if pattern is not None:
             self._pattern = pattern
 
         self._conn_dict = connect_params_dict
         self._timeout = timeout
+        self._max_exec_channels = max_exec_channels
+        self._exec_semaphore = None
+        self._shared = False
 
     async def connect(self):
         """ Etablish SSH connection """
@@ -83,22 +97,75 @@ class SSHConnection(BaseConnection):
         except asyncio.TimeoutError:
             raise AionetTimeoutError(self._host, None, 'timeout while connecting to %r' % self._host)
 
+        self._exec_semaphore = asyncio.Semaphore(self._max_exec_channels)
         await self._start_session()
 
     async def disconnect(self):
         """ Gracefully close the SSH connection """
         self._logger.info("Host {}: SSH: Disconnecting".format(self._host))
-        self._logger.info("Host {}: SSH: Disconnecting".format(self._host))
-        await self._cleanup()
-        self._conn.close()
-        await self._conn.wait_closed()
+        await self.close()
+
+    async def open_shell(self):
+        """
+        Open new interactive session over the same SSH connection
+
+        :return: connection object with its own session, closing it closes only the session
+        """
+        shell = copy.copy(self)
+        shell._shared = True
+        await shell._start_session()
+        return shell
 
     def send(self, cmd):
         self._stdin.write(cmd)
 
+    async def drain(self):
+        await self._stdin.drain()
+
     async def read(self):
         return await self._stdout.read(self._MAX_BUFFER)
 
+    async def run(self, command, timeout=None):
+        """
+        Run command on its own exec channel of the connection
+
+        At most max_exec_channels commands are running at once, others are waiting for a free channel.
+
+        :param str command: command for executing
+        :param timeout: timeout in seconds for the command, default is the connection timeout
+        :return: :class:`ExecResult` with stdout, stderr and exit status of the command
+        """
+        async with self._exec_semaphore:
+            self._logger.debug("Host {}: SSH: Running {!r} on exec channel".format(self._host, command))
+            try:
+                result = await asyncio.wait_for(self._conn.run(command, check=False), timeout or self._timeout)
+            except asyncio.TimeoutError:
+                raise AionetTimeoutError(self._host, None, 'timeout while running %r' % command)
+        return ExecResult(command, result.stdout, result.stderr, result.exit_status)
+
+    async def upload(self, data, remote_path, transfer="sftp"):
+        """
+        Upload data to file on the device over the established SSH connection
+
+        :param bytes data: content of the file
+        :param str remote_path: path of the file on the device (ex: flash:aionet.cfg)
+        :param str transfer: 'sftp' or 'scp'
+        """
+        self._logger.info("Host {}: SSH: Uploading {} bytes to {} over {}".format(
+            self._host, len(data), remote_path, transfer))
+        if transfer == "sftp":
+            async with self._conn.start_sftp_client() as sftp:
+                async with sftp.open(remote_path, "wb") as file:
+                    await file.write(data)
+        elif transfer == "scp":
+            # scp copies only local files
+            with tempfile.NamedTemporaryFile() as file:
+                file.write(data)
+                file.flush()
+                await asyncssh.scp(file.name, (self._conn, remote_path))
+        else:
+            raise ValueError("unknown transfer {}, only sftp and scp supported".format(transfer))
+
     def __check_session(self):
         """ check session was opened """
         if not self._stdin:
@@ -119,5 +186,147 @@ class SSHConnection(BaseConnection):
     async def close(self):
         """ Close Connection """
         await self._cleanup()
+        if self._shared:
+            self._close_session()
+            return
         self._conn.close()
         await self._conn.wait_closed()
+
+    def _close_session(self):
+        """ close the interactive session """
+        self._stdin.channel.close()
+
+
+class SSHChannelSession(asyncssh.SSHClientSession):
+    """
+    Binary SSH session
+
+    Received data is appended to one growable buffer from data_received callback and decoded only when
+    it's read, so a read can drain many SSH packets with a single decode.
+    """
+
+    def __init__(self, encoding="utf-8", high_water=4 * 1024 * 1024):
+        """
+        :param encoding: encoding of the received data
+        :param int high_water: buffer size in bytes, which pauses reading from the channel
+        """
+        self._buffer = bytearray()
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+        self._high_water = high_water
+        self._paused = False
+        self._chan = None
+        self._waiter = None
+        self._eof = False
+        self._exc = None
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    def connection_made(self, chan):
+        self._chan = chan
+
+    def data_received(self, data, datatype):
+        self._buffer += data
+        if len(self._buffer) > self._high_water and not self._paused:
+            self._chan.pause_reading()
+            self._paused = True
+        self._wakeup()
+
+    def eof_received(self):
+        self._eof = True
+        self._wakeup()
+
+    def connection_lost(self, exc):
+        self._eof = True
+        self._exc = exc
+        self._wakeup()
+
+    def pause_writing(self):
+        self._writable.clear()
+
+    def resume_writing(self):
+        self._writable.set()
+
+    async def drain(self):
+        """ wait until the channel accepts writing again """
+        await self._writable.wait()
+
+    def _wakeup(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def __len__(self):
+        return len(self._buffer)
+
+    async def read(self, size):
+        """ wait for data and return up to size bytes of it decoded """
+        while not self._buffer:
+            if self._exc is not None:
+                raise self._exc
+            if self._eof:
+                return ""
+            self._waiter = asyncio.get_event_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+        size = min(size, len(self._buffer))
+        with memoryview(self._buffer) as view:
+            with view[:size] as data:
+                output = self._decoder.decode(data)
+        del self._buffer[:size]
+
+        if self._paused and len(self._buffer) < self._high_water // 2:
+            self._chan.resume_reading()
+            self._paused = False
+        return output
+
+
+class SSHChannelConnection(SSHConnection):
+    """
+    SSH Connection using binary callback driven session instead of stream readers
+
+    Reads are drained from the session buffer with adaptive size, which grows while data is piling up
+    in the buffer and shrinks back when the channel is mostly idle.
+    """
+
+    _MIN_READ_SIZE = 4096
+    _MAX_READ_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, *args, read_size=None, **kwargs):
+        """
+        :param read_size: fixed max size in bytes of single read, by default read size is adaptive
+        """
+        super().__init__(*args, **kwargs)
+        self._adaptive_read = read_size is None
+        self._read_size = read_size or self._MAX_BUFFER
+
+    def send(self, cmd):
+        self._chan.write(cmd.encode())
+
+    async def drain(self):
+        await self._session.drain()
+
+    async def read(self):
+        output = await self._session.read(self._read_size)
+        if self._adaptive_read:
+            if len(self._session):
+                self._read_size = min(self._read_size * 2, self._MAX_READ_SIZE)
+            elif len(output) < self._read_size // 4:
+                self._read_size = max(self._read_size // 2, self._MIN_READ_SIZE)
+        return output
+
+    def _close_session(self):
+        """ close the interactive session """
+        self._chan.close()
+
+    async def _start_session(self):
+        """ start interactive-session (shell) """
+        self._logger.info(
+            "Host {}: SSH: Starting binary session term_type={}, term_width={}, term_length={}".format(
+                self._host, TERM_TYPE, TERM_WID, TERM_LEN))
+        self._chan, self._session = await self._conn.create_session(
+            SSHChannelSession, term_type=TERM_TYPE, term_size=(TERM_WID, TERM_LEN), encoding=None
+        )
+        self._stdin = self._chan
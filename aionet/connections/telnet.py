@@ -50,19 +50,18 @@ class TelnetConnection(BaseConnection):
         if not self._stdin:
             raise RuntimeError("telnet session not started")
 
-    @asyncio.coroutine
-    def connect(self):
+    async def connect(self):
         """ Establish Telnet Connection """
         self._logger.info("Host {}: telnet: Establishing Telnet Connection on port {}".format(self._host, self._port))
         fut = asyncio.open_connection(self._host, self._port, family=0, flags=0)
         try:
-            self._stdout, self._stdin = yield from asyncio.wait_for(fut, self._timeout)
+            self._stdout, self._stdin = await asyncio.wait_for(fut, self._timeout)
         except asyncio.TimeoutError:
             raise AionetTimeoutError(self._host)
         except Exception as e:
             raise AionetAuthenticationError(self._host, None, str(e))
 
-        yield from self._start_session()
+        await self._start_session()
 
     async def disconnect(self):
         """ Gracefully close the Telnet connection """
@@ -74,9 +73,18 @@ class TelnetConnection(BaseConnection):
     def send(self, cmd):
         self._stdin.write(cmd.encode())
 
+    async def drain(self):
+        await self._stdin.drain()
+
     async def read(self):
-        output = await self._stdout.read(self._MAX_BUFFER)
-        return output.decode(errors='ignore')
+        while True:
+            output = await self._stdout.read(self._MAX_BUFFER)
+            if not output:
+                return ""
+            # empty string is the end of the session, data with only undecodable bytes isn't
+            output = output.decode(errors='ignore')
+            if output:
+                return output
 
     async def close(self):
         pass
@@ -2,6 +2,7 @@
 Device Dispatcher
 
 """
+from aionet.autodetect import AutodetectHandler
 from aionet.vendors.devices import AristaEOS
 from aionet.vendors.devices import ArubaAOS6, ArubaAOS8
 from aionet.vendors.devices import CiscoASA, CiscoIOS, CiscoIOSXR, CiscoNXOS
@@ -38,10 +39,12 @@ platforms_str = u"\n".join(platforms)
 
 
 def ConnectionHandler(*args, **kwargs):
+    if kwargs["device_type"] == "autodetect":
+        return AutodetectHandler(DEVICE_MAPPER, *args, **kwargs)
     if kwargs["device_type"] not in platforms:
         raise ValueError(
             "Unsupported device_type: "
-            "currently supported platforms are: {0}".format(platforms_str)
+            "currently supported platforms are: {0} or autodetect".format(platforms_str)
         )
     connection_class = DEVICE_MAPPER[kwargs["device_type"]]
     return connection_class(*args, **kwargs)
@@ -8,6 +8,10 @@ class BaseAionetError(Exception):
         self.msg = "Host %s %s Error: %s" % (ip_address, type(self)._error_name, reason)
         super().__init__(self.msg)
 
+    def __reduce__(self):
+        """ errors are sent between processes, so they must be picklable with all their attributes """
+        return type(self), (self.ip_address, self.code, self.reason), self.__dict__
+
 
 class AionetAuthenticationError(BaseAionetError):
     _error_name = 'Authentication'
@@ -23,3 +27,15 @@ class AionetCommitError(BaseAionetError):
 
 class AionetConnectionError(BaseAionetError):
     _error_name = 'connection'
+
+
+class AionetCircuitOpenError(BaseAionetError):
+    _error_name = 'circuit open'
+
+
+class AionetConfigError(BaseAionetError):
+    _error_name = 'config'
+
+    def __init__(self, ip_address, code, reason, errors=None):
+        super().__init__(ip_address, code, reason)
+        self.errors = errors or []
@@ -0,0 +1,237 @@
+"""
+Fleet Module, running a job on many devices with bounded concurrency
+"""
+import asyncio
+import errno
+from collections import deque, namedtuple
+
+from aionet.dispatcher import ConnectionHandler
+from aionet.exceptions import AionetCircuitOpenError, AionetConnectionError, AionetTimeoutError
+
+FleetResult = namedtuple("FleetResult", ["device", "result", "exception", "elapsed"])
+"""Result of the job on one device: device params, result or exception of the job and elapsed seconds"""
+
+
+class FleetRunner:
+    """
+    Runner of a job on a fleet of devices
+
+    Devices are taken lazily from an iterable of ConnectionHandler params, at most concurrency of them are
+    connected at once, and results are yielded while they complete. Usage::
+
+        async def job(device):
+            return await device.send_command("show version")
+
+        runner = FleetRunner(job, concurrency=200, timeout=60)
+        async for item in runner.run(devices):
+            if item.exception is not None:
+                print(item.device["ip"], item.exception)
+
+    Leaving the loop early cancels the devices which are still running.
+    """
+
+    def __init__(self, job, concurrency=100, timeout=None, ordered=False, connection_factory=ConnectionHandler,
+                 limiter=None, scope=None, breaker=None, prober=None):
+        """
+        :param job: coroutine function called with connected device, its return value is the result
+        :param int concurrency: max number of devices processed at once
+        :param timeout: deadline in seconds for one device (connect, job and disconnect), None is no deadline
+        :param bool ordered: yield results in the order of devices instead of completion order.
+                             A slow device holds back the results after it, but never more than concurrency
+        :param connection_factory: callable creating device from params, default is ConnectionHandler
+        :param limiter: :class:`aionet.AdaptiveLimiter`, which adapts the number of devices processed at once
+                        below concurrency
+        :param scope: callable returning limiter scope of the device params (ex: its site), default is global only
+        :param breaker: :class:`aionet.CircuitBreaker`, devices with open circuit fail immediately
+        :param prober: :class:`aionet.TCPProber`, all devices are probed before the run and the ones which
+                       aren't open fail immediately. Without ordered the reachable devices with the longest
+                       round trip are started first. Devices are read into a list for probing.
+                       Devices with tunnel param aren't probed
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._job = job
+        self._concurrency = concurrency
+        self._timeout = timeout
+        self._ordered = ordered
+        self._connection_factory = connection_factory
+        self._limiter = limiter
+        self._scope = scope
+        self._breaker = breaker
+        self._prober = prober
+        self._slots = None
+
+    async def run(self, devices):
+        """
+        Run the job on devices, yield :class:`FleetResult` for every device
+
+        :param devices: iterable of dicts with ConnectionHandler params
+        """
+        unreachable = {}
+        if self._prober is not None:
+            devices, unreachable = await self._pre_probe(devices)
+        devices = iter(devices)
+        if self._ordered:
+            generator = self._run_ordered(devices, unreachable)
+        else:
+            generator = self._run_as_completed(devices, unreachable)
+        try:
+            async for item in generator:
+                yield item
+        finally:
+            # cancel the running devices now, not when the generator is collected
+            await generator.aclose()
+
+    async def submit(self, params):
+        """
+        Start the job on one device, for feeding devices which arrive over time (ex: from a queue)
+
+        Waits while concurrency submitted devices are running, so the caller can't read devices faster
+        than they are processed. Limiter and breaker apply as in :meth:`run`, devices aren't probed.
+
+        :param dict params: ConnectionHandler params of the device
+        :return: task of :class:`FleetResult` of the device
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._concurrency)
+        await self._slots.acquire()
+        task = asyncio.ensure_future(self._run_device(params))
+        task.add_done_callback(lambda _: self._slots.release())
+        return task
+
+    async def _pre_probe(self, devices):
+        """
+        probe all devices, return the devices in the order of running them
+        and errors of the unreachable ones by id of their params.
+        Devices behind a tunnel (ex: :class:`aionet.JumpHost`) can't be probed directly, they aren't probed
+        """
+        devices = list(devices)
+        probed = [params for params in devices if not params.get("tunnel")]
+        results = await self._prober.probe_all(probed)
+        unreachable = {}
+        rtts = {}
+        for params, result in zip(probed, results):
+            if result.status == self._prober.OPEN:
+                rtts[id(params)] = result.rtt
+                continue
+            code = errno.ECONNREFUSED if result.status == self._prober.REFUSED else errno.ETIMEDOUT
+            reason = "tcp probe of port %s: %s" % (result.port, result.status)
+            unreachable[id(params)] = AionetConnectionError(params.get("ip"), code, reason)
+        if not self._ordered:
+            # unreachable devices fail at once, slow devices are started before fast ones
+            devices.sort(key=lambda params: -rtts.get(id(params), float("inf")))
+        return devices, unreachable
+
+    async def _run_as_completed(self, devices, unreachable):
+        pending = set()
+        try:
+            while True:
+                for params in devices:
+                    pending.add(asyncio.ensure_future(self._run_device(params, unreachable)))
+                    if len(pending) >= self._concurrency:
+                        break
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            await self._cancel(pending)
+
+    async def _run_ordered(self, devices, unreachable):
+        pending = deque()
+        try:
+            while True:
+                for params in devices:
+                    pending.append(asyncio.ensure_future(self._run_device(params, unreachable)))
+                    if len(pending) >= self._concurrency:
+                        break
+                if not pending:
+                    return
+                yield await pending[0]
+                pending.popleft()
+        finally:
+            await self._cancel(pending)
+
+    @staticmethod
+    async def _cancel(tasks):
+        """ cancel the tasks, which are still running, and wait for their cleanup """
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_device(self, params, unreachable=None):
+        """ run the job on one device, exceptions are returned in the result """
+        error = unreachable.get(id(params)) if unreachable else None
+        if self._breaker is None:
+            if error is not None:
+                return FleetResult(params, None, error, 0.0)
+            return await self._run_limited(params, {})
+        key = self._breaker.key(params)
+        if not self._breaker.allow(key):
+            reason = "skipped after %s failures, last one: %s" % (
+                self._breaker.failures(key), self._breaker.failure(key))
+            return FleetResult(params, None, AionetCircuitOpenError(params.get("ip"), None, reason), 0.0)
+        if error is not None:
+            self._breaker.record_failure(key, error)
+            return FleetResult(params, None, error, 0.0)
+        timings = {}
+        item = None
+        try:
+            item = await self._run_limited(params, timings)
+            return item
+        finally:
+            if item is None:
+                self._breaker.abandon(key)
+            elif "connect_time" in timings:
+                self._breaker.record_success(key)
+            else:
+                self._breaker.record_failure(key, item.exception)
+
+    async def _run_limited(self, params, timings):
+        """ run the job within the limit of the limiter """
+        if self._limiter is None:
+            return await self._run_timed(params, timings)
+        lease = await self._limiter.acquire(self._scope(params) if self._scope is not None else None)
+        item = None
+        try:
+            item = await self._run_timed(params, timings)
+            return item
+        finally:
+            if item is None:
+                # cancelled, it says nothing about the device
+                self._limiter.release(lease)
+            else:
+                self._limiter.release(lease, error=item.exception, **timings)
+
+    async def _run_timed(self, params, timings):
+        """ run the job within the deadline """
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        try:
+            if self._timeout is None:
+                result = await self._process(params, timings)
+            else:
+                result = await asyncio.wait_for(self._process(params, timings), self._timeout)
+        except asyncio.TimeoutError as e:
+            elapsed = loop.time() - start
+            # read timeouts of the device are TimeoutError too
+            if self._timeout is not None and elapsed >= self._timeout:
+                e = AionetTimeoutError(params.get("ip"), None, "deadline of %s seconds exceeded" % self._timeout)
+            return FleetResult(params, None, e, elapsed)
+        except Exception as e:
+            return FleetResult(params, None, e, loop.time() - start)
+        return FleetResult(params, result, None, loop.time() - start)
+
+    async def _process(self, params, timings):
+        """ connect, run the job and disconnect, connect and job times are put to timings """
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        device = self._connection_factory(**params)
+        async with device as connected:
+            timings["connect_time"] = loop.time() - start
+            start = loop.time()
+            result = await self._job(connected)
+            timings["job_time"] = loop.time() - start
+            return result
@@ -0,0 +1,257 @@
+"""
+Inventory Module, streaming devices from YAML, CSV or JSONL files
+"""
+import csv
+import json
+import os
+import re
+from collections import namedtuple
+
+from aionet.dispatcher import DEVICE_MAPPER
+from aionet.spec import DeviceSpec
+from aionet.utils import accepted_params
+
+Host = namedtuple("Host", ["name", "groups", "params", "data"])
+"""
+Device of the inventory: name, tuple of groups, dict of ConnectionHandler params
+and dict of other attributes (ex: site, role)
+"""
+
+_CONNECTION_PARAMS = frozenset().union(*[accepted_params(cls) for cls in DEVICE_MAPPER.values()])
+"""Names of params accepted by ConnectionHandler, other attributes of hosts are data"""
+
+_CSV_INT_PARAMS = frozenset(["port", "timeout", "read_size", "max_exec_channels", "offload_threshold"])
+"""Params, which are converted to int from CSV"""
+
+_CSV_BOOL_PARAMS = frozenset(["agent_forwarding", "binary_channel", "fast_prep", "sentinel"])
+"""Params, which are converted to bool from CSV"""
+
+_FORMATS = {".yaml": "yaml", ".yml": "yaml", ".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+"""File extensions of the supported formats"""
+
+
+class Inventory:
+    """
+    Lazy inventory of devices
+
+    Hosts are read from the file while they are iterated, so the first device can be connected before
+    the rest of the file is read, and only one host is in memory at a time. Every iteration reads
+    the file again. Host params are merged from defaults, groups (the first group of the host wins,
+    groups can have parent groups) and the host itself. Usage::
+
+        inventory = Inventory("devices.csv", groups={"core": {"device_type": "cisco_ios"}},
+                              defaults={"username": "admin", "password": "secret"})
+        runner = FleetRunner(job)
+        async for item in runner.run(inventory.filter(site="ams").devices()):
+            ...
+
+    Formats:
+
+    * JSONL: one JSON object per line
+    * CSV: header with attribute names, groups are separated by ';'
+    * YAML: stream of documents, every document is a host or a list of hosts. It requires PyYAML
+
+    Every host has ConnectionHandler params (ip, device_type, ...), optional name and groups,
+    other attributes are kept in data. Attributes can be in a nested data dict as well.
+    """
+
+    def __init__(self, path, groups=None, defaults=None, format=None):
+        """
+        :param path: path of the inventory file
+        :param groups: dict of groups and their attributes, or path of YAML or JSON file with it.
+                       Group attributes can have groups key with parent groups
+        :param defaults: dict of attributes of all hosts, or path of YAML or JSON file with it
+        :param format: yaml, csv or jsonl, default is detected by the file extension
+        """
+        if format is None:
+            format = _FORMATS.get(os.path.splitext(path)[1].lower())
+            if format is None:
+                raise ValueError("Unknown inventory format of %r, format must be set" % path)
+        if format not in ("yaml", "csv", "jsonl"):
+            raise ValueError("Unsupported inventory format %r, supported are yaml, csv and jsonl" % format)
+        self.path = path
+        self._format = format
+        self._groups = _load_mapping(groups)
+        self._defaults = _load_mapping(defaults)
+        self._resolved_groups = {}
+        self._filters = ()
+
+    def __repr__(self):
+        return "<Inventory path=%r>" % self.path
+
+    def __iter__(self):
+        """ iterate :class:`Host` of the inventory """
+        for record in self._records():
+            host = self._make_host(record)
+            if all(check(host) for check in self._filters):
+                yield host
+
+    def devices(self):
+        """ iterate ConnectionHandler params of the hosts """
+        for host in self:
+            yield host.params
+
+    def specs(self):
+        """ iterate :class:`aionet.DeviceSpec` of the hosts, the compact form for keeping many devices in memory """
+        for host in self:
+            yield DeviceSpec(**host.params)
+
+    def filter(self, predicate=None, **attributes):
+        """
+        Inventory with hosts which pass all conditions, it's lazy like the original one
+
+        :param predicate: callable, which gets :class:`Host` and returns True for the hosts to keep
+        :param attributes: attribute (name, groups, param or data) equals the value.
+                           If the value is list, tuple or set, the attribute must be in it.
+                           For groups, the host must be in the group (or any of the groups)
+        """
+        inventory = object.__new__(type(self))
+        inventory.__dict__.update(self.__dict__)
+        filters = list(self._filters)
+        if predicate is not None:
+            filters.append(predicate)
+        for name, value in attributes.items():
+            filters.append(_attribute_filter(name, value))
+        inventory._filters = tuple(filters)
+        return inventory
+
+    def _records(self):
+        """ iterate raw host dicts of the file """
+        if self._format == "jsonl":
+            with open(self.path) as file:
+                for line in file:
+                    if line.strip():
+                        yield json.loads(line)
+        elif self._format == "csv":
+            with open(self.path, newline="") as file:
+                reader = csv.DictReader(file)
+                for row in reader:
+                    yield _convert_csv_row(row, reader.line_num)
+        else:
+            yaml = _import_yaml()
+            with open(self.path) as file:
+                for document in yaml.load_all(file, Loader=_yaml_loader(yaml)):
+                    if isinstance(document, list):
+                        for record in document:
+                            yield record
+                    elif document is not None:
+                        yield document
+
+    def _resolve_group(self, name, chain=()):
+        """ attributes of the group merged with its parents, resolved once """
+        if name in self._resolved_groups:
+            return self._resolved_groups[name]
+        if name in chain:
+            raise ValueError("Inventory group %r is its own parent" % name)
+        group = dict(self._groups.get(name) or {})
+        resolved = {}
+        for parent in reversed(_as_tuple(group.pop("groups", ()))):
+            _merge(resolved, self._resolve_group(parent, chain + (name,)))
+        _merge(resolved, group)
+        self._resolved_groups[name] = resolved
+        return resolved
+
+    def _make_host(self, record):
+        record = dict(record)
+        groups = _as_tuple(record.pop("groups", ()))
+        attributes = dict(self._defaults)
+        for group in reversed(groups):
+            _merge(attributes, self._resolve_group(group))
+        _merge(attributes, record)
+        data = dict(attributes.pop("data", None) or {})
+        params = {}
+        for name, value in attributes.items():
+            if name in _CONNECTION_PARAMS:
+                params[name] = value
+            elif name != "name":
+                data[name] = value
+        name = attributes.get("name") or params.get("ip")
+        return Host(name, groups, params, data)
+
+
+def _merge(attributes, other):
+    """ update attributes, nested data dicts are merged too """
+    for name, value in other.items():
+        if name == "data" and isinstance(attributes.get("data"), dict):
+            data = dict(attributes["data"])
+            data.update(value or {})
+            attributes["data"] = data
+        else:
+            attributes[name] = value
+
+
+def _as_tuple(groups):
+    if isinstance(groups, str):
+        return tuple(group for group in re.split(r"[;,\s]+", groups) if group)
+    return tuple(groups or ())
+
+
+def _attribute_filter(name, value):
+    values = value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+
+    def check(host):
+        if name == "groups":
+            return any(group in host.groups for group in values)
+        if name == "name":
+            return host.name in values
+        if name in host.params:
+            return host.params[name] in values
+        return name in host.data and host.data[name] in values
+
+    return check
+
+
+def _convert_csv_row(row, line=None):
+    """ drop empty cells, so defaults and groups apply, and convert known params from strings """
+    record = {}
+    for name, value in row.items():
+        if name is None or value is None or value == "":
+            continue
+        if name in _CSV_INT_PARAMS:
+            value = _csv_int(value, name, line)
+        elif name in _CSV_BOOL_PARAMS:
+            value = value.strip().lower() in ("1", "true", "yes", "y")
+        record[name] = value
+    return record
+
+
+def _csv_int(value, name, line):
+    """ int of the cell, spaces and integral floats (ex: 22.0 saved by spreadsheets) are accepted """
+    text = value.strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        number = float(text)
+    except ValueError:
+        number = None
+    if number is None or not number.is_integer():
+        raise ValueError("Inventory CSV line %s: %s must be an integer, got %r" % (line, name, value))
+    return int(number)
+
+
+def _import_yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError("YAML inventory requires PyYAML package")
+    return yaml
+
+
+def _yaml_loader(yaml):
+    """ the fastest safe loader """
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _load_mapping(source):
+    """ dict from dict or YAML or JSON file """
+    if source is None:
+        return {}
+    if isinstance(source, dict):
+        return source
+    with open(source) as file:
+        if source.endswith(".json"):
+            return json.load(file) or {}
+        yaml = _import_yaml()
+        return yaml.load(file, Loader=_yaml_loader(yaml)) or {}
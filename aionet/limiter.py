@@ -0,0 +1,173 @@
+"""
+Limiter Module, adaptive concurrency limits with additive increase and multiplicative decrease
+"""
+import asyncio
+from collections import deque
+
+from aionet.exceptions import AionetAuthenticationError, AionetTimeoutError
+
+_OVERLOAD_ERRORS = (AionetTimeoutError, asyncio.TimeoutError, TimeoutError)
+"""Errors, which mean that the devices of the scope are overloaded"""
+
+_SHARED_OVERLOAD_ERRORS = (AionetAuthenticationError,)
+"""Errors, which mean that the AAA servers shared by all scopes are overloaded"""
+
+
+class _Scope:
+    """ state of one scope """
+
+    def __init__(self, limit):
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.waiters = deque()
+        self.baselines = {}
+        self.last_decrease = float("-inf")
+
+
+class _Lease:
+    """ slots taken by one acquire """
+
+    def __init__(self, scopes, start):
+        self.scopes = scopes
+        self.start = start
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limiter, which adapts its limits to observed latency and errors
+
+    Limits are kept per scope (ex: site) and for the global scope, which is taken by every acquire.
+    Every successful release raises the limits of its scopes by increase/limit, so the limit grows by
+    increase per a full window of devices. A timeout or a connect or job time above latency_tolerance
+    times the usual one (exponential average of the samples) multiplies the limit of the device scope by
+    decrease, an authentication failure decreases the global limit too, because AAA servers are shared.
+    Only one decrease happens per window: releases of leases taken before the last decrease
+    don't decrease again. Usage with :class:`aionet.FleetRunner`::
+
+        limiter = AdaptiveLimiter(initial=20, max_limit=500)
+        runner = FleetRunner(job, concurrency=500, limiter=limiter, scope=lambda params: params["site"])
+        ...
+        print(limiter.limits())
+    """
+
+    GLOBAL = None
+    """Key of the global scope"""
+
+    def __init__(self, initial=10, min_limit=1, max_limit=1000, increase=1.0, decrease=0.5, latency_tolerance=3.0):
+        """
+        :param initial: initial limit of every scope
+        :param min_limit: limit never goes below it
+        :param max_limit: limit never goes above it
+        :param increase: additive increase of the limit per window of successful devices
+        :param decrease: factor of the limit after overload
+        :param latency_tolerance: connect or job time this many times above the usual one is overload.
+                                  None disables latency signals
+        """
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("limits must satisfy 1 <= min_limit <= initial <= max_limit")
+        self._initial = initial
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._increase = increase
+        self._decrease = decrease
+        self._latency_tolerance = latency_tolerance
+        self._scopes = {}
+
+    def _scope(self, key):
+        if key not in self._scopes:
+            self._scopes[key] = _Scope(self._initial)
+        return self._scopes[key]
+
+    def limit(self, scope=GLOBAL):
+        """ current limit of the scope """
+        return int(self._scope(scope).limit)
+
+    def limits(self):
+        """ current limits and number of devices in flight of all scopes, for monitoring """
+        return {key: {"limit": int(state.limit), "in_flight": state.in_flight, "waiting": len(state.waiters)}
+                for key, state in self._scopes.items()}
+
+    async def acquire(self, scope=GLOBAL):
+        """
+        Wait for a free slot in the scope and in the global scope
+
+        :return: lease, which must be given back to :meth:`release`
+        """
+        states = [self._scope(scope)]
+        if scope is not self.GLOBAL:
+            states.append(self._scope(self.GLOBAL))
+        taken = []
+        try:
+            # the narrow scope first, waiting for it doesn't hold the global slots
+            for state in states:
+                await self._take(state)
+                taken.append(state)
+        except BaseException:
+            for state in taken:
+                self._give_back(state)
+            raise
+        return _Lease(taken, asyncio.get_event_loop().time())
+
+    def release(self, lease, error=None, connect_time=None, job_time=None):
+        """
+        Give back the slots and adapt the limits
+
+        :param lease: lease from acquire
+        :param error: exception of the device, None if it succeeded
+        :param connect_time: seconds of connecting to the device
+        :param job_time: seconds of the job on the connected device
+        """
+        now = asyncio.get_event_loop().time()
+        for index, state in enumerate(lease.scopes):
+            overload = isinstance(error, _SHARED_OVERLOAD_ERRORS)
+            if index == 0:
+                # the device scope, global scope only when the device has no scope
+                overload = isinstance(error, _OVERLOAD_ERRORS) or overload
+                # both samples must update their baselines
+                overload = self._slow(state, "connect", connect_time) or overload
+                overload = self._slow(state, "job", job_time) or overload
+            if overload:
+                if lease.start > state.last_decrease:
+                    state.limit = max(self._min_limit, state.limit * self._decrease)
+                    state.last_decrease = now
+            elif error is None:
+                state.limit = min(self._max_limit, state.limit + self._increase / state.limit)
+            self._give_back(state)
+
+    def _slow(self, state, name, sample):
+        """ check the sample against the usual latency, which follows all samples slowly """
+        if sample is None or self._latency_tolerance is None:
+            return False
+        baseline = state.baselines.get(name)
+        if baseline is None:
+            state.baselines[name] = sample
+            return False
+        state.baselines[name] = baseline + 0.1 * (sample - baseline)
+        return sample > baseline * self._latency_tolerance
+
+    async def _take(self, state):
+        if state.in_flight < int(state.limit) and not state.waiters:
+            state.in_flight += 1
+            return
+        waiter = asyncio.get_event_loop().create_future()
+        state.waiters.append(waiter)
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over already
+                self._give_back(state)
+            elif waiter in state.waiters:
+                state.waiters.remove(waiter)
+            raise
+
+    def _give_back(self, state):
+        state.in_flight -= 1
+        # slot is handed over to the waiter directly, so new acquires can't overtake it
+        while state.waiters and state.in_flight < int(state.limit):
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                state.in_flight += 1
+                waiter.set_result(None)
@@ -0,0 +1,47 @@
+"""
+Offload Module, processing of large outputs in executors instead of the event loop
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+_EXECUTORS = {}
+"""Shared executors created by name"""
+
+_lock = threading.Lock()
+
+
+def get_executor(executor):
+    """
+    Executor for offload_executor param of devices
+
+    :param executor: 'thread' or 'process' for the shared pool of this kind, which is created
+                     on the first use, or instance of :class:`concurrent.futures.Executor`
+    """
+    if isinstance(executor, Executor):
+        return executor
+    if executor not in ("thread", "process"):
+        raise ValueError("Unsupported offload executor %r, supported are thread, process or Executor" % executor)
+    with _lock:
+        if executor not in _EXECUTORS:
+            if executor == "thread":
+                _EXECUTORS[executor] = ThreadPoolExecutor(thread_name_prefix="aionet-offload")
+            else:
+                _EXECUTORS[executor] = ProcessPoolExecutor()
+        return _EXECUTORS[executor]
+
+
+async def run(executor, func, *args):
+    """ run func in the executor, see get_executor. func and args must be picklable for process pool """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(get_executor(executor), functools.partial(func, *args))
+
+
+def shutdown(wait=True):
+    """ shut down the shared executors, new ones are created by the next offloading """
+    with _lock:
+        executors = list(_EXECUTORS.values())
+        _EXECUTORS.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
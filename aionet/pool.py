@@ -0,0 +1,185 @@
+"""
+Pool Module, reusing prepared device sessions between jobs
+"""
+import asyncio
+from collections import OrderedDict
+
+from aionet.channels import _BROKEN_CHANNEL_ERRORS
+from aionet.dispatcher import ConnectionHandler
+
+
+class ConnectionPool:
+    """
+    Pool of connected devices
+
+    Sessions are keyed on host, username, device_type and port. A released session stays connected
+    and the next acquire with the same key gets it back without SSH handshake, login and session
+    preparation. Before handing out, the session is probed with a new line and returned to the
+    terminal mode it had after the connection. Idle sessions are disconnected after idle_ttl seconds,
+    and the least recently used ones when there are more than max_idle of them. Usage::
+
+        async with ConnectionPool(max_idle=500, idle_ttl=300) as pool:
+            async with pool.connection(**params) as device:
+                await device.send_command("show version")
+
+    ``pool.connection`` can be passed as connection_factory of :class:`aionet.FleetRunner`.
+    """
+
+    def __init__(self, max_idle=100, idle_ttl=300, probe_timeout=5, connection_factory=ConnectionHandler):
+        """
+        :param int max_idle: max number of idle sessions kept in the pool
+        :param idle_ttl: seconds after which an idle session is disconnected, None is never
+        :param probe_timeout: seconds for the device to answer the probe before the session is dropped
+        :param connection_factory: callable creating device from params, default is ConnectionHandler
+        """
+        if max_idle < 0:
+            raise ValueError("max_idle can't be negative")
+        self._max_idle = max_idle
+        self._idle_ttl = idle_ttl
+        self._probe_timeout = probe_timeout
+        self._connection_factory = connection_factory
+        # idle device -> (key, released at), from the least recently used
+        self._idle = OrderedDict()
+        # key -> idle devices of the key, from the least recently used
+        self._idle_by_key = {}
+        # device -> (key, terminal mode after connection) for all devices created by the pool
+        self._devices = {}
+        self._closed = False
+
+    async def __aenter__(self):
+        """Async Context Manager"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async Context Manager"""
+        await self.close()
+
+    def __len__(self):
+        """ number of idle sessions """
+        return len(self._idle)
+
+    @staticmethod
+    def _key(params):
+        return params.get("ip"), params.get("username"), params.get("device_type"), params.get("port")
+
+    @staticmethod
+    def _now():
+        return asyncio.get_event_loop().time()
+
+    async def acquire(self, **params):
+        """
+        Take idle session of the device or connect a new one
+
+        :param params: ConnectionHandler params
+        :return: connected device
+        """
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        await self.evict_idle()
+        key = self._key(params)
+        while key in self._idle_by_key:
+            device = self._pop_idle(key)
+            if await self._check(device):
+                device._logger.info("Reusing pooled session")
+                return device
+            await self._discard(device)
+
+        device = self._connection_factory(**params)
+        await device.connect()
+        self._devices[device] = (key, device.current_terminal)
+        return device
+
+    async def release(self, device, discard=False):
+        """
+        Return the device to the pool
+
+        :param device: device taken by acquire
+        :param bool discard: disconnect the device instead, when its session may be out of sync
+        """
+        if device not in self._devices:
+            raise ValueError("device doesn't belong to the pool")
+        if discard or self._closed or not self._max_idle:
+            await self._discard(device)
+            return
+        key = self._devices[device][0]
+        self._idle[device] = (key, self._now())
+        self._idle_by_key.setdefault(key, OrderedDict())[device] = None
+        while len(self._idle) > self._max_idle:
+            await self._discard(self._pop_idle())
+
+    def connection(self, **params):
+        """
+        async context manager, which acquires the device and releases it at exit
+
+        The device is disconnected instead of released, if the block was interrupted by timeout or cancellation
+        """
+        return _PooledConnection(self, params)
+
+    async def evict_idle(self):
+        """ disconnect sessions, which are idle longer than idle_ttl """
+        if self._idle_ttl is None:
+            return
+        expired = self._now() - self._idle_ttl
+        while self._idle and next(iter(self._idle.values()))[1] <= expired:
+            await self._discard(self._pop_idle())
+
+    async def close(self):
+        """ disconnect all idle sessions, sessions in use are disconnected at release """
+        self._closed = True
+        while self._idle:
+            await self._discard(self._pop_idle())
+
+    def _pop_idle(self, key=None):
+        """ take the most recently used idle device of the key or the least recently used of all """
+        if key is None:
+            device, (key, _) = self._idle.popitem(last=False)
+            devices = self._idle_by_key[key]
+            del devices[device]
+        else:
+            devices = self._idle_by_key[key]
+            device, _ = devices.popitem()
+            del self._idle[device]
+        if not devices:
+            del self._idle_by_key[key]
+        return device
+
+    async def _check(self, device):
+        """ probe the prompt of the session and return it to its initial terminal mode """
+        home = self._devices[device][1]
+        try:
+            await device.send_command_expect("\n", timeout=self._probe_timeout)
+            current = device.current_terminal
+            if current != home:
+                if home is not None:
+                    await home.enter(exit_nested=True)
+                else:
+                    await current.path[0].exit()
+        except Exception as e:
+            device._logger.info("Pooled session is broken: %s" % e)
+            return False
+        return True
+
+    async def _discard(self, device):
+        """ forget the device and disconnect it """
+        self._devices.pop(device, None)
+        try:
+            await device.disconnect()
+        except Exception:
+            pass
+
+
+class _PooledConnection:
+    """ async context manager for using a device of the pool """
+
+    def __init__(self, pool, params):
+        self._pool = pool
+        self._params = params
+        self._device = None
+
+    async def __aenter__(self):
+        self._device = await self._pool.acquire(**self._params)
+        return self._device
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        discard = exc_type is not None and issubclass(exc_type, _BROKEN_CHANNEL_ERRORS)
+        await self._pool.release(self._device, discard=discard)
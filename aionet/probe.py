@@ -0,0 +1,80 @@
+"""
+Probe Module, bulk TCP reachability check of devices before connecting to them
+"""
+import asyncio
+import errno
+from collections import namedtuple
+
+ProbeResult = namedtuple("ProbeResult", ["host", "port", "status", "rtt"])
+"""Result of probing one device: status is open, refused or filtered, rtt is seconds of the TCP connect"""
+
+
+class TCPProber:
+    """
+    Prober of device ports with plain TCP connects
+
+    A TCP connect costs a round trip and no CPU, so thousands of devices can be probed at once in the time
+    of one timeout, and only open ones are connected by SSH or Telnet. Usage::
+
+        prober = TCPProber(concurrency=1000, timeout=2)
+        results = await prober.probe_all(devices)
+        reachable = [params for params, result in zip(devices, results) if result.status == prober.OPEN]
+    """
+
+    OPEN = "open"
+    """Device accepted the connection"""
+
+    REFUSED = "refused"
+    """Device answered with reset, nothing listens on the port"""
+
+    FILTERED = "filtered"
+    """No answer in timeout or the network is unreachable"""
+
+    def __init__(self, concurrency=500, timeout=2.0):
+        """
+        :param int concurrency: max number of connects at once, keep it below the open files limit
+        :param timeout: seconds to wait for the answer. A lost SYN is retransmitted after 1 second,
+                        so shorter timeouts report filtered hosts on lossy networks
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._concurrency = concurrency
+        self._timeout = timeout
+
+    @staticmethod
+    def address(params):
+        """ host and port of the device params """
+        port = params.get("port") or (23 if params.get("protocol") == "telnet" else 22)
+        return params.get("ip"), int(port)
+
+    async def probe(self, host, port=22):
+        """ probe one port, return :class:`ProbeResult` """
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        try:
+            transport, _ = await asyncio.wait_for(
+                loop.create_connection(asyncio.Protocol, host, port), self._timeout)
+        except asyncio.TimeoutError:
+            return ProbeResult(host, port, self.FILTERED, None)
+        except OSError as e:
+            status = self.REFUSED if e.errno == errno.ECONNREFUSED else self.FILTERED
+            return ProbeResult(host, port, status, loop.time() - start)
+        rtt = loop.time() - start
+        transport.abort()
+        return ProbeResult(host, port, self.OPEN, rtt)
+
+    async def probe_all(self, devices):
+        """
+        probe all devices concurrently
+
+        :param devices: iterable of dicts with ConnectionHandler params, the ports are connected directly,
+                        so devices behind a tunnel must be left out
+        :return: list of :class:`ProbeResult` in the order of devices
+        """
+        slots = asyncio.Semaphore(self._concurrency)
+
+        async def probe(params):
+            async with slots:
+                return await self.probe(*self.address(params))
+
+        return await asyncio.gather(*[probe(params) for params in devices])
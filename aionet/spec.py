@@ -0,0 +1,143 @@
+"""
+Spec Module, compact immutable descriptors of queued devices
+"""
+import sys
+import weakref
+from collections.abc import Mapping
+
+from aionet.dispatcher import ConnectionHandler
+
+
+class _Options:
+    """ sorted items of the options, tuples can't be referenced weakly """
+
+    __slots__ = ("items", "__weakref__")
+
+    def __init__(self, items):
+        self.items = items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+_SHARED_OPTIONS = weakref.WeakValueDictionary()
+"""Options shared by specs with the same options, they are dropped with the last spec using them"""
+
+
+def _share(options):
+    """ the same options object for equal options, unhashable ones are kept as they are """
+    try:
+        shared = _SHARED_OPTIONS.get(options)
+    except TypeError:
+        return options
+    if shared is None:
+        # the key is the tuple, the options object as key would keep itself alive
+        shared = _SHARED_OPTIONS[options] = _Options(options)
+    return shared
+
+
+def _restore(cls, params):
+    """ unpickle the spec """
+    return cls(**params)
+
+
+class DeviceSpec(Mapping):
+    """
+    Connection params of one device, without any session objects
+
+    A device object builds its SSH params, logger and terminal modes at creation, which is wasted for
+    devices waiting in a queue. The spec keeps only the params: ip, device_type, username, password
+    and port in slots, and the rest in an object, which is shared by the specs with the same options.
+    The device is created by :meth:`handler` when the connection opens.
+
+    The spec is immutable and hashable, and it's a mapping of the params, so it can be used everywhere
+    the params dict is expected (ex: :class:`aionet.FleetRunner`, ``ConnectionHandler(**spec)``)::
+
+        specs = [DeviceSpec(ip, "cisco_ios", username="admin", password="secret") for ip in ips]
+        async for item in FleetRunner(job).run(specs):
+            ...
+    """
+
+    __slots__ = ("ip", "device_type", "username", "password", "port", "_options")
+
+    def __init__(self, ip, device_type, username=u"", password=u"", port=None, **options):
+        """
+        :param ip: ip address for connection
+        :param device_type: device type for ConnectionHandler
+        :param username: username for logging to device
+        :param password: user password for logging to device
+        :param port: port number, None is the default of the protocol
+        :param options: other ConnectionHandler params
+        """
+        setattr_ = object.__setattr__
+        setattr_(self, "ip", ip)
+        setattr_(self, "device_type", sys.intern(device_type))
+        setattr_(self, "username", sys.intern(username) if isinstance(username, str) else username)
+        setattr_(self, "password", password)
+        setattr_(self, "port", port)
+        setattr_(self, "_options", _share(tuple(sorted(options.items()))) if options else ())
+
+    @classmethod
+    def from_params(cls, params):
+        """ spec from ConnectionHandler params dict """
+        return cls(**params)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DeviceSpec is immutable, use replace")
+
+    def __delattr__(self, name):
+        raise AttributeError("DeviceSpec is immutable, use replace")
+
+    def __reduce__(self):
+        return _restore, (type(self), dict(self))
+
+    def _items(self):
+        items = [("ip", self.ip), ("device_type", self.device_type), ("username", self.username),
+                 ("password", self.password)]
+        if self.port is not None:
+            items.append(("port", self.port))
+        items.extend(self._options)
+        return items
+
+    def __getitem__(self, name):
+        if name in ("ip", "device_type", "username", "password"):
+            return getattr(self, name)
+        if name == "port" and self.port is not None:
+            return self.port
+        for option, value in self._options:
+            if option == name:
+                return value
+        raise KeyError(name)
+
+    def __iter__(self):
+        return (name for name, _ in self._items())
+
+    def __len__(self):
+        return 4 + (self.port is not None) + len(self._options)
+
+    def __eq__(self, other):
+        if isinstance(other, DeviceSpec):
+            return self._items() == other._items()
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        # options can be unhashable (ex: list of client keys), equal specs have equal main params anyway
+        return hash((self.ip, self.device_type, self.username, self.port))
+
+    def __repr__(self):
+        options = "".join(", %s=%r" % option for option in self._options if option[0] not in ("secret", "passphrase"))
+        port = ", port=%r" % self.port if self.port is not None else ""
+        return "DeviceSpec(%r, %r, username=%r%s%s)" % (self.ip, self.device_type, self.username, port, options)
+
+    def replace(self, **changes):
+        """ new spec with some params changed """
+        params = dict(self)
+        params.update(changes)
+        return type(self)(**params)
+
+    def handler(self):
+        """ create the device object for connecting, see ConnectionHandler """
+        return ConnectionHandler(**self)
@@ -0,0 +1,112 @@
+"""
+Spool Module, writing command outputs straight to files instead of keeping them in memory
+"""
+import gzip
+import hashlib
+import io
+import mmap
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS = (None, "gzip", "zstd")
+
+
+class SpooledOutput:
+    """ Handle of command output spooled to file """
+
+    def __init__(self, path, size, sha256, compression=None):
+        """
+        :param path: path of the file, None if output was written to file object without name
+        :param int size: size in bytes of the uncompressed output
+        :param str sha256: sha256 hex digest of the uncompressed output
+        :param compression: compression of the file (None, gzip or zstd)
+        """
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.compression = compression
+
+    def __repr__(self):
+        return "<SpooledOutput path=%r size=%d compression=%s>" % (self.path, self.size, self.compression)
+
+    def open(self):
+        """ open spooled output for reading, returns binary file object with uncompressed data """
+        if self.path is None:
+            raise ValueError("output was spooled to file object without path")
+        if self.compression == "gzip":
+            return gzip.open(self.path, "rb")
+        if self.compression == "zstd":
+            return zstandard.ZstdDecompressor().stream_reader(open(self.path, "rb"), closefd=True)
+        return open(self.path, "rb")
+
+    def read(self):
+        """ read whole output as string """
+        with self.open() as file:
+            return file.read().decode()
+
+    def mmap(self):
+        """ memory map of the spooled output, only for uncompressed files """
+        if self.path is None or self.compression is not None:
+            raise ValueError("only uncompressed output spooled to path can be memory mapped")
+        if not self.size:
+            return b""
+        with open(self.path, "rb") as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class SpoolWriter:
+    """ Writer of command output to path or file object, counting size and hash of the written data """
+
+    def __init__(self, sink, compression=None):
+        """
+        :param sink: path or file object. Text file objects are written without compression
+        :param compression: None, gzip or zstd
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError("compression must be one of %s" % (COMPRESSIONS,))
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires zstandard package")
+
+        self._compression = compression
+        self._size = 0
+        self._hash = hashlib.sha256()
+        self._text = isinstance(sink, io.TextIOBase)
+        if self._text and compression is not None:
+            raise ValueError("compression can't be used with text file object")
+
+        if hasattr(sink, "write"):
+            self._path = getattr(sink, "name", None)
+            if not isinstance(self._path, str):
+                self._path = None
+            self._raw = sink
+            self._owned = False
+        else:
+            self._path = sink
+            self._raw = open(sink, "wb")
+            self._owned = True
+
+        if compression == "gzip":
+            self._file = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        elif compression == "zstd":
+            self._file = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._file = self._raw
+
+    def write(self, text):
+        data = text.encode()
+        self._size += len(data)
+        self._hash.update(data)
+        self._file.write(text if self._text else data)
+
+    def close(self):
+        """ flush and close the writer, returns the handle of spooled output """
+        if self._file is not self._raw:
+            self._file.close()
+        if self._owned:
+            self._raw.close()
+        else:
+            self._raw.flush()
+        return SpooledOutput(self._path, self._size, self._hash.hexdigest(), self._compression)
@@ -0,0 +1,174 @@
+"""
+Tunnels Module, device connections multiplexed over shared jump host connections
+"""
+import asyncio
+
+import asyncssh
+
+from aionet.exceptions import AionetAuthenticationError, AionetTimeoutError
+from aionet.logging import logger
+
+
+class _TunnelConnection:
+    """ SSH connection to the jump host and number of device channels opened over it """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.channels = 0
+
+
+class JumpHost:
+    """
+    Jump host shared by device connections
+
+    Every device connection is a direct-tcpip channel of an already authenticated SSH connection
+    to the jump host. A connection carries at most max_channels device connections, new connections
+    to the jump host are opened on demand when all of them are full. The object is passed
+    as tunnel parameter of the devices::
+
+        jump_host = JumpHost("bastion.example.com", username="user", password="secret")
+        async with ConnectionHandler(ip="10.0.0.1", device_type="cisco_ios", tunnel=jump_host, ...) as device:
+            ...
+        await jump_host.wait_closed()
+    """
+
+    def __init__(self, host, username=u"", password=u"", port=22, max_channels=10, max_connections=None,
+                 timeout=30, **ssh_options):
+        """
+        :param host: jump host address
+        :param username: username for logging to the jump host
+        :param password: password for logging to the jump host
+        :param port: ssh port of the jump host
+        :param int max_channels: max number of device connections over one jump host connection.
+                                 Jump hosts usually limit it by MaxSessions
+        :param int max_connections: max number of connections to the jump host, device connections wait
+                                    for a free channel when all of them are full. None is no limit
+        :param timeout: timeout for connecting to the jump host
+        :param ssh_options: other asyncssh.connect options (ex: known_hosts, client_keys)
+        """
+        if max_channels < 1:
+            raise ValueError("max_channels must be at least 1")
+        self.host = host
+        self._port = int(port)
+        self._max_channels = max_channels
+        self._max_connections = max_connections
+        self._timeout = timeout
+        self._conn_dict = dict(ssh_options, host=host, port=self._port, username=username, password=password)
+        self._connections = []
+        self._condition = asyncio.Condition()
+
+    def __repr__(self):
+        return "<JumpHost %s:%s>" % (self.host, self._port)
+
+    @property
+    def connections(self):
+        """ number of open connections to the jump host """
+        return len(self._connections)
+
+    @property
+    def channels(self):
+        """ number of device connections over the jump host """
+        return sum(entry.channels for entry in self._connections)
+
+    async def create_connection(self, session_factory, remote_host, remote_port):
+        """ open direct-tcpip channel to the device, called by asyncssh.connect of the device """
+        entry = await self._acquire()
+        try:
+            chan, session = await entry.conn.create_connection(session_factory, remote_host, remote_port)
+        except BaseException:
+            await self._release(entry)
+            raise
+        asyncio.ensure_future(self._release_on_close(entry, chan))
+        return chan, session
+
+    async def _acquire(self):
+        """ take a channel slot of a connection, open new connection when all are full """
+        async with self._condition:
+            while True:
+                self._connections = [entry for entry in self._connections if not entry.conn.is_closed()]
+                for entry in self._connections:
+                    if entry.channels < self._max_channels:
+                        entry.channels += 1
+                        return entry
+                if self._max_connections is None or len(self._connections) < self._max_connections:
+                    entry = _TunnelConnection(await self._connect())
+                    entry.channels += 1
+                    self._connections.append(entry)
+                    return entry
+                await self._condition.wait()
+
+    async def _release(self, entry):
+        async with self._condition:
+            entry.channels -= 1
+            self._condition.notify()
+
+    async def _release_on_close(self, entry, chan):
+        await chan.wait_closed()
+        await self._release(entry)
+
+    async def _connect(self):
+        """ open new SSH connection to the jump host """
+        logger.info("Host {}: Opening jump host connection #{}".format(self.host, len(self._connections) + 1))
+        try:
+            return await asyncio.wait_for(asyncssh.connect(**self._conn_dict), self._timeout)
+        except asyncssh.DisconnectError as e:
+            raise AionetAuthenticationError(self.host, e.code, e.reason)
+        except asyncio.TimeoutError:
+            raise AionetTimeoutError(self.host, None, 'timeout while connecting to jump host %r' % self.host)
+
+    def close(self):
+        """ close all connections to the jump host, device connections over them are closed too """
+        for entry in self._connections:
+            entry.conn.close()
+
+    async def wait_closed(self):
+        """ close all connections and wait for them to be closed """
+        self.close()
+        for entry in self._connections:
+            await entry.conn.wait_closed()
+        self._connections = []
+
+
+class TunnelManager:
+    """
+    Registry of shared jump hosts
+
+    Devices of one site usually have the same jump host in their params, the manager returns
+    the same :class:`JumpHost` for the same host, port and username. Usage::
+
+        tunnels = TunnelManager(max_channels=10)
+        for params in devices:
+            params["tunnel"] = tunnels.get(**site_jump_host_params)
+        ...
+        await tunnels.close()
+    """
+
+    def __init__(self, max_channels=10, max_connections=None, timeout=30):
+        """
+        :param int max_channels: default max number of device connections over one jump host connection
+        :param int max_connections: default max number of connections to one jump host
+        :param timeout: default timeout for connecting to jump hosts
+        """
+        self._defaults = {"max_channels": max_channels, "max_connections": max_connections, "timeout": timeout}
+        self._jump_hosts = {}
+
+    def __len__(self):
+        return len(self._jump_hosts)
+
+    def get(self, host, username=u"", port=22, **kwargs):
+        """
+        Shared jump host, created at the first call with the same host, port and username
+
+        :param kwargs: other :class:`JumpHost` params, used only when the jump host is created
+        """
+        key = (host, int(port), username)
+        if key not in self._jump_hosts:
+            params = dict(self._defaults, **kwargs)
+            self._jump_hosts[key] = JumpHost(host, username=username, port=port, **params)
+        return self._jump_hosts[key]
+
+    async def close(self):
+        """ close connections of all jump hosts """
+        jump_hosts, self._jump_hosts = self._jump_hosts, {}
+        for jump_host in jump_hosts.values():
+            await jump_host.wait_closed()
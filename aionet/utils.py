@@ -2,7 +2,13 @@
 Utilities Module.
 """
 import re, os
-from clitable import CliTable, CliTableError
+import inspect
+import threading
+import time
+from collections import OrderedDict
+import textfsm
+import texttable
+from clitable import CliTable, CliTableError, IndexTable
 from aionet.constants import CODE_SET, CODE_NEXT_LINE
 
 
@@ -45,6 +51,17 @@ def strip_ansi_escape_codes(string):
     return output
 
 
+def accepted_params(cls):
+    """ names of keyword params accepted by __init__ of the class and its bases """
+    names = set()
+    for klass in cls.__mro__:
+        if "__init__" in vars(klass) and klass is not object:
+            for name, param in inspect.signature(klass.__init__).parameters.items():
+                if name != "self" and param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY):
+                    names.add(name)
+    return names
+
+
 def get_template_dir():
     """Find and return the ntc-templates/templates dir."""
     try:
@@ -79,16 +96,164 @@ def clitable_to_dict(cli_table):
     return objs
 
 
+class TextFSMCache:
+    """
+    Process-wide cache of ntc-templates: template dir, parsed index, its matches of platform and command,
+    and compiled templates
+
+    Templates are evicted by LRU. Files are checked at most once per check_interval seconds,
+    the index and templates are reloaded when their mtime changes. The cache is thread safe,
+    every process of a process pool has its own one.
+    """
+
+    def __init__(self, maxsize=128, check_interval=1.0):
+        """
+        :param int maxsize: max number of compiled templates, matches are kept up to 32 times more
+        :param check_interval: seconds between checks of the template dir and mtime of files
+        """
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._template_dir = None
+        self._index = None
+        self._matches = OrderedDict()
+        self._templates = OrderedDict()
+
+    def clear(self):
+        """ drop everything, files are read again by the next parsing """
+        with self._lock:
+            self._template_dir = None
+            self._index = None
+            self._matches.clear()
+            self._templates.clear()
+
+    def _fresh(self, entry, path, now):
+        """ check if the cached entry of the file is still valid, its mtime is checked once per interval """
+        if now - entry["checked"] < self.check_interval:
+            return True
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return False
+        entry["checked"] = now
+        return mtime == entry["mtime"]
+
+    def template_dir(self):
+        """ cached get_template_dir """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._template_dir
+            if entry is not None and entry["env"] == os.environ.get("NET_TEXTFSM") and \
+                    now - entry["checked"] < self.check_interval:
+                return entry["path"]
+        path = get_template_dir()
+        with self._lock:
+            self._template_dir = {"path": path, "env": os.environ.get("NET_TEXTFSM"), "checked": now}
+        return path
+
+    def match(self, template_dir, platform, command):
+        """ template names (separated by ':') of the command on the platform, None if there is no template """
+        path = os.path.join(template_dir, "index")
+        now = time.monotonic()
+        with self._lock:
+            index = self._index
+            if index is None or index["path"] != path or not self._fresh(index, path, now):
+                index = self._index = {"path": path, "mtime": os.stat(path).st_mtime, "checked": now,
+                                       "table": _read_index(template_dir, path)}
+                self._matches.clear()
+            key = (platform, command)
+            if key in self._matches:
+                self._matches.move_to_end(key)
+                return self._matches[key]
+            table = index["table"]
+            row = table.GetRowMatch({"Command": command, "Platform": platform})
+            templates = table.index[row]["Template"] if row else None
+            self._matches[key] = templates
+            if len(self._matches) > self.maxsize * 32:
+                self._matches.popitem(last=False)
+            return templates
+
+    def template(self, path):
+        """ compiled TextFSM of the template file and the lock for using it """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._templates.get(path)
+            if entry is not None and self._fresh(entry, path, now):
+                self._templates.move_to_end(path)
+                return entry["fsm"], entry["lock"]
+        mtime = os.stat(path).st_mtime
+        with open(path) as template_file:
+            fsm = textfsm.TextFSM(template_file)
+        entry = {"mtime": mtime, "checked": now, "fsm": fsm, "lock": threading.Lock()}
+        with self._lock:
+            self._templates[path] = entry
+            self._templates.move_to_end(path)
+            while len(self._templates) > self.maxsize:
+                self._templates.popitem(last=False)
+        return fsm, entry["lock"]
+
+    def _parse_template(self, path, raw_output):
+        """ header, records and keys of the output parsed by the template """
+        fsm, lock = self.template(path)
+        with lock:
+            fsm.Reset()
+            records = fsm.ParseText(raw_output)
+            return fsm.header, records, fsm.GetValuesByAttrib("Key")
+
+    def parse(self, raw_output, platform, command):
+        """
+        parse the output like CliTable.ParseCmd, with the cached index and templates
+
+        :return: list of dicts like clitable_to_dict
+        :raises CliTableError: when there is no template for the command
+        """
+        template_dir = self.template_dir()
+        templates = self.match(template_dir, platform, command)
+        if not templates:
+            raise CliTableError('No template found for attributes: "%s"' % {"Command": command,
+                                                                              "Platform": platform})
+        templates = templates.split(":")
+        if len(templates) == 1:
+            # building of CliTable copies every row several times, it costs more than the parsing itself
+            header, records, _ = self._parse_template(os.path.join(template_dir, templates[0]), raw_output)
+            header = [name.lower() for name in header]
+            return [dict(zip(header, record)) for record in records]
+
+        cli_table = CliTable(template_dir=template_dir)
+        cli_table.raw = raw_output
+        for position, name in enumerate(templates):
+            header, records, keys = self._parse_template(os.path.join(template_dir, name), raw_output)
+            table = texttable.TextTable()
+            table.header = header
+            for record in records:
+                table.Append(record)
+            # the same merging of several templates as CliTable.ParseCmd does
+            if position == 0:
+                cli_table._keys = set(keys)
+                cli_table.table = table
+            else:
+                cli_table.extend(table, set(cli_table._keys))
+        return clitable_to_dict(cli_table)
+
+
+def _read_index(template_dir, path):
+    """ parse the index file with completion of commands of CliTable, ex: sh[[ow]] """
+    cli_table = CliTable(template_dir=template_dir)
+    table = IndexTable(cli_table._PreParse, cli_table._PreCompile, path)
+    if "Template" not in table.index.header:
+        raise CliTableError("Index file does not have 'Template' column.")
+    return table
+
+
+textfsm_cache = TextFSMCache()
+"""Cache of templates used by get_structured_data, it can be resized or cleared"""
+
+
 def get_structured_data(raw_output, platform, command):
     """Convert raw CLI output to structured data using TextFSM template."""
-    template_dir = get_template_dir()
-    index_file = os.path.join(template_dir, "index")
-    textfsm_obj = CliTable(index_file, template_dir)
-    attrs = {"Command": command, "Platform": platform}
     try:
         # Parse output through template
-        textfsm_obj.ParseCmd(raw_output, attrs)
-        structured_data = clitable_to_dict(textfsm_obj)
+        structured_data = textfsm_cache.parse(raw_output, platform, command)
         output = raw_output if structured_data == [] else structured_data
         return output
     except CliTableError:
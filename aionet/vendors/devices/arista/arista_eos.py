@@ -4,4 +4,5 @@ from aionet.vendors.devices.base_ios import BaseIOSDevice
 class AristaEOS(BaseIOSDevice):
     """Class for working with Arista EOS"""
 
-    pass
+    _exec_supported = True
+    """Device accepts SSH exec requests, so commands can be executed without the interactive session"""
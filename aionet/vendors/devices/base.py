@@ -3,14 +3,19 @@ Base Device
 """
 
 import asyncio
+import copy
 import re
+from collections import OrderedDict
 
 # from aionet.logger import logger
 from aionet.logging import logger, aionetLoggerAdapter
 from aionet.version import __version__
-from aionet.exceptions import AionetConnectionError
+from aionet.exceptions import AionetConnectionError, AionetConfigError
 from aionet import utils
-from aionet.connections import SSHConnection, TelnetConnection
+from aionet import spool
+from aionet import offload
+from aionet.cache import HostCache
+from aionet.connections import SSHConnection, SSHChannelConnection, TelnetConnection
 
 
 class BaseDevice(object):
@@ -40,6 +45,13 @@ class BaseDevice(object):
             mac_algs=(),
             compression_algs=(),
             signature_algs=(),
+            binary_channel=False,
+            read_size=None,
+            fast_prep=False,
+            host_cache=None,
+            max_exec_channels=4,
+            offload_executor=None,
+            offload_threshold=1048576,
     ):
         """
         Initialize base class for asynchronous working with network devices
@@ -56,7 +68,8 @@ class BaseDevice(object):
         :param local_addr: local address for binding source of tcp connection
         :param client_keys: path for client keys. Default in None. With () it will use default file in OS
         :param passphrase: password for encrypted client keys
-        :param tunnel: An existing SSH connection that this new connection should be tunneled over
+        :param tunnel: An existing SSH connection that this new connection should be tunneled over,
+                or :class:`aionet.JumpHost` shared by many devices
         :param pattern: pattern for searching the end of device prompt.
                 Example: r"{hostname}.*?(\(.*?\))?[{delimeters}]"
         :param agent_forwarding: Allow or not allow agent forward for server
@@ -91,7 +104,20 @@ class BaseDevice(object):
             A list of public key signature algorithms to use during the SSH
             handshake, taken from `signature algorithms
             <https://asyncssh.readthedocs.io/en/latest/api.html#signaturealgs>`_
-        
+        :param binary_channel: use binary callback driven SSH session instead of the stream session,
+            it's cheaper in CPU and allocations for high volume outputs
+        :param read_size: max size in bytes of single read in binary channel, default is adaptive
+        :param fast_prep: prepare the session with the profile (prompt, base pattern, platform specific state)
+            cached by the previous sessions to this host, and send setup commands in one write.
+            The cached profile is used only if the first prompt of the session is the same
+        :param host_cache: :class:`HostCache <aionet.cache.HostCache>` or path of its directory for fast_prep.
+            Default is ~/.aionet/cache
+        :param max_exec_channels: max number of exec channels running at once over the SSH connection,
+            see send_command_exec
+        :param offload_executor: executor for processing and parsing outputs larger than offload_threshold,
+            so a large output doesn't stop I/O of other sessions: 'thread', 'process' (shared pools)
+            or :class:`concurrent.futures.Executor`. Default is None, outputs are processed in the event loop
+        :param offload_threshold: min size of the output in characters, which is offloaded
 
         :type host: str
         :type username: str
@@ -121,6 +147,13 @@ class BaseDevice(object):
         :type mac_algs: list[str]
         :type compression_algs: list[str]
         :type signature_algs: list[str]
+        :type binary_channel: bool
+        :type read_size: int
+        :type fast_prep: bool
+        :type host_cache: HostCache or str
+        :type max_exec_channels: int
+        :type offload_executor: str or Executor
+        :type offload_threshold: int
         """
         if ip:
             self.host = ip
@@ -128,6 +161,7 @@ class BaseDevice(object):
             raise ValueError("Host must be set")
 
         self._device_type = device_type
+        self._username = username
         self._timeout = timeout
         self._protocol = protocol
         if loop is None:
@@ -158,7 +192,12 @@ class BaseDevice(object):
                 "mac_algs": mac_algs,
                 "compression_algs": compression_algs,
                 "signature_algs": signature_algs,
+                "max_exec_channels": max_exec_channels,
             }
+            self._ssh_connection_class = SSHConnection
+            if binary_channel:
+                self._ssh_connection_class = SSHChannelConnection
+                self._ssh_connect_params_dict["read_size"] = read_size
         elif self._protocol == 'telnet':
             self._port = port or 23
             self._port = int(self._port)
@@ -177,10 +216,21 @@ class BaseDevice(object):
 
         self._ansi_escape_codes = False
 
+        self._fast_prep = fast_prep
+        if fast_prep and not isinstance(host_cache, HostCache):
+            host_cache = HostCache(host_cache)
+        self._host_cache = host_cache
+
+        if offload_executor is not None:
+            offload.get_executor(offload_executor)
+        self._offload_executor = offload_executor
+        self._offload_threshold = offload_threshold
+
         self._logger = aionetLoggerAdapter(logger, extra={'host': self.host})
         self._logger._host = self.host
         self.device_prompt = ''
         self.prompt_pattern = ''
+        self._last_prompt = None
 
     _delimiter_list = [">", "#"]
     """All this characters will stop reading from buffer. It mean the end of device prompt"""
@@ -188,6 +238,24 @@ class BaseDevice(object):
     _pattern = r"{prompt}.*?(\(.*?\))?[{delimiters}]"
     """Pattern for using in reading buffer. When it found processing ends"""
 
+    _config_error_pattern = None
+    """Pattern for finding errors in the output of configuration commands"""
+
+    _terminal_modes = ()
+    """Names of terminal mode attributes. The current terminal mode is derived from the prompt by them"""
+
+    _exec_supported = False
+    """Device accepts SSH exec requests, so commands can be executed without the interactive session"""
+
+    _config_file_path = None
+    """Path of the file on the device, which is used by send_config_file"""
+
+    _config_file_transfer = "scp"
+    """File transfer protocol for uploading configuration files (sftp or scp)"""
+
+    _config_file_load_command = None
+    """Command for merging configuration file with the running configuration"""
+
     async def __aenter__(self):
         """Async Context Manager"""
         await self.connect()
@@ -212,8 +280,11 @@ class BaseDevice(object):
         try:
             await self._establish_connection()
         except OSError as e:
-            raise AionetConnectionError(self.host, None, str(e))
-        await self._session_preparation()
+            raise AionetConnectionError(self.host, e.errno, str(e))
+        if self._fast_prep:
+            await self._fast_session_preparation()
+        else:
+            await self._session_preparation()
         logger.info("Has connected to the device")
 
     async def _establish_connection(self):
@@ -221,7 +292,7 @@ class BaseDevice(object):
         self._logger.info("Establishing connection")
         # initiate SSH connection
         if self._protocol == 'ssh':
-            conn = SSHConnection(**self._ssh_connect_params_dict)
+            conn = self._ssh_connection_class(**self._ssh_connect_params_dict)
         elif self._protocol == 'telnet':
             conn = TelnetConnection(**self._telnet_connect_params_dict)
         else:
@@ -231,19 +302,126 @@ class BaseDevice(object):
         self._conn = conn
         self._logger.info("Connection is established")
 
+    async def open_channel(self):
+        """
+        Opening new interactive session over the SSH connection of this device
+
+        The session is prepared like a new connection, but without another SSH handshake and login.
+
+        :return: device object with its own session, prompt and terminal modes.
+                 Its disconnect closes only the session
+        """
+        if self._protocol != 'ssh':
+            raise ValueError("channels can be opened only over ssh")
+        self._logger.info("Opening new channel")
+        channel = self._clone()
+        channel._conn = await self._conn.open_shell()
+        await channel._session_preparation()
+        return channel
+
+    def _clone(self):
+        """ copy of the device with its own terminal modes """
+        clone = copy.copy(self)
+        copies = {}
+        for name, value in vars(self).items():
+            if getattr(value, "device", None) is self:
+                value_copy = copy.copy(value)
+                value_copy.device = clone
+                copies[id(value)] = value_copy
+                setattr(clone, name, value_copy)
+        for value_copy in copies.values():
+            parent = getattr(value_copy, "_parent", None)
+            if parent is not None and id(parent) in copies:
+                value_copy._parent = copies[id(parent)]
+        clone.current_terminal = None
+        clone._last_prompt = None
+        return clone
+
     async def _session_preparation(self):
         """ Prepare session before start using it """
         await self._flush_buffer()
         await self._set_base_prompt()
 
+    async def _fast_session_preparation(self):
+        """
+        Prepare session with the profile cached by the previous sessions
+
+        If the first prompt is the same as the cached one, the prompt isn't searched again and the setup
+        commands are sent in one write. Otherwise the session is prepared as usual and the profile is cached.
+        """
+        cache_key = self._cache_key
+        profile = self._host_cache.get(cache_key, "profile")
+        output = await self._flush_buffer()
+        login_prompt = output.strip().split("\n")[-1].strip()
+        if profile and self._profile_matches(profile, login_prompt):
+            self._logger.info("Preparing session with cached profile")
+            await self._restore_profile(profile)
+            await self._send_setup_commands()
+            return
+
+        self._logger.info("Cached profile doesn't match, preparing session")
+        # the buffer is flushed already, full preparation needs a new prompt for flushing
+        await self.send_new_line(dont_read=True)
+        await self._session_preparation()
+        profile = self._make_profile(login_prompt)
+        if profile is not None:
+            self._host_cache.set(cache_key, "profile", profile)
+        else:
+            self._logger.warning("Session profile can't be cached, base pattern or login prompt wasn't found")
+
+    @property
+    def _cache_key(self):
+        """ key of the device in the host cache """
+        return "%s:%s" % (self.host, self._port)
+
+    def _profile_matches(self, profile, login_prompt):
+        """ check if the cached profile belongs to this session, profile without base pattern is never used """
+        return (bool(profile.get("base_pattern")) and
+                profile.get("device_type") == self._device_type and
+                profile.get("username") == self._username and
+                profile.get("login_prompt") == login_prompt)
+
+    def _make_profile(self, login_prompt):
+        """ session profile for caching, None if the prompt can't be cached """
+        if not self._conn._base_pattern or not login_prompt:
+            return None
+        return {
+            "device_type": self._device_type,
+            "username": self._username,
+            "login_prompt": login_prompt,
+            "base_prompt": self._conn._base_prompt,
+            "base_pattern": self._conn._base_pattern,
+            "device_prompt": self.device_prompt,
+            "prompt_pattern": self.prompt_pattern,
+        }
+
+    async def _restore_profile(self, profile):
+        """ restore prompts from the cached profile """
+        self.device_prompt = profile["device_prompt"]
+        self.prompt_pattern = profile["prompt_pattern"]
+        self._conn.set_base_prompt(profile["base_prompt"])
+        self._conn.set_base_pattern(profile["base_pattern"])
+        self._track_prompt(profile["login_prompt"])
+
+    def _setup_commands(self):
+        """ commands for setting up the terminal, which are sent in one write by fast preparation """
+        return []
+
+    async def _send_setup_commands(self):
+        """ send setup commands in one write """
+        commands = self._setup_commands()
+        if commands:
+            self._logger.info("Sending setup commands: %s" % commands)
+            await self._send_pipelined(commands, len(commands))
+
     async def _flush_buffer(self):
-        """ flush unnecessary data """
+        """ flush unnecessary data, return the flushed output """
         self._logger.debug("Flushing buffers")
 
         delimiters = map(re.escape, type(self)._delimiter_list)
         delimiters = r"|".join(delimiters)
         # await self.send_new_line(pattern=delimiters)
-        await self._conn.read_until_pattern(delimiters)
+        return await self._conn.read_until_pattern(delimiters)
 
     async def _set_base_prompt(self):
         """
@@ -275,6 +453,36 @@ class BaseDevice(object):
             raise ValueError("unable to find base_pattern")
         self.prompt_pattern = base_pattern
         self._conn.set_base_pattern(base_pattern)
+        self._track_prompt(prompt)
+
+    @property
+    def last_prompt(self):
+        """ prompt observed at the end of the last read, None if the output didn't end with a prompt """
+        return self._last_prompt
+
+    def _track_prompt(self, output):
+        """ remember the prompt at the end of the output and derive the current terminal mode from it """
+        self._last_prompt = None
+        pattern = self._conn._base_pattern
+        if not pattern:
+            return
+        last_line = output[max(output.rfind("\n"), output.rfind("\r")) + 1:]
+        if self._ansi_escape_codes:
+            last_line = self._strip_ansi_escape_codes(last_line)
+        match = re.search(pattern, last_line)
+        if match is None or last_line[match.end():].strip():
+            return
+        self._last_prompt = last_line.strip()
+        if type(self)._terminal_modes:
+            self.current_terminal = self._terminal_from_prompt(self._last_prompt)
+
+    def _terminal_from_prompt(self, prompt):
+        """ the most nested terminal mode matching the prompt, None if no mode matches """
+        modes = [getattr(self, name) for name in type(self)._terminal_modes]
+        modes = [mode for mode in modes if mode.match(prompt)]
+        if not modes:
+            return None
+        return max(modes, key=lambda mode: len(mode.path))
 
     async def _find_prompt(self):
         """Finds the current network device prompt, last line only"""
@@ -295,17 +503,21 @@ class BaseDevice(object):
 
     async def send_command_timing(self,
                                   command_string,
-                                  read_for_seconds=2):
+                                  read_for_seconds=2,
+                                  idle_gap=None):
         """
         send command and keep reading for the specified time in wait or until_prompt
         :param command_string: command
         :type command_string: str
-        :param read_for_seconds: seconds of reading
+        :param read_for_seconds: seconds of silence of the channel, after which the output is returned
         :type read_for_seconds: int
+        :param idle_gap: stop reading once the channel was silent for these seconds after the output started
+                         (ex: 0.15), 'auto' learns the gap from the chunk timings of this connection
+        :type idle_gap: float or str
         :return: command output
         """
 
-        output = await self.send_command_expect(command_string, read_for=read_for_seconds)
+        output = await self.send_command_expect(command_string, read_for=read_for_seconds, idle_gap=idle_gap)
         return output
 
     async def send_command(
@@ -315,7 +527,11 @@ class BaseDevice(object):
             re_flags=0,
             strip_command=True,
             strip_prompt=True,
-            use_textfsm=False
+            use_textfsm=False,
+            timeout=None,
+            sink=None,
+            sink_compression=None,
+            sink_raw=False
     ):
         """
         Sending command to device (support interactive commands with pattern)
@@ -328,8 +544,19 @@ class BaseDevice(object):
         :param use_textfsm: True or False for parsing output with textfsm templates
                             download templates from https://github.com/networktocode/ntc-templates
                             and set  NET_TEXTFSM environment to pint to ./ntc-templates/templates
-        :return: The output of the command
+        :param timeout: deadline in seconds for reading the whole output, default is the connection timeout
+        :param sink: path or file object. If set, the output is streamed to it instead of being returned
+        :param sink_compression: compression of the sink: None, 'gzip' or 'zstd' (requires zstandard)
+        :param bool sink_raw: write output to sink as it was received, without normalizing and stripping
+        :return: The output of the command, or :class:`SpooledOutput <aionet.spool.SpooledOutput>` handle
+                 with size, sha256 and reader of the output if sink is set
         """
+        if sink is not None:
+            if use_textfsm:
+                raise ValueError("use_textfsm can't be used together with sink")
+            return await self._spool_command(command_string, sink, sink_compression, sink_raw,
+                                             pattern, re_flags, strip_command, strip_prompt, timeout)
+
         self._logger.info("Sending command")
 
         command_string = self._normalize_cmd(command_string)
@@ -337,32 +564,268 @@ class BaseDevice(object):
             "Send command: %s" % repr(command_string)
         )
 
-        output = await self.send_command_expect(command_string, pattern, re_flags)
+        output = await self.send_command_expect(command_string, pattern, re_flags, timeout=timeout)
+        output = await self._process_output_async(command_string, output, strip_command, strip_prompt,
+                                                  use_textfsm)
+
+        logger.debug(
+            "Host %s: Send command output: %s" % (self.host, repr(output))
+        )
+        return output
+
+    async def send_commands(
+            self,
+            commands,
+            parse=False,
+            strip_command=True,
+            strip_prompt=True,
+            window=None,
+            timeout=None
+    ):
+        """
+        Sending several commands to device in pipeline
+
+        Commands are written without waiting for the prompt after every one, and the output is split back
+        to the commands by the prompts, so the whole list costs about one round trip instead of one per command.
+        Interactive commands (with confirmation questions) can't be pipelined.
+
+        :param list commands: list of commands for executing basically in privilege mode
+        :param parse: True or False for parsing outputs with textfsm templates (see use_textfsm of send_command)
+        :param bool strip_command: True or False for stripping command from output
+        :param bool strip_prompt: True or False for stripping ending device prompt
+        :param int window: number of commands written at once, default is all of them
+        :param timeout: timeout in seconds for reading the outputs of one window, default is the connection timeout
+        :return: OrderedDict of command to its output. If a command is repeated, the last output is kept
+        """
+        self._logger.info("Sending %d commands" % len(commands))
+        if not commands:
+            return OrderedDict()
+        commands = [self._normalize_cmd(command) for command in commands]
+        outputs = await self._send_pipelined(commands, window or len(commands), timeout=timeout)
+
+        results = OrderedDict()
+        for command, output in zip(commands, outputs):
+            output = await self._process_output_async(command, output, strip_command, strip_prompt, parse)
+            results[command.rstrip("\n")] = output
+        logger.debug(
+            "Host %s: Send commands output: %s" % (self.host, repr(results))
+        )
+        return results
+
+    async def send_command_exec(self, command_string, timeout=None):
+        """
+        Executing command on its own SSH exec channel
+
+        The command doesn't go through the interactive session, so it needs no prompt detection and paging
+        handling, and several commands can run at once over the same connection.
+
+        :param str command_string: command for executing
+        :param timeout: timeout in seconds for the command, default is the connection timeout
+        :return: :class:`ExecResult <aionet.connections.ExecResult>` with stdout, stderr and exit_status
+        """
+        if not type(self)._exec_supported:
+            raise NotImplementedError("exec channels aren't supported for %s" % self._device_type)
+        if self._protocol != 'ssh':
+            raise ValueError("exec channels are supported only over ssh")
+        self._logger.info("Executing command %r" % command_string)
+        result = await self._conn.run(command_string, timeout=timeout)
+        logger.debug(
+            "Host %s: Exec command result: %s" % (self.host, repr(result))
+        )
+        return result
+
+    async def send_commands_exec(self, commands, timeout=None):
+        """
+        Executing commands concurrently on SSH exec channels, at most max_exec_channels at once
+
+        :param list commands: list of commands for executing
+        :param timeout: timeout in seconds for every command, default is the connection timeout
+        :return: OrderedDict of command to its :class:`ExecResult <aionet.connections.ExecResult>`
+        """
+        results = await asyncio.gather(*[self.send_command_exec(command, timeout=timeout) for command in commands])
+        return OrderedDict(zip(commands, results))
 
+    def _process_output(self, command_string, output, strip_command, strip_prompt, use_textfsm=False):
+        """ normalize the raw output of the command, strip the command and prompt and parse it if needed """
+        if strip_prompt:
+            self._logger.info("Stripping prompt")
+        if use_textfsm:
+            self._logger.info("parsing output using texfsm, command=%r," % command_string)
+        return self._process_text(command_string, output, strip_command, strip_prompt, use_textfsm,
+                                  self._ansi_escape_codes, self._conn._base_prompt, self._device_type)
+
+    async def _process_output_async(self, command_string, output, strip_command, strip_prompt, use_textfsm=False):
+        """ _process_output, which runs in the offload executor for outputs above offload_threshold """
+        if self._offload_executor is None or len(output) < self._offload_threshold:
+            return self._process_output(command_string, output, strip_command, strip_prompt, use_textfsm)
+        self._logger.info("Offloading processing of %d characters of output" % len(output))
+        return await offload.run(self._offload_executor, type(self)._process_text, command_string, output,
+                                 strip_command, strip_prompt, use_textfsm, self._ansi_escape_codes,
+                                 self._conn._base_prompt, self._device_type)
+
+    @classmethod
+    def _process_text(cls, command_string, output, strip_command, strip_prompt, use_textfsm, ansi_escape_codes,
+                      base_prompt, device_type):
+        """ processing of _process_output without the session, so it can run in another thread or process """
         # Some platforms have ansi_escape codes
-        if self._ansi_escape_codes:
-            output = self._strip_ansi_escape_codes(output)
-        output = self._normalize_linefeeds(output)
+        if ansi_escape_codes:
+            output = cls._strip_ansi_escape_codes(output)
+        output = cls._normalize_linefeeds(output)
         if strip_prompt:
-            output = self._strip_prompt(output)
+            output = cls._strip_base_prompt(output, base_prompt)
         if strip_command:
-            output = self._strip_command(command_string, output)
+            output = cls._strip_command(command_string, output)
 
         if use_textfsm:
-            self._logger.info("parsing output using texfsm, command=%r," % command_string)
-            output = utils.get_structured_data(output, self._device_type, command_string)
+            output = utils.get_structured_data(output, device_type, command_string)
+        return output
 
-        logger.debug(
-            "Host %s: Send command output: %s" % (self.host, repr(output))
+    async def send_command_stream(
+            self,
+            command_string,
+            pattern="",
+            re_flags=0,
+            strip_command=True,
+            strip_prompt=True,
+            lines=True,
+            timeout=None
+    ):
+        """
+        Sending command to device and yielding the output while it arrives
+
+        Output is normalized like in send_command, but only complete lines are yielded, so memory usage
+        doesn't depend on the output size. With strip_command the linefeed left after the command echo
+        isn't yielded, so the first line isn't empty. Usage::
+
+            async for line in device.send_command_stream("show logging"):
+                print(line)
+
+        :param str command_string: command for executing basically in privilege mode
+        :param str pattern: pattern for waiting in output (for interactive commands)
+        :param re.flags re_flags: re flags for pattern
+        :param bool strip_command: True or False for stripping command from output
+        :param bool strip_prompt: True or False for stripping ending device prompt
+        :param bool lines: if True yield line by line (without linefeed), else yield chunks of lines
+        :param timeout: deadline in seconds for reading the whole output, default is the connection timeout
+        """
+        self._logger.info("Streaming command")
+
+        command_string = self._normalize_cmd(command_string)
+        self._logger.debug(
+            "Stream command: %s" % repr(command_string)
         )
-        return output
+        self._conn.send(command_string)
+        if pattern:
+            chunks = self._conn.iter_until_prompt_or_pattern(pattern, re_flags, timeout=timeout)
+        else:
+            chunks = self._conn.iter_until_prompt(timeout=timeout)
+
+        pending = ""  # raw data, which can't be normalized yet
+        text = ""  # normalized data, which isn't yielded yet
+        tail = ""  # end of the raw data for tracking the prompt
+        strip_echo = strip_command
+        # linefeed left by the echo (ex: blank line before the output)
+        strip_linefeed = strip_command
+        started = False
+        self._last_prompt = None
+        async for chunk in chunks:
+            tail = (tail + chunk)[-self._conn._MATCH_WINDOW:]
+            pending += chunk
+            # linefeeds and escape codes may be split between chunks, keep them for the next one
+            cut = len(pending.rstrip("\r\n"))
+            if self._ansi_escape_codes:
+                escape = pending.rfind(chr(27), max(cut - 16, 0), cut)
+                if escape != -1:
+                    cut = escape
+            ready, pending = pending[:cut], pending[cut:]
+            if self._ansi_escape_codes:
+                ready = self._strip_ansi_escape_codes(ready)
+            text += self._normalize_linefeeds(ready)
+
+            if strip_echo:
+                if "\n" not in text:
+                    continue
+                text = self._strip_command(command_string, text)
+                strip_echo = False
+            if strip_linefeed and text:
+                text = self._strip_leading_linefeed(text)
+                strip_linefeed = False
+
+            # the last line can be the prompt, so it's kept until the end of the output
+            end = text.rfind("\n")
+            if end == -1:
+                continue
+            complete, text = text[:end], text[end:]
+            for item in self._stream_items(complete, lines, started):
+                yield item
+            started = True
+
+        self._track_prompt(tail)
+        if self._ansi_escape_codes:
+            pending = self._strip_ansi_escape_codes(pending)
+        text += self._normalize_linefeeds(pending)
+        if strip_echo:
+            text = self._strip_command(command_string, text)
+        if strip_linefeed:
+            text = self._strip_leading_linefeed(text)
+        if strip_prompt:
+            text = self._strip_prompt(text)
+        if text:
+            for item in self._stream_items(text, lines, started):
+                yield item
+
+    @staticmethod
+    def _strip_leading_linefeed(text):
+        return text[1:] if text.startswith("\n") else text
+
+    @staticmethod
+    def _stream_items(text, lines, started):
+        """ split streamed text to items, every text except the first one starts with linefeed """
+        if not lines:
+            return [text] if text else []
+        text_lines = text.split("\n")
+        if started:
+            return text_lines[1:]
+        return text_lines
+
+    async def _spool_command(self, command_string, sink, compression, raw,
+                             pattern, re_flags, strip_command, strip_prompt, timeout):
+        """ Stream command output to sink, return handle of the spooled output """
+        self._logger.info("Spooling command output to %r" % sink)
+        writer = spool.SpoolWriter(sink, compression)
+        try:
+            if raw:
+                self._last_prompt = None
+                self._conn.send(self._normalize_cmd(command_string))
+                if pattern:
+                    chunks = self._conn.iter_until_prompt_or_pattern(pattern, re_flags, timeout=timeout)
+                else:
+                    chunks = self._conn.iter_until_prompt(timeout=timeout)
+            else:
+                chunks = self.send_command_stream(command_string, pattern, re_flags, strip_command, strip_prompt,
+                                                  lines=False, timeout=timeout)
+            tail = ""
+            async for chunk in chunks:
+                tail = (tail + chunk)[-self._conn._MATCH_WINDOW:]
+                writer.write(chunk)
+            if raw:
+                self._track_prompt(tail)
+        finally:
+            handle = writer.close()
+        self._logger.debug("Spooled output: %r" % handle)
+        return handle
 
     def _strip_prompt(self, a_string):
         """Strip the trailing router prompt from the output"""
         self._logger.info("Stripping prompt")
+        return self._strip_base_prompt(a_string, self._conn._base_prompt)
+
+    @staticmethod
+    def _strip_base_prompt(a_string, base_prompt):
+        """Strip the last line of the output, if it has the base prompt"""
         response_list = a_string.split("\n")
         last_line = response_list[-1]
-        if self._conn._base_prompt in last_line:
+        if base_prompt in last_line:
             return "\n".join(response_list[:-1])
         else:
             return a_string
@@ -412,26 +875,38 @@ class BaseDevice(object):
     async def send_command_expect(self, command,
                                   pattern='',
                                   re_flags=0, dont_read=False,
-                                  read_for=0):
+                                  read_for=0, timeout=None, idle_gap=None):
         """ Send a single line of command and readuntil prompte"""
-        self._conn.send(self._normalize_cmd(command))
+        command = self._normalize_cmd(command)
+        self._conn.send(command)
+        self._last_prompt = None
         if dont_read:
             return ''
+        # idle detection starts after the echo of the command, echo can end with '\r\n' or '\r\r\n'
+        idle_after = len(command) + 2
         if pattern:
-            output = await self._conn.read_until_prompt_or_pattern(pattern, re_flags, read_for=read_for)
+            output = await self._conn.read_until_prompt_or_pattern(pattern, re_flags, read_for=read_for,
+                                                                   timeout=timeout, idle_gap=idle_gap,
+                                                                   idle_after=idle_after)
 
         else:
-            output = await self._conn.read_until_prompt(read_for=read_for)
+            output = await self._conn.read_until_prompt(read_for=read_for, timeout=timeout, idle_gap=idle_gap,
+                                                        idle_after=idle_after)
 
+        self._track_prompt(output)
         return output
 
-    async def send_config_set(self, config_commands=None):
+    async def send_config_set(self, config_commands=None, pipeline=0):
         """
         Sending configuration commands to device
 
         The commands will be executed one after the other.
 
         :param list config_commands: iterable string list with commands for applying to network device
+        :param int pipeline: number of commands written at once without waiting for the prompt after every one.
+                             0 disables pipelining. In pipelined mode all commands are sent even if one of them
+                             fails, and AionetConfigError with the failed commands is raised at the end.
+                             Interactive commands (with confirmation questions) can't be pipelined
         :return: The output of this commands
         """
         self._logger.info("Sending configuration settings")
@@ -442,9 +917,13 @@ class BaseDevice(object):
         # Send config commands
         self._logger.debug("Config commands: %s" % config_commands)
         config_commands = ['\n'] + config_commands  # to get ride of unwanted messages.
-        output = ""
-        for cmd in config_commands:
-            output += await self.send_command_expect(cmd)
+        if pipeline:
+            outputs = await self._send_pipelined(config_commands, pipeline)
+            output = "".join(outputs)
+        else:
+            output = ""
+            for cmd in config_commands:
+                output += await self.send_command_expect(cmd)
 
         if self._ansi_escape_codes:
             output = self._strip_ansi_escape_codes(output)
@@ -453,8 +932,170 @@ class BaseDevice(object):
         self._logger.debug(
             "Config commands output: %s" % repr(output)
         )
+        if pipeline:
+            self._check_config_errors(config_commands[1:], outputs[1:])
+        return output
+
+    async def _send_pipelined(self, commands, window, timeout=None):
+        """
+        Send commands in windows without waiting for the prompt after every command
+
+        The output of every window is split back to the commands by the prompts, so every item of the
+        result is the echo, the output and the prompt of one command. Devices can echo the typed ahead
+        commands at once, before the output of the first one, so echo lines are moved to their commands.
+
+        :param list commands: list of commands
+        :param int window: number of commands written at once
+        :return: list of raw outputs, one for each command
+        """
+        if not self._conn._base_pattern:
+            # the prompts can't be counted without the pattern
+            self._logger.warning("Base pattern isn't set, sending %d commands one by one" % len(commands))
+            return [await self.send_command_expect(cmd, timeout=timeout) for cmd in commands]
+        self._logger.info("Sending %d commands in pipeline, window=%d" % (len(commands), window))
+        outputs = []
+        for index in range(0, len(commands), window):
+            batch = commands[index:index + window]
+            self._conn.send("".join(self._normalize_cmd(cmd) for cmd in batch))
+            self._last_prompt = None
+            await self._conn.drain()
+            output, prompt_ends = await self._conn.read_prompts(len(batch), timeout=timeout)
+            self._track_prompt(output)
+            outputs.extend(self._split_pipelined(batch, output, prompt_ends))
+        return outputs
+
+    @staticmethod
+    def _split_pipelined(commands, output, prompt_ends):
+        """
+        split the output of pipelined commands by the prompts, the echo of every command is moved to its output
+
+        Echo of a command is the first whole line equal to the command after the echo of the previous one
+        and before the prompt of the command, it starts at the beginning of a line or right after a prompt.
+        Commands without found echo (ex: empty ones) keep the output between the prompts as it is.
+        """
+        echoes = []
+        cursor = 0
+        for command, prompt_end in zip(commands, prompt_ends):
+            echo = command.rstrip("\n")
+            span = None
+            position = output.find(echo, cursor, prompt_end) if echo else -1
+            while position != -1:
+                end = position + len(echo)
+                line_end = end
+                while line_end < len(output) and output[line_end] == "\r":
+                    line_end += 1
+                at_line_start = position == 0 or output[position - 1] in "\r\n" or position in prompt_ends
+                if at_line_start and (line_end == len(output) or output[line_end] == "\n"):
+                    span = (position, min(line_end + 1, len(output)))
+                    cursor = span[1]
+                    break
+                position = output.find(echo, position + 1, prompt_end)
+            echoes.append(span)
+
+        spans = [span for span in echoes if span is not None]
+        outputs = []
+        start = 0
+        for index, end in enumerate(prompt_ends):
+            if index == len(prompt_ends) - 1:
+                # everything after the last prompt belongs to the last command
+                end = len(output)
+            span = echoes[index]
+            parts = [output[span[0]:span[1]]] if span is not None else []
+            position = start
+            for span in spans:
+                if start <= span[0] < end:
+                    parts.append(output[position:span[0]])
+                    position = span[1]
+            parts.append(output[position:end])
+            outputs.append("".join(parts))
+            start = end
+        return outputs
+
+    def _check_config_errors(self, commands, outputs):
+        """ raise AionetConfigError if output of any command matches the config error pattern """
+        error_pattern = type(self)._config_error_pattern
+        if not error_pattern:
+            return
+        errors = []
+        for command, output in zip(commands, outputs):
+            match = re.search(error_pattern, output, flags=re.M)
+            if match:
+                line = output[match.start():].split("\n", 1)[0].strip()
+                errors.append((command, line))
+        if errors:
+            reason = "; ".join("%r: %s" % error for error in errors)
+            raise AionetConfigError(self.host, None, reason, errors=errors)
+
+    async def send_config_file(self, config, remote_path=None, transfer=None, timeout=None):
+        """
+        Uploading configuration file to device and merging it with the running configuration
+
+        The configuration is copied over the established SSH connection and applied by the device with a single
+        command, which is much faster for big configurations than sending them line by line.
+
+        :param config: configuration text or list of configuration commands
+        :param str remote_path: path of the file on the device, default is platform specific
+        :param str transfer: file transfer protocol 'sftp' or 'scp', default is platform specific
+        :param timeout: timeout in seconds for applying the configuration, default is the connection timeout
+        :return: The output of applying the configuration
+        :raises AionetConfigError: if the device reported errors for some lines of the configuration
+        """
+        load_command = type(self)._config_file_load_command
+        if not load_command:
+            raise NotImplementedError("send_config_file isn't supported for %s" % self._device_type)
+        remote_path = await self._upload_config_file(config, remote_path, transfer)
+        output = await self.send_command_expect(load_command.format(path=remote_path), timeout=timeout)
+        output = self._normalize_config_file_output(output)
+        self._check_config_file_errors(output)
+        return output
+
+    async def _upload_config_file(self, config, remote_path=None, transfer=None):
+        """ upload configuration text or list of commands to the device, return the path of the file """
+        if self._protocol != 'ssh':
+            raise ValueError("configuration files can be uploaded only over ssh")
+        remote_path = remote_path or type(self)._config_file_path
+        if not remote_path:
+            raise ValueError("remote_path must be set for %s" % self._device_type)
+        if not isinstance(config, str):
+            config = "\n".join(config)
+        config = self._normalize_cmd(config)
+        await self._conn.upload(config.encode(), remote_path, transfer or type(self)._config_file_transfer)
+        return remote_path
+
+    def _normalize_config_file_output(self, output):
+        """ normalize output of applying configuration file """
+        if self._ansi_escape_codes:
+            output = self._strip_ansi_escape_codes(output)
+        output = self._normalize_linefeeds(output)
+        self._logger.debug("Config file output: %s" % repr(output))
         return output
 
+    def _config_file_errors(self, output):
+        """
+        Find errors in the report of applying configuration file
+
+        :return: list of (line, error) tuples, line is the last configuration line printed before the error
+        """
+        error_pattern = type(self)._config_error_pattern
+        errors = []
+        if not error_pattern:
+            return errors
+        line = ""
+        for output_line in output.split("\n"):
+            output_line = output_line.strip()
+            if re.search(error_pattern, output_line):
+                errors.append((line, output_line))
+            elif output_line and not output_line.startswith("^"):
+                line = output_line
+        return errors
+
+    def _check_config_file_errors(self, output):
+        """ raise AionetConfigError if the device reported errors while applying configuration file """
+        errors = self._config_file_errors(output)
+        if errors:
+            reason = "; ".join("%r: %s" % error for error in errors)
+            raise AionetConfigError(self.host, None, reason, errors=errors)
+
     @staticmethod
     def _strip_ansi_escape_codes(string_buffer):
         return utils.strip_ansi_escape_codes(string_buffer)
@@ -6,6 +6,7 @@ Connection Method are based upon AsyncSSH and should be running in asyncio loop
 
 import re
 
+from aionet.exceptions import AionetConfigError
 from aionet.vendors.terminal_modes.hp import SystemView
 from aionet.vendors.devices.base import BaseDevice
 
@@ -31,6 +32,9 @@ class BaseComwareDevice(BaseDevice):
             device=self
         )
 
+    _terminal_modes = ("system_view",)
+    """Names of terminal mode attributes. The current terminal mode is derived from the prompt by them"""
+
     _delimiter_list = [">", "]"]
     """All this characters will stop reading from buffer. It mean the end of device prompt"""
 
@@ -52,11 +56,32 @@ class BaseComwareDevice(BaseDevice):
     _system_view_check = "]"
     """Checking string in prompt. If it's exist im prompt - we are in system view"""
 
+    _config_error_pattern = r"^\s*% ?(Unrecognized|Incomplete|Wrong|Too many|Ambiguous)"
+    """Pattern for finding errors in the output of configuration commands"""
+
+    _config_file_path = "flash:/aionet.cfg"
+    """Path of the file on the device, which is used by send_config_file"""
+
+    _config_file_transfer = "sftp"
+    """File transfer protocol for uploading configuration files (sftp or scp)"""
+
+    _config_file_load_command = "execute {path}"
+    """Command for executing configuration file as batch of commands in system view"""
+
     async def _session_preparation(self):
         """ Prepare Session """
         await super()._session_preparation()
         await self._disable_paging()
 
+    def _setup_commands(self):
+        return [type(self)._disable_paging_command]
+
+    async def _disable_paging(self):
+        """ disable terminal pagination """
+        self._logger.info(
+            "Disabling Pagination, command = %r" % type(self)._disable_paging_command)
+        await self.send_command_expect(type(self)._disable_paging_command)
+
     async def _set_base_prompt(self):
         """
         Setting two important vars
@@ -82,15 +107,21 @@ class BaseComwareDevice(BaseDevice):
         )
         self._logger.debug("Base Prompt: %s" % self._base_prompt)
         self._logger.debug("Base Pattern: %s" % self._base_pattern)
+        self.device_prompt = self._base_prompt
+        self.prompt_pattern = self._base_pattern
+        self._conn.set_base_prompt(self._base_prompt)
+        self._conn.set_base_pattern(self._base_pattern)
+        self._track_prompt(prompt)
         return self._base_prompt
 
-    async def send_config_set(self, config_commands=None, exit_system_view=False):
+    async def send_config_set(self, config_commands=None, exit_system_view=False, pipeline=0):
         """
         Sending configuration commands to device
         Automatically exits/enters system-view.
 
         :param list config_commands: iterable string list with commands for applying to network devices in system view
         :param bool exit_system_view: If true it will quit from system view automatically
+        :param int pipeline: number of commands written at once without waiting for the prompt, 0 disables it
         :return: The output of this commands
         """
 
@@ -99,7 +130,12 @@ class BaseComwareDevice(BaseDevice):
 
         # Send config commands
         output = await self.system_view()
-        output += await super().send_config_set(config_commands=config_commands)
+        try:
+            output += await super().send_config_set(config_commands=config_commands, pipeline=pipeline)
+        except AionetConfigError:
+            if exit_system_view:
+                await self.system_view.exit()
+            raise
 
         if exit_system_view:
             output += await self.system_view.exit()
@@ -107,3 +143,27 @@ class BaseComwareDevice(BaseDevice):
         output = self._normalize_linefeeds(output)
         self._logger.debug("Config commands output: %s" % repr(output))
         return output
+
+    async def send_config_file(self, config, remote_path=None, transfer=None, exit_system_view=False, timeout=None):
+        """
+        Uploading configuration file to device and executing it in system view
+
+        :param config: configuration text or list of configuration commands
+        :param str remote_path: path of the file on the device, default is flash:/aionet.cfg
+        :param str transfer: file transfer protocol 'sftp' or 'scp', default is sftp
+        :param bool exit_system_view: If true it will quit from system view automatically
+        :param timeout: timeout in seconds for executing the configuration, default is the connection timeout
+        :return: The output of executing the configuration
+        :raises AionetConfigError: if the device reported errors for some lines of the configuration
+        """
+        remote_path = await self._upload_config_file(config, remote_path, transfer)
+        output = await self.system_view()
+        load = type(self)._config_file_load_command.format(path=remote_path)
+        output += await self.send_command_expect(load, timeout=timeout)
+
+        if exit_system_view:
+            output += await self.system_view.exit()
+
+        output = self._normalize_config_file_output(output)
+        self._check_config_file_errors(output)
+        return output
@@ -4,6 +4,9 @@ IOSLikeDevice Class is abstract class for using in Cisco IOS like devices
 Connection Method are based upon AsyncSSH and should be running in asyncio loop
 """
 
+import re
+
+from aionet.exceptions import AionetConfigError
 from aionet.vendors.devices.base import BaseDevice
 from aionet.vendors.terminal_modes.cisco import EnableMode, ConfigMode
 
@@ -55,6 +58,9 @@ class BaseIOSDevice(BaseDevice):
             parent=self.enable_mode
         )
 
+    _terminal_modes = ("enable_mode", "config_mode")
+    """Names of terminal mode attributes. The current terminal mode is derived from the prompt by them"""
+
     _priv_enter = "enable"
     """Command for entering to privilege exec"""
 
@@ -79,12 +85,34 @@ class BaseIOSDevice(BaseDevice):
     _disable_width_command = "terminal width 511"
     """Command for disabling paging"""
 
+    _config_error_pattern = r"^\s*% ?(Invalid|Incomplete|Ambiguous|Unknown|Unrecognized|Bad|Error)"
+    """Pattern for finding errors in the output of configuration commands"""
+
+    _config_file_path = "flash:aionet.cfg"
+    """Path of the file on the device, which is used by send_config_file"""
+
+    _config_file_load_command = "copy {path} running-config"
+    """Command for merging configuration file with the running configuration"""
+
+    _config_file_replace_command = "configure replace {path} force"
+    """Command for replacing the running configuration with configuration file"""
+
+    _config_file_confirm_pattern = r"\[running-config\]\?"
+    """Confirmation question of the copy command"""
+
     async def _session_preparation(self):
         await super()._session_preparation()
         await self.enable_mode()
         await self._disable_paging()
         await self._disable_width()
 
+    async def _restore_profile(self, profile):
+        await super()._restore_profile(profile)
+        await self.enable_mode()
+
+    def _setup_commands(self):
+        return [type(self)._disable_paging_command, type(self)._disable_width_command]
+
     async def _disable_paging(self):
         """ disable terminal pagination """
         self._logger.info(
@@ -97,13 +125,14 @@ class BaseIOSDevice(BaseDevice):
             "Disabling width, command = %r" % type(self)._disable_width_command)
         await self.send_command_expect(type(self)._disable_width_command)
 
-    async def send_config_set(self, config_commands=None, exit_config_mode=True):
+    async def send_config_set(self, config_commands=None, exit_config_mode=True, pipeline=0):
         """
         Sending configuration commands to Cisco IOS like devices
         Automatically exits/enters configuration mode.
 
         :param list config_commands: iterable string list with commands for applying to network devices in conf mode
         :param bool exit_config_mode: If true it will quit from configuration mode automatically
+        :param int pipeline: number of commands written at once without waiting for the prompt, 0 disables it
         :return: The output of this commands
         """
 
@@ -113,7 +142,12 @@ class BaseIOSDevice(BaseDevice):
         # Send config commands
         await self.config_mode()
         output = ''
-        output += await super().send_config_set(config_commands=config_commands)
+        try:
+            output += await super().send_config_set(config_commands=config_commands, pipeline=pipeline)
+        except AionetConfigError:
+            if exit_config_mode:
+                await self.config_mode.exit()
+            raise
 
         if exit_config_mode:
             output += await self.config_mode.exit()
@@ -122,6 +156,36 @@ class BaseIOSDevice(BaseDevice):
 
         return output
 
+    async def send_config_file(self, config, remote_path=None, transfer=None, replace=False, timeout=None):
+        """
+        Uploading configuration file to Cisco IOS like devices and applying it from privilege exec
+
+        :param config: configuration text or list of configuration commands
+        :param str remote_path: path of the file on the device, default is platform specific
+        :param str transfer: file transfer protocol 'sftp' or 'scp', default is platform specific.
+                             SCP requires 'ip scp server enable' on the device
+        :param bool replace: if true the running configuration is replaced (configure replace) instead of merging
+        :param timeout: timeout in seconds for applying the configuration, default is the connection timeout
+        :return: The output of applying the configuration
+        :raises AionetConfigError: if the device reported errors for some lines of the configuration
+        """
+        remote_path = await self._upload_config_file(config, remote_path, transfer)
+        await self.config_mode.exit()
+        await self.enable_mode()
+        if replace:
+            command = type(self)._config_file_replace_command.format(path=remote_path)
+            output = await self.send_command_expect(command, timeout=timeout)
+        else:
+            command = type(self)._config_file_load_command.format(path=remote_path)
+            confirm_pattern = type(self)._config_file_confirm_pattern
+            output = await self.send_command_expect(command, pattern=confirm_pattern, timeout=timeout)
+            if re.search(confirm_pattern + r"\s*$", output):
+                output += await self.send_command_expect("", timeout=timeout)
+
+        output = self._normalize_config_file_output(output)
+        self._check_config_file_errors(output)
+        return output
+
     async def _cleanup(self):
         """ Any needed cleanup before closing connection """
         self._logger.info("Cleanup session")
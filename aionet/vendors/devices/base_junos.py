@@ -6,6 +6,7 @@ Connection Method are based upon AsyncSSH and should be running in asyncio loop
 
 import re
 
+from aionet.exceptions import AionetConfigError
 from aionet.vendors.terminal_modes.juniper import ConfigMode
 from aionet.vendors.devices.base import BaseDevice
 
@@ -29,11 +30,17 @@ class BAseJunOSDevice(BaseDevice):
         self.current_terminal = None  # State Machine for the current Terminal mode of the session
         self.config_mode = ConfigMode(
             enter_command=type(self)._config_enter,
-            exit_command=type(self)._config_check,
-            check_string=type(self)._config_exit,
+            exit_command=type(self)._config_exit,
+            check_string=type(self)._config_check,
             device=self
         )
 
+    _exec_supported = True
+    """Device accepts SSH exec requests, so commands can be executed without the interactive session"""
+
+    _terminal_modes = ("config_mode",)
+    """Names of terminal mode attributes. The current terminal mode is derived from the prompt by them"""
+
     _delimiter_list = ["%", ">", "#"]
     """All this characters will stop reading from buffer. It mean the end of device prompt"""
 
@@ -58,6 +65,27 @@ class BAseJunOSDevice(BaseDevice):
     _commit_comment_command = "commit comment {}"
     """Command for committing changes with comment"""
 
+    _config_error_pattern = r"^\s*(syntax error|unknown command|error:)"
+    """Pattern for finding errors in the output of configuration commands"""
+
+    _config_file_path = "/var/tmp/aionet.conf"
+    """Path of the file on the device, which is used by send_config_file"""
+
+    _config_file_transfer = "sftp"
+    """File transfer protocol for uploading configuration files (sftp or scp)"""
+
+    _config_file_load_command = "load merge {path}"
+    """Command for merging configuration file in curly brace format with the candidate configuration"""
+
+    _config_file_load_set_command = "load set {path}"
+    """Command for loading configuration file with set commands to the candidate configuration"""
+
+    _rollback_command = "rollback 0"
+    """Command for discarding the changes of the candidate configuration"""
+
+    _set_commands = ("set ", "delete ", "activate ", "deactivate ", "insert ", "rename ", "annotate ")
+    """Commands, which mean that the configuration is in set format"""
+
     async def _set_base_prompt(self):
         """
         Setting two important vars
@@ -90,6 +118,7 @@ class BAseJunOSDevice(BaseDevice):
             with_commit=True,
             commit_comment="",
             exit_config_mode=True,
+            pipeline=0,
     ):
         """
         Sending configuration commands to device
@@ -99,6 +128,8 @@ class BAseJunOSDevice(BaseDevice):
         :param bool with_commit: if true it commit all changes after applying all config_commands
         :param string commit_comment: message for configuration commit
         :param bool exit_config_mode: If true it will quit from configuration mode automatically
+        :param int pipeline: number of commands written at once without waiting for the prompt, 0 disables it.
+                             If any command fails, AionetConfigError is raised without commit
         :return: The output of these commands
         """
 
@@ -107,13 +138,16 @@ class BAseJunOSDevice(BaseDevice):
 
         # Send config commands
         output = await self.config_mode()
-        output += await super().send_config_set(config_commands=config_commands)
+        try:
+            output += await super().send_config_set(config_commands=config_commands, pipeline=pipeline)
+        except AionetConfigError:
+            # the candidate would be applied by the next commit
+            await self.send_command_expect(type(self)._rollback_command)
+            if exit_config_mode:
+                await self.config_mode.exit()
+            raise
         if with_commit:
-            commit = type(self)._commit_command
-            if commit_comment:
-                commit = type(self)._commit_comment_command.format(commit_comment)
-
-            output += await self.send_command_expect(commit)
+            output += await self._commit(commit_comment)
 
         if exit_config_mode:
             output += await self.config_mode.exit()
@@ -121,3 +155,71 @@ class BAseJunOSDevice(BaseDevice):
         self._logger.debug("Config commands output: %s" % repr(output))
 
         return output
+
+    async def send_config_file(
+            self,
+            config,
+            remote_path=None,
+            transfer=None,
+            with_commit=True,
+            commit_comment="",
+            exit_config_mode=True,
+            timeout=None,
+    ):
+        """
+        Uploading configuration file to device, loading it to the candidate configuration and committing it
+
+        Configuration in set format is loaded with 'load set', otherwise with 'load merge'.
+        If some lines fail to load, the candidate configuration is rolled back and AionetConfigError is raised.
+
+        :param config: configuration text or list of configuration commands
+        :param str remote_path: path of the file on the device, default is /var/tmp/aionet.conf
+        :param str transfer: file transfer protocol 'sftp' or 'scp', default is sftp
+        :param bool with_commit: if true it commit all changes after loading the file
+        :param string commit_comment: message for configuration commit
+        :param bool exit_config_mode: If true it will quit from configuration mode automatically
+        :param timeout: timeout in seconds for loading the configuration, default is the connection timeout
+        :return: The output of loading and committing the configuration
+        """
+        if self._is_set_format(config):
+            load = type(self)._config_file_load_set_command
+        else:
+            load = type(self)._config_file_load_command
+        remote_path = await self._upload_config_file(config, remote_path, transfer)
+        output = await self.config_mode()
+        output += await self.send_command_expect(load.format(path=remote_path), timeout=timeout)
+        output = self._normalize_config_file_output(output)
+        errors = self._config_file_errors(output)
+        if errors:
+            await self.send_command_expect(type(self)._rollback_command)
+            if exit_config_mode:
+                await self.config_mode.exit()
+            reason = "; ".join("%r: %s" % error for error in errors)
+            raise AionetConfigError(self.host, None, reason, errors=errors)
+
+        if with_commit:
+            output += await self._commit(commit_comment)
+
+        if exit_config_mode:
+            output += await self.config_mode.exit()
+
+        return output
+
+    async def _commit(self, commit_comment=""):
+        """ commit the candidate configuration """
+        commit = type(self)._commit_command
+        if commit_comment:
+            commit = type(self)._commit_comment_command.format(commit_comment)
+
+        return await self.send_command_expect(commit)
+
+    @classmethod
+    def _is_set_format(cls, config):
+        """ check if the first configuration line is a set command """
+        if isinstance(config, str):
+            config = config.splitlines()
+        for line in config:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                return line.startswith(cls._set_commands)
+        return False
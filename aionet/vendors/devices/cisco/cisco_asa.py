@@ -28,6 +28,9 @@ class CiscoASA(BaseIOSDevice):
 
     _disable_paging_command = "terminal pager 0"
 
+    _config_file_path = "disk0:aionet.cfg"
+    """Path of the file on the device, which is used by send_config_file"""
+
     @property
     def multiple_mode(self):
         """ Returning Bool True if ASA in multiple mode"""
@@ -37,6 +40,21 @@ class CiscoASA(BaseIOSDevice):
         await super()._session_preparation()
         await self._check_multiple_mode()
 
+    def _make_profile(self, login_prompt):
+        profile = super()._make_profile(login_prompt)
+        if profile is not None:
+            profile["multiple_mode"] = self._multiple_mode
+        return profile
+
+    async def _restore_profile(self, profile):
+        await super()._restore_profile(profile)
+        self._multiple_mode = profile.get("multiple_mode", False)
+
+    def _setup_commands(self):
+        # terminal width is configured in configuration mode
+        return [type(self)._disable_paging_command, type(self)._config_enter,
+                type(self)._disable_width_command, type(self)._config_exit]
+
     async def _disable_width(self):
         self._logger.info("setting terminal width to 511")
         await self.send_config_set([type(self)._disable_width_command])
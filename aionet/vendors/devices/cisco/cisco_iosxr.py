@@ -1,4 +1,4 @@
-from aionet.exceptions import AionetCommitError
+from aionet.exceptions import AionetCommitError, AionetConfigError
 from aionet.vendors.terminal_modes.cisco import IOSxrConfigMode
 from aionet.vendors.devices.base_ios import BaseIOSDevice
 
@@ -21,12 +21,24 @@ class CiscoIOSXR(BaseIOSDevice):
     _show_commit_changes = "show configuration commit changes"
     """Command for showing the other commit which have occurred during our session"""
 
+    _show_config_failed_load = "show configuration failed load"
+    """Command for showing the lines of configuration file which failed to load"""
+
+    _config_error_pattern = r"^\s*(!!)?% ?(Invalid|Incomplete|Ambiguous|Unknown|Unrecognized|Bad|Error)"
+    """Pattern for finding errors in the output of configuration commands"""
+
+    _config_file_path = "disk0:/aionet.cfg"
+    """Path of the file on the device, which is used by send_config_file"""
+
+    _config_file_load_command = "load {path}"
+    """Command for loading configuration file to the target configuration"""
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.config_mode = IOSxrConfigMode(
             enter_command=type(self)._config_enter,
-            exit_command=type(self)._config_check,
-            check_string=type(self)._config_exit,
+            exit_command=type(self)._config_exit,
+            check_string=type(self)._config_check,
             device=self,
             parent=self.enable_mode
         )
@@ -37,6 +49,7 @@ class CiscoIOSXR(BaseIOSDevice):
             with_commit=True,
             commit_comment="",
             exit_config_mode=True,
+            pipeline=0,
     ):
         """
         Sending configuration commands to device
@@ -46,6 +59,8 @@ class CiscoIOSXR(BaseIOSDevice):
         :param bool with_commit: if true it commit all changes after applying all config_commands
         :param string commit_comment: message for configuration commit
         :param bool exit_config_mode: If true it will quit from configuration mode automatically
+        :param int pipeline: number of commands written at once without waiting for the prompt, 0 disables it.
+                             If any command fails, AionetConfigError is raised without commit
         :return: The output of these commands
         """
 
@@ -54,27 +69,17 @@ class CiscoIOSXR(BaseIOSDevice):
 
         # Send config commands
         output = await self.config_mode()
-        output += await super(BaseIOSDevice, self).send_config_set(
-            config_commands=config_commands
-        )
-        if with_commit:
-            commit = type(self)._commit_command
-            if commit_comment:
-                commit = type(self)._commit_comment_command.format(commit_comment)
-
-            output += await self.send_command_expect(
-                commit,
-                pattern=r"Do you wish to proceed with this commit anyway\?"
+        try:
+            output += await super(BaseIOSDevice, self).send_config_set(
+                config_commands=config_commands, pipeline=pipeline
             )
-            if "Failed to commit" in output:
-                show_config_failed = type(self)._show_config_failed
-                reason = await self.send_command_expect(show_config_failed)
-                raise AionetCommitError(self.host, reason)
-            if "One or more commits have occurred" in output:
-                show_commit_changes = type(self)._show_commit_changes
-                await self.send_command_expect('no')
-                reason = await self.send_command_expect(show_commit_changes)
-                raise AionetCommitError(self.host, reason)
+        except AionetConfigError:
+            # the target configuration would be applied by the next commit, abort drops it and exits to enable
+            await self.send_command_expect(type(self)._abort_command)
+            self.current_terminal = self.enable_mode
+            raise
+        if with_commit:
+            output += await self._commit(commit_comment)
 
         if exit_config_mode:
             output += await self.config_mode.exit()
@@ -83,6 +88,73 @@ class CiscoIOSXR(BaseIOSDevice):
 
         return output
 
+    async def send_config_file(
+            self,
+            config,
+            remote_path=None,
+            transfer=None,
+            with_commit=True,
+            commit_comment="",
+            exit_config_mode=True,
+            timeout=None,
+    ):
+        """
+        Uploading configuration file to device, loading it to the target configuration and committing it
+
+        If some lines fail to load, the target configuration is aborted and the report of
+        'show configuration failed load' is raised with AionetConfigError.
+
+        :param config: configuration text or list of configuration commands
+        :param str remote_path: path of the file on the device, default is disk0:/aionet.cfg
+        :param str transfer: file transfer protocol 'sftp' or 'scp', default is scp
+        :param bool with_commit: if true it commit all changes after loading the file
+        :param string commit_comment: message for configuration commit
+        :param bool exit_config_mode: If true it will quit from configuration mode automatically
+        :param timeout: timeout in seconds for loading the configuration, default is the connection timeout
+        :return: The output of loading and committing the configuration
+        """
+        remote_path = await self._upload_config_file(config, remote_path, transfer)
+        output = await self.config_mode()
+        load = type(self)._config_file_load_command.format(path=remote_path)
+        output += await self.send_command_expect(load, timeout=timeout)
+        output = self._normalize_config_file_output(output)
+        if "Syntax/Authorization errors" in output:
+            report = await self.send_command_expect(type(self)._show_config_failed_load)
+            report = self._normalize_config_file_output(report)
+            await self.send_command_expect(type(self)._abort_command)
+            self.current_terminal = self.enable_mode
+            errors = self._config_file_errors(report)
+            raise AionetConfigError(self.host, None, report, errors=errors)
+
+        if with_commit:
+            output += await self._commit(commit_comment)
+
+        if exit_config_mode:
+            output += await self.config_mode.exit()
+
+        return output
+
+    async def _commit(self, commit_comment=""):
+        """ commit the target configuration, raise AionetCommitError if it fails """
+        commit = type(self)._commit_command
+        if commit_comment:
+            commit = type(self)._commit_comment_command.format(commit_comment)
+
+        output = await self.send_command_expect(
+            commit,
+            pattern=r"Do you wish to proceed with this commit anyway\?"
+        )
+        if "Failed to commit" in output:
+            show_config_failed = type(self)._show_config_failed
+            reason = await self.send_command_expect(show_config_failed)
+            raise AionetCommitError(self.host, reason)
+        if "One or more commits have occurred" in output:
+            show_commit_changes = type(self)._show_commit_changes
+            await self.send_command_expect('no')
+            reason = await self.send_command_expect(show_commit_changes)
+            raise AionetCommitError(self.host, reason)
+        return output
+
     async def _cleanup(self):
         """ Any needed cleanup before closing connection """
         abort = type(self)._abort_command
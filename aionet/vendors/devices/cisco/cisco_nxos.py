@@ -6,6 +6,12 @@ from aionet.vendors.devices.base_ios import BaseIOSDevice
 class CiscoNXOS(BaseIOSDevice):
     """Class for working with Cisco Nexus/NX-OS"""
 
+    _exec_supported = True
+    """Device accepts SSH exec requests, so commands can be executed without the interactive session"""
+
+    _config_file_path = "bootflash:aionet.cfg"
+    """Path of the file on the device, which is used by send_config_file"""
+
     @staticmethod
     def _normalize_linefeeds(a_string):
         """
@@ -39,3 +39,7 @@ class HPComwareLimited(BaseComwareDevice):
     async def _session_preparation(self):
         await self.cmdline_mode()
         await super()._session_preparation()
+
+    async def _restore_profile(self, profile):
+        await super()._restore_profile(profile)
+        await self.cmdline_mode()
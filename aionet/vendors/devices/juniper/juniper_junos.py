@@ -24,6 +24,9 @@ class JuniperJunOS(BAseJunOSDevice):
 
         )
 
+    _terminal_modes = ("cli_mode", "config_mode")
+    """Names of terminal mode attributes. The current terminal mode is derived from the prompt by them"""
+
     _cli_check = ">"
     """Checking string for shell mode"""
 
@@ -40,3 +43,7 @@ class JuniperJunOS(BAseJunOSDevice):
         await super()._session_preparation()
         await self.cli_mode()
 
+    async def _restore_profile(self, profile):
+        await super()._restore_profile(profile)
+        await self.cli_mode()
+
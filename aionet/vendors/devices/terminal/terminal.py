@@ -1,12 +1,14 @@
 import re
+import uuid
 
+from aionet.connections import ExecResult
 from aionet.vendors.devices.base import BaseDevice
 
 
 class Terminal(BaseDevice):
     """Class for working with General Terminal"""
 
-    def __init__(self, delimeter_list=None, *args, **kwargs):
+    def __init__(self, delimeter_list=None, sentinel=False, *args, **kwargs):
         """
         Initialize class for asynchronous working with network devices
         Invoke init with some special params (base_pattern and username)
@@ -18,6 +20,8 @@ class Terminal(BaseDevice):
         :param str device_type: network device type
         :param known_hosts: file with known hosts. Default is None (no policy). With () it will use default file
         :param delimeter_list: list with delimeters
+        :param bool sentinel: detect the end of command output by a unique marker printed after the command
+                              instead of the prompt pattern. Requires POSIX like shell, see send_command_sentinel
         :param str local_addr: local address for binding source of tcp connection
         :param client_keys: path for client keys. Default in None. With () it will use default file in OS
         :param str passphrase: password for encrypted client keys
@@ -27,6 +31,10 @@ class Terminal(BaseDevice):
         super().__init__(*args, **kwargs)
         if delimeter_list is not None:
             self._delimiter_list = delimeter_list
+        self._sentinel = sentinel
+
+    _exec_supported = True
+    """Device accepts SSH exec requests, so commands can be executed without the interactive session"""
 
     _delimiter_list = ["$", "#"]
     """All this characters will stop reading from buffer. It mean the end of device prompt"""
@@ -34,6 +42,72 @@ class Terminal(BaseDevice):
     _pattern = r"[{delimiters}]"
     """Pattern for using in reading buffer. When it found processing ends"""
 
+    _sentinel_command = "{command}; printf '\\n__AIONET_%s_%s__\\n' \"$?\" {marker_id}"
+    """Command with appended printing of exit status and marker, the printed marker never appears in the echo"""
+
+    _sentinel_start = "\n__AIONET_"
+    """Beginning of the printed marker line"""
+
+    _sentinel_end = "_{marker_id}__"
+    """End of the printed marker line"""
+
+    async def send_command(self, command_string, pattern="", re_flags=0, strip_command=True, strip_prompt=True,
+                           use_textfsm=False, timeout=None, **kwargs):
+        """
+        Sending command to device, in sentinel mode the end of the output is detected by the marker
+
+        See :meth:`BaseDevice.send_command <aionet.vendors.devices.base.BaseDevice.send_command>`
+        """
+        if not self._sentinel or pattern or kwargs.get("sink") is not None:
+            return await super().send_command(command_string, pattern, re_flags, strip_command, strip_prompt,
+                                              use_textfsm, timeout, **kwargs)
+        result = await self.send_command_sentinel(command_string, strip_command=strip_command, timeout=timeout)
+        output = result.stdout
+        if output.endswith("\n"):
+            output = output[:-1]
+        if use_textfsm:
+            output = await self._process_output_async(command_string, output, False, False, use_textfsm)
+        return output
+
+    async def send_command_sentinel(self, command_string, strip_command=True, timeout=None):
+        """
+        Sending command with appended marker, which is printed with the exit status after the command ends
+
+        The end of the output is found by literal search of the marker, so $ or # in the output can't end
+        the reading early. The command must be a single line simple command (no trailing comment or &).
+
+        :param str command_string: command for executing
+        :param bool strip_command: True or False for stripping command from output
+        :param timeout: timeout in seconds for the command, default is the connection timeout
+        :return: :class:`ExecResult <aionet.connections.ExecResult>`, stderr is None because
+                 it's merged to stdout in the interactive session
+        """
+        marker_id = uuid.uuid4().hex
+        command = type(self)._sentinel_command.format(command=command_string.rstrip("\n"), marker_id=marker_id)
+        marker_end = type(self)._sentinel_end.format(marker_id=marker_id)
+        self._logger.debug("Send sentinel command: %s" % repr(command))
+
+        self._conn.send(self._normalize_cmd(command))
+        self._last_prompt = None
+        output = await self._conn.read_until_string(marker_end, timeout=timeout)
+        end = output.find(marker_end)
+        rest = output[end + len(marker_end):]
+        # the prompt follows the marker
+        if not re.search(self._conn._base_pattern, rest):
+            rest += await self._conn.read_until_prompt(timeout=timeout)
+        self._track_prompt(rest)
+
+        start = output.rfind(type(self)._sentinel_start, 0, end)
+        exit_status = int(output[start + len(type(self)._sentinel_start):end])
+        # the marker line starts with new line, which the terminal sends as \r\n or \r\r\n
+        output = output[:start].rstrip("\r")
+        if self._ansi_escape_codes:
+            output = self._strip_ansi_escape_codes(output)
+        output = self._normalize_linefeeds(output)
+        if strip_command:
+            output = output.split("\n", 1)[1] if "\n" in output else ""
+        return ExecResult(command_string, output, None, exit_status)
+
     async def _set_base_prompt(self):
         """Setting base pattern"""
         self._logger.info("Setting base prompt")
@@ -5,7 +5,15 @@ different terminal modes
 
 
 class BaseTerminalMode:
-    """ Base Terminal Mode """
+    """
+    Base Terminal Mode
+
+    Terminal modes of a device form a tree by their parents. The current mode is derived from the prompt
+    observed at the end of the last read, so checking, entering and exiting modes doesn't need probing
+    the device with new lines. Entering a mode walks the tree: it exits the modes which aren't on the way
+    and enters the missing parents first. Being in a nested mode counts as being in the mode (ex: enable
+    mode from config mode is a no-op), unless exit_nested is set.
+    """
     name = ''
 
     def __init__(self,
@@ -36,43 +44,103 @@ class BaseTerminalMode:
                 return True
         return False
 
-    async def __call__(self):
+    async def __call__(self, exit_nested=False):
         """ callable terminal to enter """
-        return await self.enter()
+        return await self.enter(exit_nested)
 
     @property
     def _logger(self):
         return self.device._logger
 
+    @property
+    def path(self):
+        """ list of terminal modes from the root to this mode """
+        path = [self]
+        while path[0]._parent is not None:
+            path.insert(0, path[0]._parent)
+        return path
+
+    def match(self, prompt):
+        """ check if the prompt belongs to this terminal mode """
+        return self._check_string in prompt
+
+    async def _probe(self):
+        """ send new line for finding the prompt, return the output """
+        return await self.device.send_new_line()
+
     async def check(self, force=False):
-        """Check if are in configuration mode. Return boolean"""
-        if self.device.current_terminal is not None and not force:
-            if self.device.current_terminal == self:
-                return True
-        output = await self.device.send_new_line()
-        return self._check_string in output
+        """Check if are in this terminal mode. Return boolean"""
+        if self.device.last_prompt is None:
+            if self.device.current_terminal is not None and not force:
+                if self.device.current_terminal == self:
+                    return True
+            output = await self._probe()
+            if self.device.last_prompt is None:
+                return self._check_string in output
+        return self.match(self.device.last_prompt)
 
-    async def enter(self):
-        """ enter terminal mode """
+    async def enter(self, exit_nested=False):
+        """
+        enter terminal mode
+
+        :param bool exit_nested: exit the nested modes of this mode, by default they count as this mode
+        """
         self._logger.info("Entering to %s" % self.name)
-        if await self.check():
+        if self.device.last_prompt is None:
+            await self._probe()
+        current = self.device.current_terminal
+        if self.device.last_prompt is None:
+            # the prompt can't be tracked, enter only this mode
+            if await self.check(force=True):
+                return ""
+            return await self._enter()
+
+        current_path = current.path if current is not None else []
+        if self in current_path and not exit_nested:
             return ""
-        output = await self.device.send_command_expect(self._enter_command, pattern="Password")
-        if not await self.check(force=True):
-            raise ValueError("Failed to enter to %s" % self.name)
-        self.device.current_terminal = self
+        path = self.path
+        common = 0
+        while common < min(len(path), len(current_path)) and path[common] == current_path[common]:
+            common += 1
+
+        output = ""
+        for mode in reversed(current_path[common:]):
+            output += await mode._exit()
+        for mode in path[common:]:
+            output += await mode._enter()
         return output
 
     async def exit(self):
-        """ exit terminal mode """
+        """ exit terminal mode and all its nested modes """
         self._logger.info("Exiting from %s" % self.name)
         if not await self.check():
             return ""
-        if self.device.current_terminal != self:
+        current = self.device.current_terminal
+        if self.device.last_prompt is None:
+            if current != self:
+                return ""
+            return await self._exit()
+        if current is None or self not in current.path:
             return ""
 
+        output = ""
+        current_path = current.path
+        for mode in reversed(current_path[current_path.index(self):]):
+            output += await mode._exit()
+        return output
+
+    async def _enter(self):
+        """ send the enter command, the parent mode must be entered already """
+        output = await self.device.send_command_expect(self._enter_command, pattern="Password")
+        if not await self.check(force=True):
+            raise ValueError("Failed to enter to %s" % self.name)
+        self.device.current_terminal = self
+        return output
+
+    async def _exit(self):
+        """ send the exit command, nested modes must be exited already """
         output = await self.device.send_command_expect(self._exit_command)
-        if await self.check(force=True):
+        if await self.check(force=True) and self.device.current_terminal == self:
             raise ValueError("Failed to Exit from %s" % self.name)
         self.device.current_terminal = self._parent
         return output
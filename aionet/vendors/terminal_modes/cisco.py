@@ -9,15 +9,12 @@ class EnableMode(BaseTerminalMode):
     """ Cisco Like Enable Mode Class """
     name = 'enable_mode'
 
-    async def enter(self):
+    async def _enter(self):
         """ Enter Enable Mode """
-        self._logger.info("Entering to %s" % self.name)
-        if await self.check():
-            return ""
         output = await self.device.send_command(self._enter_command, pattern="Password")
         if "Password" in output:
             await self.device.send_command(self.device.secret)
-        if not await self.check():
+        if not await self.check(force=True):
             raise ValueError("Failed to enter to %s" % self.name)
         self.device.current_terminal = self
         return output
@@ -32,12 +29,8 @@ class ConfigMode(BaseTerminalMode):
 class IOSxrConfigMode(ConfigMode):
     """ Cisco IOSxr Config Mode """
 
-    async def exit(self):
+    async def _exit(self):
         """Exit from configuration mode"""
-        self._logger.info("Exiting from configuration mode")
-
-        if not await self.check():
-            return ""
         output = await self.device.send_command(self._exit_command,
                                                 pattern=r"Uncommitted changes found")
         if "Uncommitted changes found" in output:
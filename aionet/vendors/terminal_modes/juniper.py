@@ -6,16 +6,10 @@ from aionet.vendors.terminal_modes.cisco import ConfigMode as CiscoConfigMode
 
 
 class ConfigMode(CiscoConfigMode):
-    async def check(self, force=False):
-        """Check if are in configuration mode. Return boolean"""
-        if self.device.current_terminal is not None and not force:
-            if self.device.current_terminal == self:
-                return True
+    async def _probe(self):
+        """ send two new lines, the first one can be answered with the [edit] banner """
         await self.device.send_new_line()
-        output = await self.device.send_new_line()
-
-        return self._check_string in output
-    pass
+        return await self.device.send_new_line()
 
 
 class CliMode(BaseTerminalMode):
@@ -0,0 +1,212 @@
+"""
+Workers Module, running a fleet job sharded over several processes
+"""
+import asyncio
+import importlib.util
+import multiprocessing
+import os
+import pickle
+import queue
+import zlib
+
+from aionet.fleet import FleetResult, FleetRunner
+
+
+class ShardedRunner:
+    """
+    Runner of a job on a fleet of devices in several worker processes
+
+    One event loop is bound to one core by SSH ciphers, pattern searching and TextFSM parsing.
+    Devices are sharded over the workers by their ip and port, so the same device always goes to the same
+    worker, and every worker runs its shard on its own event loop like :class:`FleetRunner`.
+    Results are sent back over a pipe per worker and yielded while they complete. Usage::
+
+        async def job(device):
+            return await device.send_command("show version")
+
+        runner = ShardedRunner(job, workers=8, concurrency=200, timeout=60)
+        async for item in runner.run(devices):
+            print(item.device["ip"], item.exception or item.result)
+
+    The job, device params and results are pickled, so the job must be a module level coroutine function
+    and its results must be picklable. Results which can't be pickled are replaced by an exception.
+    """
+
+    def __init__(self, job, workers=None, concurrency=100, timeout=None, use_uvloop=False, batch_size=64,
+                 mp_context=None):
+        """
+        :param job: module level coroutine function called with connected device
+        :param int workers: number of worker processes. Default is number of cores
+        :param int concurrency: max number of devices processed at once by one worker
+        :param timeout: deadline in seconds for one device, None is no deadline
+        :param bool use_uvloop: run workers on uvloop event loop
+        :param int batch_size: number of device params sent to a worker at once
+        :param mp_context: multiprocessing context for starting workers. Default is the default context
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if use_uvloop and importlib.util.find_spec("uvloop") is None:
+            raise ImportError("use_uvloop requires uvloop package")
+        self._job = job
+        self._workers = workers or os.cpu_count() or 1
+        self._concurrency = concurrency
+        self._timeout = timeout
+        self._use_uvloop = use_uvloop
+        self._batch_size = batch_size
+        self._mp_context = mp_context or multiprocessing.get_context()
+
+    def _shard(self, params):
+        """ index of the worker for the device, stable between runs """
+        key = "%s:%s" % (params.get("ip"), params.get("port"))
+        return zlib.crc32(key.encode()) % self._workers
+
+    async def run(self, devices):
+        """
+        Run the job on devices, yield :class:`aionet.FleetResult` for every device
+
+        :param devices: iterable of dicts with ConnectionHandler params
+        """
+        loop = asyncio.get_event_loop()
+        results = asyncio.Queue()
+        workers = []
+        feeder = None
+        try:
+            for index in range(self._workers):
+                workers.append(self._start_worker(index, loop, results))
+            feeder = asyncio.ensure_future(self._feed(iter(devices), workers))
+            running = len(workers)
+            while running:
+                item = await results.get()
+                if item is None:
+                    running -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+            await feeder
+        finally:
+            if feeder is not None and not feeder.done():
+                feeder.cancel()
+                await asyncio.gather(feeder, return_exceptions=True)
+            for worker in workers:
+                self._stop_worker(worker, loop)
+
+    def _start_worker(self, index, loop, results):
+        """ start worker process, its results are put to results queue, None when it finishes """
+        inbox = self._mp_context.Queue(maxsize=4)
+        reader, writer = self._mp_context.Pipe(duplex=False)
+        process = self._mp_context.Process(
+            target=_worker_main,
+            args=(self._job, inbox, writer, self._concurrency, self._timeout, self._use_uvloop),
+            name="aionet-worker-%d" % index,
+            daemon=True,
+        )
+        process.start()
+        writer.close()
+        loop.add_reader(reader.fileno(), _receive, loop, reader, process, results)
+        return process, inbox, reader
+
+    @staticmethod
+    def _stop_worker(worker, loop):
+        process, inbox, reader = worker
+        if not reader.closed:
+            loop.remove_reader(reader.fileno())
+            reader.close()
+        if process.is_alive():
+            process.terminate()
+        process.join(1)
+        inbox.close()
+        inbox.cancel_join_thread()
+
+    async def _feed(self, devices, workers):
+        """ send device params to their workers in batches, then None to finish them """
+        batches = [[] for _ in workers]
+        for params in devices:
+            index = self._shard(params)
+            batches[index].append(params)
+            if len(batches[index]) >= self._batch_size:
+                batch, batches[index] = batches[index], []
+                await self._put(workers[index], batch)
+        for worker, batch in zip(workers, batches):
+            if batch:
+                await self._put(worker, batch)
+            await self._put(worker, None)
+
+    @staticmethod
+    async def _put(worker, batch):
+        process, inbox, _ = worker
+        await asyncio.get_event_loop().run_in_executor(None, _put_blocking, inbox, process, batch)
+
+
+def _put_blocking(inbox, process, batch):
+    """ put the batch to the worker queue, give up when the worker is dead """
+    while process.is_alive():
+        try:
+            inbox.put(batch, timeout=0.5)
+            return
+        except queue.Full:
+            pass
+
+
+def _receive(loop, reader, process, results):
+    """ reader callback of the parent, moves one message from the worker pipe to results queue """
+    try:
+        item = reader.recv()
+    except EOFError:
+        item = RuntimeError("worker process %s exited unexpectedly" % process.name)
+    except Exception as e:
+        item = e
+    if item is None or isinstance(item, Exception):
+        loop.remove_reader(reader.fileno())
+        reader.close()
+    results.put_nowait(item)
+
+
+def _worker_main(job, inbox, outbox, concurrency, timeout, use_uvloop):
+    """ entry point of the worker process """
+    if use_uvloop:
+        import uvloop
+        loop = uvloop.new_event_loop()
+    else:
+        loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(_serve(job, inbox, outbox, concurrency, timeout))
+        outbox.send(None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        outbox.close()
+        loop.close()
+
+
+async def _serve(job, inbox, outbox, concurrency, timeout):
+    """ run the job on every device from inbox, send results to outbox """
+    loop = asyncio.get_event_loop()
+    runner = FleetRunner(job, concurrency=concurrency, timeout=timeout)
+    tasks = set()
+
+    def done(task):
+        tasks.discard(task)
+        _send(outbox, task.result())
+
+    while True:
+        batch = await loop.run_in_executor(None, inbox.get)
+        if batch is None:
+            break
+        for params in batch:
+            task = await runner.submit(params)
+            task.add_done_callback(done)
+            tasks.add(task)
+    if tasks:
+        await asyncio.wait(tasks)
+
+
+def _send(outbox, item):
+    """ send the result to the parent, results which can't be pickled are replaced by the error """
+    try:
+        data = pickle.dumps(item)
+    except Exception as e:
+        error = RuntimeError("result of the job can't be pickled: %s" % e)
+        data = pickle.dumps(FleetResult(item.device, None, error, item.elapsed))
+    outbox.send_bytes(data)
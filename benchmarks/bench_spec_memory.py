@@ -0,0 +1,54 @@
+"""
+Benchmark of memory per queued device: params dicts vs DeviceSpec vs device objects
+
+Builds COUNT devices of every kind, like a fleet run keeping the whole queue in memory, and measures
+traced allocations of the list. Devices have the same options (timeout, secret), as they usually
+come from defaults and groups of an inventory.
+
+Usage: python benchmarks/bench_spec_memory.py [COUNT]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from aionet import ConnectionHandler, DeviceSpec  # noqa: E402
+
+
+def _params(count):
+    for i in range(count):
+        yield dict(ip="10.%d.%d.%d" % (i >> 16 & 255, i >> 8 & 255, i & 255), device_type="cisco_ios",
+                   username="admin", password="secret", secret="enable", timeout=30)
+
+
+def _measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    devices = build(count)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del devices
+    return size, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    kinds = (
+        ("params dict", lambda n: list(_params(n))),
+        ("DeviceSpec", lambda n: [DeviceSpec(**params) for params in _params(n)]),
+        ("ConnectionHandler", lambda n: [ConnectionHandler(**params) for params in _params(n)]),
+    )
+    print("%d queued devices" % count)
+    print("%-20s %12s %14s %10s" % ("kind", "total MB", "bytes/device", "build s"))
+    for name, build in kinds:
+        size, elapsed = _measure(build, count)
+        print("%-20s %12.1f %14.0f %10.2f" % (name, size / 1024 / 1024, size / count, elapsed))
+
+
+if __name__ == "__main__":
+    main()
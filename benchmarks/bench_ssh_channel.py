@@ -0,0 +1,100 @@
+"""
+Benchmark of SSHConnection (stream session) vs SSHChannelConnection (binary session)
+
+Starts a local SSH server in a child process, which answers every line with SIZE megabytes of
+text and a prompt, and reads it with both connection classes until the prompt.
+Only the client process is measured: wall time, CPU time and peak of traced allocations.
+
+Usage: python benchmarks/bench_ssh_channel.py [SIZE_MB] [ROUNDS] [CIPHER]
+
+AES-GCM is used by default, so the measurement isn't hidden behind the cost of the cipher.
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+
+import asyncssh
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from aionet.connections import SSHConnection, SSHChannelConnection  # noqa: E402
+
+CIPHER = sys.argv[3] if len(sys.argv) > 3 else "aes128-gcm@openssh.com"
+PROMPT = "bench#"
+LINE = "GigabitEthernet0/0/1 is up, line protocol is up, 1234 packets input, 567890 bytes\r\n"
+
+
+class _Server(asyncssh.SSHServer):
+    def begin_auth(self, username):
+        return False
+
+
+def _serve(port_queue, size):
+    payload = (LINE * (size // len(LINE) + 1))[:size].encode() + PROMPT.encode()
+
+    async def handle(process):
+        process.stdout.write(PROMPT.encode())
+        while True:
+            data = await process.stdin.read(1024)
+            if not data:
+                break
+            process.stdout.write(payload)
+        process.exit(0)
+
+    async def start():
+        key = asyncssh.generate_private_key("ssh-ed25519")
+        server = await asyncssh.create_server(_Server, "127.0.0.1", 0, server_host_keys=[key],
+                                              process_factory=handle, encoding=None)
+        port_queue.put(server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.get_event_loop().run_until_complete(start())
+
+
+async def _run(connection_class, port, rounds, trace):
+    conn = connection_class(host="127.0.0.1", port=port, username="bench", known_hosts=None, timeout=120,
+                            encryption_algs=[CIPHER])
+    await conn.connect()
+    conn.set_base_pattern(PROMPT)
+    await conn.read_until_prompt()
+    if trace:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(rounds):
+        conn.send("\n")
+        await conn.read_until_prompt()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    conn._conn.close()
+    return wall, cpu, peak
+
+
+def main():
+    size = int(float(sys.argv[1] if len(sys.argv) > 1 else 20) * 1024 * 1024)
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(port_queue, size), daemon=True)
+    server.start()
+    port = port_queue.get()
+    loop = asyncio.get_event_loop()
+    total = size * rounds / 1024 / 1024
+    print("%d rounds of %.1f MB, cipher %s" % (rounds, size / 1024 / 1024, CIPHER))
+    print("%-22s %10s %10s %12s %14s" % ("connection", "wall s", "cpu s", "cpu ms/MB", "peak alloc MB"))
+    try:
+        for connection_class in (SSHConnection, SSHChannelConnection):
+            wall, cpu, _ = loop.run_until_complete(_run(connection_class, port, rounds, trace=False))
+            _, _, peak = loop.run_until_complete(_run(connection_class, port, 1, trace=True))
+            print("%-22s %10.2f %10.2f %12.1f %14.1f" % (
+                connection_class.__name__, wall, cpu, cpu * 1000 / total, peak / 1024 / 1024))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark of ShardedRunner throughput by number of worker processes
+
+Starts local SSH servers in child processes, which behave like an IOS device answering every show command
+with SIZE kilobytes of text, and runs a job of ROUNDS show commands on DEVICES devices (one per server port)
+with 1, 2, 4 ... WORKERS worker processes. Every device is a full session: SSH handshake, session
+preparation, decryption and prompt searching of every output.
+
+Usage: python benchmarks/bench_workers.py [DEVICES] [ROUNDS] [SIZE_KB] [WORKERS]
+
+Servers run on the same machine, so their CPU competes with the workers, throughput stops growing
+around half of the cores.
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+import sys
+import time
+
+import asyncssh
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from aionet import ShardedRunner  # noqa: E402
+
+PROMPT = "bench#"
+LINE = "GigabitEthernet0/0/1 is up, line protocol is up, 1234 packets input, 567890 bytes\r\n"
+
+
+class _Server(asyncssh.SSHServer):
+    def begin_auth(self, username):
+        return False
+
+
+def _serve(port_queue, ports, size):
+    payload = (LINE * (size // len(LINE) + 1))[:size].encode()
+    prompt = ("\r\n" + PROMPT).encode()
+
+    async def handle(process):
+        process.stdout.write(prompt)
+        buffer = b""
+        while True:
+            data = await process.stdin.read(1024)
+            if not data:
+                break
+            buffer += data
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                process.stdout.write(line + b"\r\n")
+                if line.startswith(b"show"):
+                    process.stdout.write(payload)
+                process.stdout.write(prompt)
+        process.exit(0)
+
+    async def start():
+        key = asyncssh.generate_private_key("ssh-ed25519")
+        for _ in range(ports):
+            server = await asyncssh.create_server(_Server, "127.0.0.1", 0, server_host_keys=[key],
+                                                  process_factory=handle, encoding=None)
+            port_queue.put(server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.get_event_loop().run_until_complete(start())
+
+
+async def job(device, rounds):
+    for _ in range(rounds):
+        await device.send_command("show interfaces")
+    return True
+
+
+async def _run(devices, rounds, workers):
+    runner = ShardedRunner(functools.partial(job, rounds=rounds), workers=workers, concurrency=50, timeout=300)
+    failed = 0
+    async for item in runner.run(devices):
+        if item.exception is not None:
+            failed += 1
+    return failed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    size = int(float(sys.argv[3]) * 1024) if len(sys.argv) > 3 else 256 * 1024
+    max_workers = int(sys.argv[4]) if len(sys.argv) > 4 else os.cpu_count() or 1
+
+    server_count = max(1, (os.cpu_count() or 1) // 2)
+    port_queue = multiprocessing.Queue()
+    servers = []
+    for index in range(server_count):
+        ports = count // server_count + (1 if index < count % server_count else 0)
+        server = multiprocessing.Process(target=_serve, args=(port_queue, ports, size), daemon=True)
+        server.start()
+        servers.append(server)
+    devices = [dict(ip="127.0.0.1", port=port_queue.get(), username="bench", password="bench",
+                    device_type="cisco_ios", known_hosts=None) for _ in range(count)]
+
+    loop = asyncio.get_event_loop()
+    print("%d devices, %d rounds of %d KB, %d server processes" % (count, rounds, size // 1024, server_count))
+    print("%8s %10s %12s %10s %8s" % ("workers", "wall s", "devices/s", "MB/s", "failed"))
+    workers = 1
+    try:
+        while True:
+            wall = time.perf_counter()
+            failed = loop.run_until_complete(_run(devices, rounds, workers))
+            wall = time.perf_counter() - wall
+            print("%8d %10.2f %12.1f %10.1f %8d" % (
+                workers, wall, count / wall, count * rounds * size / 1024 / 1024 / wall, failed))
+            if workers >= max_workers:
+                break
+            workers = min(workers * 2, max_workers)
+    finally:
+        for server in servers:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Fakes of connections for the tests
+"""
+import asyncio
+
+from aionet.connections.base import BaseConnection
+
+
+class FakeStream(BaseConnection):
+    """ connection returning the given chunks, empty chunk is the end of the session """
+
+    def __init__(self, chunks, eof=False, base_pattern=r"R1#", delay=0, timeout=1):
+        super().__init__()
+        self._host = "fake"
+        self._timeout = timeout
+        self._chunks = list(chunks)
+        self._eof = eof
+        self._delay = delay
+        self.set_base_prompt("R1")
+        self.set_base_pattern(base_pattern)
+
+    async def read(self):
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        if self._chunks:
+            return self._chunks.pop(0)
+        if self._eof:
+            return ""
+        # the device is silent
+        await asyncio.sleep(3600)
+
+    def send(self, cmd):
+        pass
@@ -0,0 +1,122 @@
+"""
+Tests of the per-host circuit breaker
+"""
+import errno
+
+import pytest
+
+import aionet.breaker
+from aionet.breaker import CircuitBreaker, failure_kind
+from aionet.cache import HostCache
+from aionet.exceptions import AionetAuthenticationError, AionetConnectionError, AionetTimeoutError
+
+KEY = "10.0.0.1:22"
+
+
+class Clock:
+    """ replacement of the time module of the breaker """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(aionet.breaker, "time", clock)
+    return clock
+
+
+def _timeout():
+    return AionetTimeoutError("10.0.0.1", None, "timeout")
+
+
+def test_failure_kinds():
+    assert failure_kind(AionetAuthenticationError("h", None, "denied")) == "auth"
+    assert failure_kind(TimeoutError()) == "timeout"
+    assert failure_kind(AionetConnectionError("h", errno.ECONNREFUSED, "refused")) == "refused"
+    assert failure_kind(OSError(errno.EHOSTUNREACH, "no route")) == "unreachable"
+    assert failure_kind(ValueError("job failed")) is None
+
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, persist=False)
+    assert breaker.record_failure(KEY, _timeout())
+    assert breaker.state(KEY) == breaker.CLOSED
+    assert breaker.allow(KEY)
+    breaker.record_failure(KEY, _timeout())
+    assert breaker.state(KEY) == breaker.OPEN
+    assert not breaker.allow(KEY)
+    assert (breaker.failures(KEY), breaker.failure(KEY)) == (2, "timeout")
+
+
+def test_success_resets_failures_in_a_row(clock):
+    breaker = CircuitBreaker(failure_threshold=2, persist=False)
+    breaker.record_failure(KEY, _timeout())
+    breaker.record_success(KEY)
+    breaker.record_failure(KEY, _timeout())
+    assert breaker.state(KEY) == breaker.CLOSED
+
+
+def test_job_errors_are_ignored(clock):
+    breaker = CircuitBreaker(failure_threshold=1, persist=False)
+    assert not breaker.record_failure(KEY, ValueError("job failed"))
+    assert breaker.state(KEY) == breaker.CLOSED
+
+
+def test_half_open_allows_one_attempt(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, persist=False)
+    breaker.record_failure(KEY, _timeout())
+    clock.now += 59
+    assert not breaker.allow(KEY)
+    clock.now += 1
+    assert breaker.state(KEY) == breaker.HALF_OPEN
+    assert breaker.allow(KEY)
+    # the attempt is running
+    assert not breaker.allow(KEY)
+    assert breaker.state(KEY) == breaker.HALF_OPEN
+    breaker.record_success(KEY)
+    assert breaker.state(KEY) == breaker.CLOSED
+    assert breaker.allow(KEY)
+
+
+def test_failed_half_open_attempt_backs_off(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, backoff=2, max_reset_timeout=200,
+                             persist=False)
+    breaker.record_failure(KEY, _timeout())
+    for reset_timeout in (120, 200, 200):
+        clock.now += 1000
+        assert breaker.allow(KEY)
+        breaker.record_failure(KEY, _timeout())
+        clock.now += reset_timeout - 1
+        assert breaker.state(KEY) == breaker.OPEN
+        clock.now += 1
+        assert breaker.state(KEY) == breaker.HALF_OPEN
+
+
+def test_abandoned_attempt_allows_another(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, persist=False)
+    breaker.record_failure(KEY, _timeout())
+    clock.now += 60
+    assert breaker.allow(KEY)
+    breaker.abandon(KEY)
+    assert breaker.allow(KEY)
+
+
+def test_state_is_persisted(clock, tmp_path):
+    cache = HostCache(str(tmp_path))
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, host_cache=cache)
+    breaker.record_failure(KEY, AionetAuthenticationError("10.0.0.1", None, "denied"))
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, host_cache=cache)
+    assert breaker.state(KEY) == breaker.OPEN
+    assert breaker.failure(KEY) == "auth"
+
+
+def test_prioritize_moves_open_hosts_to_the_end(clock):
+    breaker = CircuitBreaker(failure_threshold=1, persist=False)
+    breaker.record_failure(KEY, _timeout())
+    devices = [dict(ip="10.0.0.1"), dict(ip="10.0.0.2"), dict(ip="10.0.0.3", port=22)]
+    assert [params["ip"] for params in breaker.prioritize(devices)] == ["10.0.0.2", "10.0.0.3", "10.0.0.1"]
@@ -0,0 +1,136 @@
+"""
+Tests of the pool of channels of one device, over fake channels
+"""
+import asyncio
+import logging
+
+import pytest
+
+from aionet.channels import ChannelPool
+from aionet.exceptions import AionetConnectionError
+
+
+class FakeChannel:
+
+    def __init__(self, number):
+        self.number = number
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def send_command(self, command):
+        await asyncio.sleep(0.01)
+        if command == "hang":
+            raise asyncio.TimeoutError()
+        if command == "bad":
+            raise ValueError("bad command")
+        return "%s on %d" % (command, self.number)
+
+
+class FakeDevice:
+    """ device opening fake channels, open fails while failing is set """
+
+    _logger = logging.getLogger("aionet.tests")
+
+    def __init__(self):
+        self.channels = []
+        self.failing = False
+
+    @property
+    def opened(self):
+        return len(self.channels)
+
+    async def open_channel(self):
+        if self.failing:
+            raise AionetConnectionError("10.0.0.1", None, "channel refused")
+        channel = FakeChannel(self.opened + 1)
+        self.channels.append(channel)
+        return channel
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_commands_run_on_parallel_channels():
+    async def main():
+        device = FakeDevice()
+        async with ChannelPool(device, size=2) as pool:
+            outputs = await asyncio.gather(*[pool.send_command("show %d" % i) for i in range(4)])
+        return device, outputs
+
+    device, outputs = run(main())
+    assert device.opened == 2
+    assert sorted(output.split(" on ")[1] for output in outputs) == ["1", "1", "2", "2"]
+
+
+def test_broken_channel_is_replaced():
+    async def main():
+        device = FakeDevice()
+        async with ChannelPool(device, size=1) as pool:
+            with pytest.raises(asyncio.TimeoutError):
+                async with pool.channel() as broken:
+                    await broken.send_command("hang")
+            async with pool.channel() as channel:
+                assert channel is not broken
+            assert not broken.connected
+            # other errors don't make the channel out of sync
+            with pytest.raises(ValueError):
+                await pool.send_command("bad")
+            async with pool.channel() as same:
+                assert same is channel
+        return device
+
+    assert run(main()).opened == 2
+
+
+def test_failed_replacement_is_opened_by_next_acquire():
+    async def main():
+        device = FakeDevice()
+        async with ChannelPool(device, size=1) as pool:
+            device.failing = True
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.send_command("hang")
+            # the waiter fails instead of hanging while the device refuses channels
+            with pytest.raises(AionetConnectionError):
+                await asyncio.wait_for(pool.send_command("show"), 1)
+            device.failing = False
+            assert await asyncio.wait_for(pool.send_command("show"), 1) == "show on 2"
+
+    run(main())
+
+
+@pytest.mark.parametrize("delay", [0, 0.05])
+def test_close_leaves_no_channel_of_replacement(delay):
+    async def main():
+        device = FakeDevice()
+        pool = ChannelPool(device, size=1)
+        await pool.open()
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.send_command("hang")
+        # closing while the replacement runs or after it's done
+        await asyncio.sleep(delay)
+        await pool.close()
+        return device
+
+    device = run(main())
+    assert not any(channel.connected for channel in device.channels)
+
+
+def test_failed_open_closes_opened_channels():
+    class HalfFailing(FakeDevice):
+        async def open_channel(self):
+            self.failing = self.opened == 1
+            return await super().open_channel()
+
+    device = HalfFailing()
+    with pytest.raises(AionetConnectionError):
+        run(ChannelPool(device, size=3).open())
+    assert device.opened == 1
+    assert not any(channel.connected for channel in device.channels)
+
+
+def test_acquire_requires_open():
+    with pytest.raises(RuntimeError):
+        run(ChannelPool(FakeDevice()).acquire())
@@ -0,0 +1,57 @@
+"""
+Tests of running jobs on a fleet, over fake devices
+"""
+import asyncio
+
+from aionet.fleet import FleetRunner
+
+
+class FakeDevice:
+    """ device which connects at once, running counts the devices connected at the same time """
+
+    running = 0
+    peak = 0
+
+    def __init__(self, **params):
+        self.params = params
+
+    async def __aenter__(self):
+        FakeDevice.running += 1
+        FakeDevice.peak = max(FakeDevice.peak, FakeDevice.running)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        FakeDevice.running -= 1
+
+
+async def job(device):
+    await asyncio.sleep(0.01)
+    if device.params["ip"] == "bad":
+        raise ValueError("bad device")
+    return device.params["ip"]
+
+
+def test_submit_is_limited_by_concurrency():
+    FakeDevice.peak = 0
+
+    async def main():
+        runner = FleetRunner(job, concurrency=3, connection_factory=FakeDevice)
+        tasks = [await runner.submit(dict(ip=str(i))) for i in range(10)] + [await runner.submit(dict(ip="bad"))]
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(main())
+    assert FakeDevice.peak == 3
+    assert [item.result for item in results[:-1]] == [str(i) for i in range(10)]
+    assert isinstance(results[-1].exception, ValueError)
+
+
+def test_run_as_completed_yields_every_device():
+    FakeDevice.peak = 0
+
+    async def main():
+        runner = FleetRunner(job, concurrency=4, connection_factory=FakeDevice)
+        return [item async for item in runner.run(dict(ip=str(i)) for i in range(20))]
+
+    results = asyncio.run(main())
+    assert FakeDevice.peak == 4
+    assert sorted(int(item.result) for item in results) == list(range(20))
@@ -0,0 +1,44 @@
+"""
+Tests of reading inventories
+"""
+import pytest
+
+from aionet.inventory import Inventory
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_csv_numbers_are_parsed_leniently(tmp_path):
+    path = _write(tmp_path, "devices.csv",
+                  "name,ip,device_type,port,timeout,fast_prep,site\n"
+                  "r1,10.0.0.1,cisco_ios, 22 ,30.0,yes,ams\n"
+                  "r2,10.0.0.2,cisco_ios,,,,fra\n")
+    hosts = list(Inventory(path, defaults={"username": "admin"}))
+    assert hosts[0].params["port"] == 22
+    assert hosts[0].params["timeout"] == 30
+    assert hosts[0].params["fast_prep"] is True
+    assert hosts[0].data == {"site": "ams"}
+    assert "port" not in hosts[1].params
+    assert hosts[1].params["username"] == "admin"
+
+
+def test_csv_bad_number_reports_line_and_column(tmp_path):
+    path = _write(tmp_path, "devices.csv",
+                  "ip,device_type,port\n"
+                  "10.0.0.1,cisco_ios,22\n"
+                  "10.0.0.2,cisco_ios,22.5\n")
+    with pytest.raises(ValueError, match="line 3: port"):
+        list(Inventory(path))
+
+
+def test_connection_params_and_data_are_split(tmp_path):
+    path = _write(tmp_path, "devices.jsonl",
+                  '{"ip": "10.0.0.1", "device_type": "juniper_junos", "groups": "core", "role": "pe"}\n')
+    host, = Inventory(path, groups={"core": {"username": "admin", "rack": 4}})
+    assert host.params == {"ip": "10.0.0.1", "device_type": "juniper_junos", "username": "admin"}
+    assert host.data == {"role": "pe", "rack": 4}
+    assert host.groups == ("core",)
@@ -0,0 +1,158 @@
+"""
+Tests of the adaptive concurrency limiter
+"""
+import asyncio
+
+import pytest
+
+from aionet.exceptions import AionetAuthenticationError, AionetTimeoutError
+from aionet.limiter import AdaptiveLimiter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _release(limiter, count, scope=AdaptiveLimiter.GLOBAL, **kwargs):
+    for _ in range(count):
+        limiter.release(await limiter.acquire(scope), **kwargs)
+
+
+def test_additive_increase_per_window():
+    async def main():
+        limiter = AdaptiveLimiter(initial=4)
+        await _release(limiter, 4)
+        # a window of 4 devices isn't enough, the limit grows while the window grows
+        assert limiter.limit() == 4
+        await _release(limiter, 1)
+        assert limiter.limit() == 5
+
+    run(main())
+
+
+def test_increase_stops_at_max_limit():
+    async def main():
+        limiter = AdaptiveLimiter(initial=2, max_limit=3)
+        await _release(limiter, 100)
+        assert limiter.limit() == 3
+
+    run(main())
+
+
+def test_timeout_decreases_once_per_window():
+    async def main():
+        limiter = AdaptiveLimiter(initial=8)
+        first = await limiter.acquire()
+        second = await limiter.acquire()
+        error = AionetTimeoutError("10.0.0.1", None, "timeout")
+        limiter.release(first, error=error)
+        assert limiter.limit() == 4
+        # taken before the decrease, it saw the same overload
+        limiter.release(second, error=error)
+        assert limiter.limit() == 4
+        await asyncio.sleep(0.001)
+        await _release(limiter, 1, error=error)
+        assert limiter.limit() == 2
+
+    run(main())
+
+
+def test_decrease_stops_at_min_limit():
+    async def main():
+        limiter = AdaptiveLimiter(initial=4, min_limit=3)
+        for _ in range(3):
+            await asyncio.sleep(0.001)
+            await _release(limiter, 1, error=TimeoutError())
+        assert limiter.limit() == 3
+
+    run(main())
+
+
+def test_other_errors_keep_the_limit():
+    async def main():
+        limiter = AdaptiveLimiter(initial=4)
+        await _release(limiter, 3, error=ValueError("job failed"))
+        assert limiter.limits() == {None: {"limit": 4, "in_flight": 0, "waiting": 0}}
+
+    run(main())
+
+
+def test_scope_overload_keeps_global_limit():
+    async def main():
+        limiter = AdaptiveLimiter(initial=8)
+        await _release(limiter, 1, scope="ams", error=AionetTimeoutError("10.0.0.1", None, "timeout"))
+        assert limiter.limit("ams") == 4
+        assert limiter.limit() == 8
+
+    run(main())
+
+
+def test_auth_failure_decreases_global_limit():
+    async def main():
+        limiter = AdaptiveLimiter(initial=8)
+        await _release(limiter, 1, scope="ams", error=AionetAuthenticationError("10.0.0.1", None, "denied"))
+        assert limiter.limit("ams") == 4
+        assert limiter.limit() == 4
+
+    run(main())
+
+
+def test_slow_connect_is_overload():
+    async def main():
+        limiter = AdaptiveLimiter(initial=8, latency_tolerance=3.0)
+        await _release(limiter, 1, connect_time=1.0)
+        limit = limiter.limit()
+        await asyncio.sleep(0.001)
+        await _release(limiter, 1, connect_time=2.0)
+        assert limiter.limit() == limit
+        await _release(limiter, 1, connect_time=10.0)
+        assert limiter.limit() == limit // 2
+
+    run(main())
+
+
+def test_waiters_get_freed_slots_in_order():
+    async def main():
+        limiter = AdaptiveLimiter(initial=1)
+        lease = await limiter.acquire()
+        order = []
+
+        async def wait(name):
+            lease = await limiter.acquire()
+            order.append(name)
+            return lease
+
+        waiters = [asyncio.ensure_future(wait(name)) for name in ("a", "b")]
+        await asyncio.sleep(0)
+        assert limiter.limits()[None]["waiting"] == 2
+        limiter.release(lease)
+        limiter.release(await waiters[0])
+        limiter.release(await waiters[1])
+        assert order == ["a", "b"]
+        assert limiter.limits()[None]["in_flight"] == 0
+
+    run(main())
+
+
+def test_cancelled_waiter_doesnt_leak_slot():
+    async def main():
+        limiter = AdaptiveLimiter(initial=1)
+        lease = await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release(lease)
+        state = limiter.limits()[None]
+        assert (state["in_flight"], state["waiting"]) == (0, 0)
+        limiter.release(await asyncio.wait_for(limiter.acquire(), 1))
+
+    run(main())
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(initial=5, max_limit=4)
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(decrease=1)
@@ -0,0 +1,177 @@
+"""
+Tests of the connection pool, over fake devices
+"""
+import asyncio
+import logging
+
+import pytest
+
+from aionet.pool import ConnectionPool
+
+
+class FakeMode:
+    """ terminal mode, entering it exits the nested modes """
+
+    def __init__(self, device, name, parent=None):
+        self._device = device
+        self.name = name
+        self.path = (parent.path if parent else ()) + (self,)
+
+    async def enter(self, exit_nested=False):
+        self._device.entered.append((self.name, exit_nested))
+        self._device.current_terminal = self
+
+    async def exit(self):
+        self._device.current_terminal = self.path[-2] if len(self.path) > 1 else None
+
+
+class FakeDevice:
+    """ device which connects at once and answers the probe unless it's broken """
+
+    _logger = logging.getLogger("aionet.tests")
+
+    def __init__(self, **params):
+        self.params = params
+        self.connected = False
+        self.broken = False
+        self.entered = []
+        self.enable = FakeMode(self, "enable")
+        self.config = FakeMode(self, "config", self.enable)
+        self.current_terminal = None
+
+    async def connect(self):
+        self.connected = True
+        # devices without terminal modes connect with None
+        if self.params.get("modes", True):
+            self.current_terminal = self.enable
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def send_command_expect(self, command, timeout=None):
+        if self.broken:
+            raise TimeoutError("fake")
+        return "R1#"
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def _params(ip="10.0.0.1"):
+    return dict(ip=ip, username="admin", device_type="cisco_ios")
+
+
+def test_released_session_is_reused():
+    async def main():
+        pool = ConnectionPool(connection_factory=FakeDevice)
+        first = await pool.acquire(**_params())
+        await pool.release(first)
+        assert len(pool) == 1
+        second = await pool.acquire(**_params())
+        assert second is first and second.connected
+        other = await pool.acquire(**_params("10.0.0.2"))
+        assert other is not first
+
+    run(main())
+
+
+def test_home_mode_is_restored():
+    async def main():
+        pool = ConnectionPool(connection_factory=FakeDevice)
+        device = await pool.acquire(**_params())
+        await device.config.enter()
+        await pool.release(device)
+        device = await pool.acquire(**_params())
+        assert device.current_terminal is device.enable
+        assert device.entered[-1] == ("enable", True)
+
+    run(main())
+
+
+def test_session_without_home_mode_leaves_entered_modes():
+    async def main():
+        pool = ConnectionPool(connection_factory=FakeDevice)
+        device = await pool.acquire(modes=False, **_params())
+        device.current_terminal = device.config
+        await pool.release(device)
+        assert await pool.acquire(modes=False, **_params()) is device
+        assert device.current_terminal is None
+
+    run(main())
+
+
+def test_broken_idle_session_is_replaced():
+    async def main():
+        pool = ConnectionPool(connection_factory=FakeDevice)
+        first = await pool.acquire(**_params())
+        await pool.release(first)
+        first.broken = True
+        second = await pool.acquire(**_params())
+        assert second is not first
+        assert not first.connected
+
+    run(main())
+
+
+@pytest.mark.parametrize("error, discarded", [
+    (asyncio.TimeoutError, True),
+    (asyncio.CancelledError, True),
+    (ValueError, False),
+])
+def test_connection_discards_session_interrupted_by(error, discarded):
+    async def main():
+        pool = ConnectionPool(connection_factory=FakeDevice)
+        with pytest.raises(error):
+            async with pool.connection(**_params()) as device:
+                raise error()
+        return pool, device
+
+    pool, device = run(main())
+    assert len(pool) == (0 if discarded else 1)
+    assert device.connected != discarded
+
+
+def test_least_recently_used_are_dropped_over_max_idle():
+    async def main():
+        pool = ConnectionPool(max_idle=2, connection_factory=FakeDevice)
+        devices = [await pool.acquire(**_params("10.0.0.%d" % i)) for i in range(3)]
+        for device in devices:
+            await pool.release(device)
+        assert len(pool) == 2
+        assert [device.connected for device in devices] == [False, True, True]
+
+    run(main())
+
+
+def test_expired_sessions_are_evicted():
+    async def main():
+        pool = ConnectionPool(idle_ttl=0.05, connection_factory=FakeDevice)
+        device = await pool.acquire(**_params())
+        await pool.release(device)
+        await asyncio.sleep(0.1)
+        assert await pool.acquire(**_params()) is not device
+        assert not device.connected
+
+    run(main())
+
+
+def test_closed_pool_disconnects_sessions():
+    async def main():
+        pool = ConnectionPool(connection_factory=FakeDevice)
+        idle = await pool.acquire(**_params())
+        used = await pool.acquire(**_params())
+        await pool.release(idle)
+        await pool.close()
+        assert not idle.connected
+        await pool.release(used)
+        assert not used.connected
+        with pytest.raises(RuntimeError):
+            await pool.acquire(**_params())
+
+    run(main())
+
+
+def test_foreign_device_cant_be_released():
+    with pytest.raises(ValueError):
+        run(ConnectionPool(connection_factory=FakeDevice).release(FakeDevice(**_params())))
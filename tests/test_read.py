@@ -0,0 +1,159 @@
+"""
+Tests of reading from connections, over a fake stream fed by chunks
+"""
+import asyncio
+import re
+
+import pytest
+
+from aionet.connections.matcher import PatternMatcher
+from aionet.exceptions import AionetConnectionError
+from aionet.vendors.devices.base import BaseDevice
+from fakes import FakeStream
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.parametrize("chunks", [
+    ["show ver\nVersion 1\nR", "1#"],
+    ["show ver\nVersion 1\nR1", "#"],
+    ["s", "how ver\nVers", "ion 1\n", "R", "1", "#"],
+])
+def test_pattern_split_across_chunks(chunks):
+    output = run(FakeStream(chunks).read_until_prompt())
+    assert output == "show ver\nVersion 1\nR1#"
+
+
+def test_string_split_across_chunks():
+    output = run(FakeStream(["abc --Mo", "re-- def"]).read_until_string("--More--"))
+    assert output == "abc --More-- def"
+
+
+def test_matcher_line_start_split_across_chunks():
+    matcher = PatternMatcher(r"R1#", line_start=True)
+    # prompt in the echo isn't at the beginning of a line
+    assert matcher.feed("ping R1#\nok\nR") == 0
+    assert matcher.feed("1#") == 1
+    assert matcher.spans == [(12, 15)]
+
+
+def test_matcher_spans_are_absolute():
+    matcher = PatternMatcher(r"R1#", window=4)
+    for chunk in ["x" * 10, "R1", "#", "y" * 10, "R1#"]:
+        matcher.feed(chunk)
+    assert matcher.spans == [(10, 13), (23, 26)]
+
+
+@pytest.mark.parametrize("pattern, flags", [
+    (r"^R1#", 0),
+    (r"\AR1#", 0),
+    (r"^R1#", re.M),
+    (r"(?<=\n)R1#", 0),
+    (r"\bR1#", 0),
+])
+def test_matcher_anchors_at_window_start(pattern, flags):
+    # the window starts in the middle of a line, anchors must not match there
+    output = "show ver\nxxxxR1#yyyy\nR1#"
+    expected = [match.span() for match in re.finditer(pattern, output, flags)]
+    for split in range(len(output) + 1):
+        matcher = PatternMatcher(pattern, flags, window=4)
+        matcher.feed(output[:split])
+        matcher.feed(output[split:])
+        assert matcher.spans == expected, split
+
+
+def test_matcher_anchor_after_previous_match():
+    matcher = PatternMatcher(r"^R1#", re.M)
+    assert matcher.feed("R1#") == 1
+    # the data after the match continues the same line
+    assert matcher.feed("R1#") == 0
+    assert matcher.feed("\nR1#") == 1
+
+
+@pytest.mark.parametrize("read", [
+    lambda conn: conn.read_until_prompt(),
+    lambda conn: conn.read_until_prompt(read_for=1),
+    lambda conn: conn.read_until_string("NEVER#"),
+    lambda conn: conn.read_prompts(2),
+])
+def test_eof_raises(read):
+    conn = FakeStream(["show ver\n", "R1#"], eof=True, base_pattern=r"NEVER#")
+    conn.set_base_prompt("NEVER")
+    with pytest.raises(AionetConnectionError):
+        run(asyncio.wait_for(read(conn), 1))
+
+
+def test_invalid_prompt_fails_only_where_used():
+    conn = FakeStream(["R1(#"], base_pattern=r"R1\(#")
+    conn.set_base_prompt("R1(")
+    assert run(conn.read_until_prompt()) == "R1(#"
+    with pytest.raises(re.error):
+        run(conn.read_until_prompt_or_pattern("more"))
+
+
+def test_streaming_output_outlives_connection_timeout():
+    # every chunk arrives within the connection timeout, the whole output takes longer
+    chunks = ["line\n"] * 8 + ["R1#"]
+    assert run(FakeStream(chunks, delay=0.05, timeout=0.2).read_until_prompt()).startswith("line\n" * 8)
+    assert run(FakeStream(chunks, delay=0.05, timeout=0.2).read_until_string("R1#")).startswith("line\n" * 8)
+    output, prompt_ends = run(FakeStream(chunks, delay=0.05, timeout=0.2).read_prompts(1))
+    assert prompt_ends == [len(output)]
+
+
+def test_silence_longer_than_connection_timeout_raises():
+    with pytest.raises(TimeoutError):
+        run(FakeStream(["line\n"], timeout=0.1).read_until_prompt())
+
+
+def test_explicit_timeout_is_deadline_of_whole_read():
+    chunks = ["line\n"] * 8 + ["R1#"]
+    with pytest.raises(TimeoutError):
+        run(FakeStream(chunks, delay=0.05, timeout=0.2).read_until_prompt(timeout=0.2))
+
+
+def test_read_prompts_counts_line_start_prompts():
+    # prompt in the echo of the second command isn't counted
+    chunks = ["show clock\n12:00\nR", "1#ping R1#", "\nok\nR1", "#"]
+    output, prompt_ends = run(FakeStream(chunks).read_prompts(2))
+    assert output == "show clock\n12:00\nR1#ping R1#\nok\nR1#"
+    assert prompt_ends == [20, len(output)]
+
+
+def test_read_prompts_requires_base_pattern():
+    with pytest.raises(ValueError):
+        run(FakeStream(["R1#"], base_pattern="").read_prompts(1))
+
+
+def test_read_prompts_back_to_back_prompts():
+    output, prompt_ends = run(FakeStream(["user@R1> user@R1> "], base_pattern=r"user@R1> ").read_prompts(2))
+    assert prompt_ends == [9, 18]
+
+
+def test_split_pipelined_echo_after_prompt():
+    commands = ["show clock", "show ver"]
+    output = "show clock\n12:00\nR1#show ver\nVersion 1\nR1#"
+    prompt_ends = [20, len(output)]
+    assert BaseDevice._split_pipelined(commands, output, prompt_ends) == [
+        "show clock\n12:00\nR1#",
+        "show ver\nVersion 1\nR1#",
+    ]
+
+
+def test_split_pipelined_early_echo():
+    # line editor echoes the type-ahead commands before the device answers
+    commands = ["interface lo0", "description x", "exit"]
+    output = ("interface lo0\ndescription x\nexit\n"
+              "R1(config-if)#R1(config-if)#R1(config)#")
+    prompt_ends = [output.index("#") + 1, output.index("#", 50) + 1, len(output)]
+    assert BaseDevice._split_pipelined(commands, output, prompt_ends) == [
+        "interface lo0\nR1(config-if)#",
+        "description x\nR1(config-if)#",
+        "exit\nR1(config)#",
+    ]
+
+
+def test_split_pipelined_without_echo():
+    output = "a\nR1#\nR1#"
+    assert BaseDevice._split_pipelined(["a", ""], output, [5, 9]) == ["a\nR1#", "\nR1#"]
@@ -0,0 +1,96 @@
+"""
+Tests of device specs
+"""
+import asyncio
+import gc
+import pickle
+import weakref
+
+import pytest
+
+from aionet import DeviceSpec
+from aionet.vendors.devices import CiscoIOS
+
+
+def _spec(ip="10.0.0.1", **options):
+    return DeviceSpec(ip, "cisco_ios", username="admin", password="secret", **options)
+
+
+def test_spec_is_mapping_of_params():
+    spec = _spec(port=2222, secret="enable", timeout=30)
+    assert dict(spec) == dict(ip="10.0.0.1", device_type="cisco_ios", username="admin", password="secret",
+                              port=2222, secret="enable", timeout=30)
+    assert len(spec) == 7
+    assert spec["timeout"] == 30
+    assert "port" not in _spec()
+    with pytest.raises(KeyError):
+        _spec()["secret"]
+
+
+def test_spec_is_immutable():
+    spec = _spec()
+    with pytest.raises(AttributeError):
+        spec.ip = "10.0.0.2"
+    with pytest.raises(AttributeError):
+        del spec.ip
+    changed = spec.replace(ip="10.0.0.2", timeout=5)
+    assert (spec.ip, changed.ip, changed["timeout"]) == ("10.0.0.1", "10.0.0.2", 5)
+
+
+def test_equal_specs():
+    spec = _spec(timeout=30)
+    assert spec == _spec(timeout=30)
+    assert hash(spec) == hash(_spec(timeout=30))
+    assert spec != _spec(timeout=60)
+    assert spec == dict(spec)
+    assert len({spec, _spec(timeout=30), _spec("10.0.0.2", timeout=30)}) == 2
+
+
+def test_options_are_shared():
+    first = _spec("10.0.0.1", secret="enable", timeout=30)
+    second = _spec("10.0.0.2", timeout=30, secret="enable")
+    assert first._options is second._options
+    assert _spec(timeout=60)._options is not first._options
+
+
+def test_shared_options_are_dropped_with_the_last_spec():
+    specs = [_spec("10.0.0.%d" % i, timeout=12345) for i in range(3)]
+    options = weakref.ref(specs[0]._options)
+    del specs[:2]
+    gc.collect()
+    assert options() is not None
+    del specs
+    gc.collect()
+    assert options() is None
+    # equal options are shared again by new specs
+    assert _spec(timeout=12345)["timeout"] == 12345
+
+
+def test_unhashable_options_are_kept():
+    first = _spec(client_keys=["id_rsa"])
+    second = _spec(client_keys=["id_rsa"])
+    assert first == second
+    assert first["client_keys"] == ["id_rsa"]
+
+
+def test_pickle_round_trip():
+    spec = _spec(port=2222, timeout=30)
+    restored = pickle.loads(pickle.dumps(spec))
+    assert restored == spec
+    assert restored._options is spec._options
+
+
+def test_repr_hides_secrets():
+    text = repr(_spec(secret="enable", timeout=30))
+    assert "enable" not in text and "secret" not in text
+    assert "timeout=30" in text
+
+
+def test_handler_creates_device_of_the_platform():
+    async def main():
+        # devices take the running loop
+        return _spec(port=2222).handler()
+
+    device = asyncio.run(main())
+    assert isinstance(device, CiscoIOS)
+    assert device.host == "10.0.0.1"
@@ -0,0 +1,53 @@
+"""
+Tests of streaming command output, compared with send_command over the same data
+"""
+import asyncio
+
+import pytest
+
+from aionet.vendors.devices import CiscoIOS
+from fakes import FakeStream
+
+
+def _device(chunks):
+    device = CiscoIOS(ip="fake", username="admin", password="secret")
+    device._conn = FakeStream(chunks)
+    return device
+
+
+def _outputs(chunks, **kwargs):
+    async def main():
+        output = await _device(chunks).send_command("show version", **kwargs)
+        lines = [line async for line in _device(chunks).send_command_stream("show version", **kwargs)]
+        parts = [part async for part in _device(chunks).send_command_stream("show version", lines=False, **kwargs)]
+        return output, lines, parts
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("chunks", [
+    ["show version\r\nVersion 1\r\nuptime 1 day\r\nR1#"],
+    ["show ver", "sion\r", "\nVersion 1\r\n", "uptime 1 day\r\nR", "1#"],
+    ["show version\r\nVersion 1\r", "\nuptime 1 day\r\n\r\nR1#"],
+])
+def test_stream_matches_send_command(chunks):
+    output, lines, parts = _outputs(chunks)
+    assert lines == output.split("\n")
+    assert "".join(parts) == output
+
+
+@pytest.mark.parametrize("chunks", [
+    ["show version\r\n\r\nVersion 1\r\nR1#"],
+    ["show version\r\n", "\r\n", "Version 1\r\nR1#"],
+])
+def test_stream_drops_linefeed_left_by_echo(chunks):
+    output, lines, parts = _outputs(chunks)
+    assert output == "\nVersion 1"
+    assert lines == ["Version 1"]
+    assert parts == ["Version 1"]
+
+
+def test_stream_without_strip_command_keeps_echo():
+    output, lines, parts = _outputs(["show version\r\n\r\nVersion 1\r\nR1#"], strip_command=False)
+    assert lines == output.split("\n") == ["show version", "", "Version 1"]
+    assert "".join(parts) == output
@@ -0,0 +1,116 @@
+"""
+Tests of the cache of TextFSM templates, compared with parsing by CliTable
+"""
+import os
+
+import pytest
+from clitable import CliTable
+
+from aionet import utils
+from aionet.utils import TextFSMCache, clitable_to_dict
+
+INDEX = """Template, Hostname, Platform, Command
+
+version.textfsm, .*, cisco_ios, sh[[ow]] ver[[sion]]
+interfaces.textfsm:interfaces_mtu.textfsm, .*, cisco_ios, sh[[ow]] int[[erfaces]]
+"""
+
+VERSION = """Value VERSION (\\S+)
+Value UPTIME (.+)
+
+Start
+  ^Version ${VERSION}
+  ^uptime is ${UPTIME}
+"""
+
+INTERFACES = """Value Key NAME (\\S+)
+Value STATUS (up|down)
+
+Start
+  ^${NAME} is ${STATUS} -> Record
+"""
+
+INTERFACES_MTU = """Value Key NAME (\\S+)
+Value MTU (\\d+)
+
+Start
+  ^${NAME} mtu ${MTU} -> Record
+"""
+
+OUTPUT = """Version 15.2
+uptime is 1 day
+Gi1 is up
+Gi1 mtu 1500
+Gi2 is down
+Gi2 mtu 9000
+"""
+
+
+@pytest.fixture
+def template_dir(tmp_path, monkeypatch):
+    for name, text in (("index", INDEX), ("version.textfsm", VERSION), ("interfaces.textfsm", INTERFACES),
+                       ("interfaces_mtu.textfsm", INTERFACES_MTU)):
+        (tmp_path / name).write_text(text)
+    monkeypatch.setenv("NET_TEXTFSM", str(tmp_path))
+    return str(tmp_path)
+
+
+def _clitable(template_dir, command):
+    cli_table = CliTable("index", template_dir)
+    cli_table.ParseCmd(OUTPUT, {"Command": command, "Platform": "cisco_ios"})
+    return clitable_to_dict(cli_table)
+
+
+@pytest.mark.parametrize("command", ["show version", "sh ver", "show interfaces"])
+def test_parse_matches_clitable(template_dir, command):
+    assert TextFSMCache().parse(OUTPUT, "cisco_ios", command) == _clitable(template_dir, command)
+
+
+def test_multiple_templates_are_merged_by_key(template_dir):
+    assert TextFSMCache().parse(OUTPUT, "cisco_ios", "show interfaces") == [
+        {"name": "Gi1", "status": "up", "mtu": "1500"},
+        {"name": "Gi2", "status": "down", "mtu": "9000"},
+    ]
+
+
+def test_structured_data_without_template_is_raw_output(template_dir, monkeypatch):
+    monkeypatch.setattr(utils, "textfsm_cache", TextFSMCache())
+    assert utils.get_structured_data(OUTPUT, "cisco_ios", "show clock") == OUTPUT
+    assert utils.get_structured_data(OUTPUT, "cisco_ios", "show version") == [
+        {"version": "15.2", "uptime": "1 day"}]
+
+
+def test_templates_are_compiled_once(template_dir):
+    cache = TextFSMCache()
+    path = os.path.join(template_dir, "version.textfsm")
+    assert cache.template(path)[0] is cache.template(path)[0]
+
+
+def test_changed_template_is_reloaded(template_dir):
+    cache = TextFSMCache(check_interval=0)
+    path = os.path.join(template_dir, "version.textfsm")
+    assert cache.parse(OUTPUT, "cisco_ios", "show version") == [{"version": "15.2", "uptime": "1 day"}]
+    with open(path, "w") as template_file:
+        template_file.write("Value VERSION (\\S+)\n\nStart\n  ^Version ${VERSION}\n")
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert cache.parse(OUTPUT, "cisco_ios", "show version") == [{"version": "15.2"}]
+
+
+def test_changed_index_is_reloaded(template_dir):
+    cache = TextFSMCache(check_interval=0)
+    assert cache.match(template_dir, "cisco_ios", "show clock") is None
+    index = os.path.join(template_dir, "index")
+    with open(index, "a") as index_file:
+        index_file.write("version.textfsm, .*, cisco_ios, sh[[ow]] clo[[ck]]\n")
+    stat = os.stat(index)
+    os.utime(index, (stat.st_atime, stat.st_mtime + 10))
+    assert cache.match(template_dir, "cisco_ios", "show clock") == "version.textfsm"
+
+
+def test_least_recently_used_templates_are_evicted(template_dir):
+    cache = TextFSMCache(maxsize=1)
+    version = os.path.join(template_dir, "version.textfsm")
+    fsm = cache.template(version)[0]
+    cache.template(os.path.join(template_dir, "interfaces.textfsm"))
+    assert cache.template(version)[0] is not fsm